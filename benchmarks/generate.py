@@ -0,0 +1,117 @@
+"""Generate a synthetic `LOG_DIR` for benchmarks.
+
+The logs mimic real ones: a log for every weekday, with the agent's bursts of
+notifications on wake and unlock, short and long breaks, sleep at lunch, many
+projects, and `project-back` entries appended out of order.
+
+    python benchmarks/generate.py DIRECTORY [--days N] [--events N] [--seed N]
+"""
+
+import argparse
+import datetime
+import os
+import random
+from typing import List, Optional, TextIO
+
+ACTIVATIONS = [
+    "com.apple.screenIsUnlocked",
+    "NSWorkspaceSessionDidBecomeActiveNotification",
+    "NSWorkspaceDidWakeNotification",
+    "NSWorkspaceScreensDidWakeNotification",
+]
+DEACTIVATIONS = [
+    "com.apple.screenIsLocked",
+    "NSWorkspaceSessionDidResignActiveNotification",
+    "NSWorkspaceWillSleepNotification",
+    "NSWorkspaceScreensDidSleepNotification",
+]
+
+
+def _print(log: TextIO, timestamp, name: str, activity: str, project: str = ""):
+    print(timestamp, name, activity, project, sep="\t", file=log)
+
+
+def generate_day(
+    log: TextIO,
+    day: datetime.date,
+    events: int,
+    projects: List[str],
+    rnd: random.Random,
+):
+    """Write roughly events events for a working day."""
+    t = datetime.datetime.combine(day, datetime.time(7)) + datetime.timedelta(
+        seconds=rnd.randrange(2 * 3600)
+    )
+    end = t + datetime.timedelta(hours=rnd.uniform(7.5, 10.5))
+    # Each transition writes a burst of about two events.
+    step = (end - t) / max(events // 2, 1)
+    first = t
+    written = 0
+    working = False
+    while t < end and written < events:
+        if working:
+            burst = rnd.sample(DEACTIVATIONS, rnd.randint(1, 2))
+            activity = "IDLE"
+        else:
+            burst = rnd.sample(ACTIVATIONS, rnd.randint(1, 3))
+            activity = "WORKING"
+        for name in burst:
+            _print(log, t, name, activity)
+            t += datetime.timedelta(microseconds=rnd.randrange(1, 500_000))
+        written += len(burst)
+        working = not working
+        if working and rnd.random() < 0.2:
+            _print(log, t, "project", "WORKING", rnd.choice(projects))
+            written += 1
+        if working and written < 6 and rnd.random() < 0.1:
+            _print(log, first, "project-back", "WORKING", rnd.choice(projects))
+            written += 1
+        # Mostly short breaks and long stretches of work, sometimes lunch.
+        if working:
+            pause = rnd.expovariate(1 / (step.total_seconds() * 1.5))
+        elif rnd.random() < 0.05:
+            pause = rnd.uniform(1800, 3600)
+        else:
+            pause = rnd.expovariate(1 / (step.total_seconds() / 2))
+        t += datetime.timedelta(seconds=pause)
+    if working:
+        _print(log, t, "com.apple.screenIsLocked", "IDLE")
+
+
+def generate_logs(
+    log_dir: str,
+    days: int,
+    events: int,
+    seed: int = 0,
+    today: Optional[datetime.date] = None,
+    project_count: int = 30,
+):
+    """Write the weekday logs of days days up to and including today."""
+    os.makedirs(log_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    if today is None:
+        today = datetime.date.today()
+    projects = [f"PROJ-{i:03}" for i in range(project_count)]
+    with open(os.path.join(log_dir, "projects.txt"), "w") as f:
+        for p in projects:
+            print(p, "briefcase", file=f)
+    for i in range(days - 1, -1, -1):
+        day = today - datetime.timedelta(days=i)
+        if day.isoweekday() > 5 and day != today:
+            continue
+        with open(os.path.join(log_dir, f"{day}.log"), "w") as log:
+            generate_day(log, day, events, projects, rnd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--events", type=int, default=50, help="events per day")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_logs(args.directory, args.days, args.events, args.seed)
+
+
+if __name__ == "__main__":
+    main()
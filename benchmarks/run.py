@@ -0,0 +1,170 @@
+"""Benchmark the hot paths on synthetic logs of several sizes.
+
+For each size, generates a `LOG_DIR` with benchmarks/generate.py and times
+parsing, span evaluation, the menu and the report. Prints the results as
+JSON, so runs can be compared over time.
+
+    python benchmarks/run.py [--sizes small,medium,large] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from generate import generate_logs
+
+import time_tracker
+from time_tracker import (
+    DayResults,
+    Event,
+    filter_spans,
+    get_work_spans,
+    load_log,
+    write_menu,
+    write_report,
+)
+from time_tracker.arrays import (
+    filter_span_array,
+    get_work_span_array,
+    load_event_array,
+)
+from time_tracker.cache import get_cache_dir
+from time_tracker.mmlog import map_log
+from time_tracker.rollup import load_rollup
+from time_tracker.status import get_status_filename
+from time_tracker.tail import get_tail_filename
+from time_tracker.timeline import load_timelines, total_minutes
+
+# name: (days of history, events per day)
+SIZES = {
+    "small": (30, 20),
+    "medium": (365, 60),
+    "large": (3 * 365, 150),
+}
+
+
+def timeit(
+    fn: Callable[[], Any], repeat: int, setup: Callable[[], Any] = lambda: None
+) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times)}
+
+
+def remove(*paths: str):
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def read_mapped(day: datetime.date) -> List[Event]:
+    try:
+        with map_log(day) as log:
+            return list(log)
+    except FileNotFoundError:
+        return []
+
+
+def bench_size(log_dir: str, days: int, events: int, repeat: int) -> Dict[str, Any]:
+    today = datetime.date.today()
+    generate_logs(log_dir, days, events, today=today)
+    time_tracker.LOG_DIR = log_dir
+    all_days = [today - datetime.timedelta(days=i) for i in range(days)]
+    logs = [load_log(day) for day in all_days]
+    spans = [list(get_work_spans(events)) for events in logs]
+    devnull = open(os.devnull, "w")
+
+    def quietly(fn: Callable[[], Any]) -> Callable[[], Any]:
+        def run():
+            with contextlib.redirect_stdout(devnull):
+                fn()
+
+        return run
+
+    results = {
+        "parse_log": timeit(lambda: [load_log(day) for day in all_days], repeat),
+        "mapped_log": timeit(lambda: [read_mapped(day) for day in all_days], repeat),
+        "get_work_spans": timeit(
+            lambda: [list(get_work_spans(events)) for events in logs], repeat
+        ),
+        "filter_spans": timeit(lambda: [filter_spans(s) for s in spans], repeat),
+        "DayResults": timeit(lambda: [DayResults(events) for events in logs], repeat),
+        # The filtered spans of all days, both ways, from the logs on disk.
+        "spans_reference": timeit(
+            lambda: [filter_spans(get_work_spans(load_log(day))) for day in all_days],
+            repeat,
+        ),
+        "arrays": timeit(
+            lambda: filter_span_array(get_work_span_array(load_event_array(all_days))),
+            repeat,
+        ),
+        "stats_by_month": timeit(lambda: load_rollup("month"), repeat),
+        "timeline_totals": timeit(
+            lambda: total_minutes(load_timelines(all_days, filtered=True).values()),
+            repeat,
+        ),
+        "write_menu_cold": timeit(
+            quietly(write_menu),
+            repeat,
+            lambda: remove(get_status_filename(), get_tail_filename()),
+        ),
+        "write_menu": timeit(quietly(write_menu), repeat),
+        "write_report_cold": timeit(
+            quietly(write_report), repeat, lambda: remove(get_cache_dir())
+        ),
+        "write_report": timeit(quietly(write_report), repeat),
+    }
+    devnull.close()
+    results["arrays_speedup"] = (
+        results["spans_reference"]["min_s"] / results["arrays"]["min_s"]
+    )
+    return {
+        "days": days,
+        "events_per_day": events,
+        "log_files": sum(1 for events in logs if events),
+        "events": sum(len(events) for events in logs),
+        "results": results,
+    }
+
+
+def run(sizes: List[str], repeat: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "sizes": {},
+    }
+    for name in sizes:
+        days, events = SIZES[name]
+        with tempfile.TemporaryDirectory() as log_dir:
+            report["sizes"][name] = bench_size(log_dir, days, events, repeat)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    report = run(args.sizes.split(","), args.repeat)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Startup time of the menu, the command SwiftBar runs every minute.
+
+Runs the menu in fresh interpreters with `python -S -X importtime` against
+an empty home directory, and prints the import time breakdown as JSON: the
+median total, and the modules with the largest self time. `-S` skips the
+`site` module, so the `.pth` files of installed packages, which may import
+anything, don't count against the menu.
+
+    python benchmarks/startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple
+
+MENU = "import sys; sys.argv = ['time_tracker']; from time_tracker import main; main()"
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTime]:
+    """Parse the output of `python -X importtime`."""
+    result = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        result.append(ImportTime(stripped, int(self_us), int(cumulative_us), depth))
+    return result
+
+
+def run_menu(home: str) -> List[ImportTime]:
+    """Run the menu once and return its imports."""
+    env = dict(os.environ, HOME=home)
+    src = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-S", "-X", "importtime", "-c", MENU],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def total_us(imports: List[ImportTime], prefix: str = "") -> int:
+    """Cumulative time of the top level imports, optionally of a package."""
+    return sum(
+        i.cumulative_us for i in imports if i.depth == 0 and i.module.startswith(prefix)
+    )
+
+
+def measure(runs: int = 5, top: int = 15) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as home:
+        all_runs = [run_menu(home) for _ in range(runs)]
+    self_times: Dict[str, List[int]] = {}
+    for imports in all_runs:
+        for i in imports:
+            self_times.setdefault(i.module, []).append(i.self_us)
+    slowest = sorted(
+        ((statistics.median(t), m) for m, t in self_times.items()), reverse=True
+    )[:top]
+    return {
+        "runs": runs,
+        "total_us": statistics.median(total_us(i) for i in all_runs),
+        "time_tracker_us": statistics.median(
+            total_us(i, "time_tracker") for i in all_runs
+        ),
+        "modules": len(all_runs[-1]),
+        "slowest": [{"module": m, "self_us": t} for t, m in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    json.dump(measure(args.runs, args.top), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
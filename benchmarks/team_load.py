@@ -0,0 +1,123 @@
+"""Load test of the team server.
+
+Starts a team server on a Unix socket in a temporary directory, connects many
+clients that each send batches of events the way the agent's spool does,
+and runs range queries at the same time. Prints the ingestion throughput and
+the latencies of batches and queries as JSON.
+
+    python benchmarks/team_load.py [--clients 200] [--batches 20] [--events 10]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from time_tracker import Activity, Event, format_event
+from time_tracker.team import TeamServer
+
+START = datetime.datetime(2025, 1, 6, 8, 0)
+
+
+def client_events(client: int, count: int) -> List[Event]:
+    """Alternating work and breaks, a few minutes each, from START on."""
+    t = START + datetime.timedelta(seconds=client)
+    events = []
+    for i in range(count):
+        activity = Activity.WORKING if i % 2 == 0 else Activity.IDLE
+        project = f"P{(client + i // 10) % 7}" if i % 10 == 0 else ""
+        events.append(Event(t, "event", activity, project))
+        t += datetime.timedelta(minutes=7 + i % 13)
+    return events
+
+
+def latencies(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "median_ms": statistics.median(values) * 1000,
+        "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))] * 1000,
+    }
+
+
+async def run_client(
+    path: str, client: int, batches: int, events: int, times: List[float]
+) -> None:
+    all_events = client_events(client, batches * events)
+    reader, writer = await asyncio.open_unix_connection(path)
+    for b in range(batches):
+        batch = all_events[b * events : (b + 1) * events]
+        lines = "".join(
+            f"{b * events + i + 1}\t{format_event(e)}\n" for i, e in enumerate(batch)
+        )
+        start = time.perf_counter()
+        writer.write(f"EVENTS\tuser{client}\tload\t{len(batch)}\n{lines}".encode())
+        await writer.drain()
+        reply = await reader.readline()
+        times.append(time.perf_counter() - start)
+        assert reply.startswith(b"OK"), reply
+    writer.close()
+
+
+async def run_queries(path: str, count: int, times: List[float]) -> None:
+    reader, writer = await asyncio.open_unix_connection(path)
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(b"QUERY\t2025-01-01\t2025-12-31\n")
+        await writer.drain()
+        reply = await reader.readline()
+        times.append(time.perf_counter() - start)
+        assert reply.startswith(b"{"), reply
+        await asyncio.sleep(0.001)
+    writer.close()
+
+
+async def load_test(
+    clients: int, batches: int, events: int, queries: int
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "team.sock")
+        team = TeamServer(os.path.join(tmp, "data"))
+        server = await team.start(f"unix:{path}")
+        batch_times: List[float] = []
+        query_times: List[float] = []
+        start = time.perf_counter()
+        async with server:
+            await asyncio.gather(
+                run_queries(path, queries, query_times),
+                *(
+                    run_client(path, c, batches, events, batch_times)
+                    for c in range(clients)
+                ),
+            )
+        elapsed = time.perf_counter() - start
+        return {
+            "clients": clients,
+            "events": team.events,
+            "seconds": elapsed,
+            "events_per_s": team.events / elapsed,
+            "batches": latencies(batch_times),
+            "queries": latencies(query_times),
+            "total_hours": team.query(datetime.date.min, datetime.date.max)["total"],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    result = asyncio.run(
+        load_test(args.clients, args.batches, args.events, args.queries)
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
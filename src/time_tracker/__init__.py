@@ -8,16 +8,31 @@
 # <xbar.abouturl>http://oefelein.de/</xbar.abouturl>
 
 from collections import defaultdict
-from dataclasses import dataclass
 import datetime
 import enum
+import functools
+import heapq
 import os
 import os.path
 import sys
-from typing import Iterable, List, NamedTuple, Optional, Sequence, TextIO
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
 
 BARS = " ▁▂▃▄▅▆▇█"
 LOG_DIR = os.path.expanduser("~/.time-tracker")
+# Where log_event writes: "text", "binary" or "both" logs, or "sqlite".
+LOG_FORMAT = os.environ.get("TIME_TRACKER_LOG_FORMAT", "text")
+# How far out of order the events of a log may be and still be sorted.
+REORDER_WINDOW = 64
 
 ANSI_RESET = "\033[0m"
 ANSI_RED = "\033[31m"
@@ -77,12 +92,136 @@ class Span(NamedTuple):
         return f"{start:%H:%M}-{end:%H:%M} ({self.duration() / ONE_HOUR:.2f}){' ' if self.project else ''}{self.project}"
 
 
+def write_json(filename: str, data) -> None:
+    """Write data to filename as JSON, replacing the file atomically."""
+    import json
+
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, filename)
+
+
 def get_log_filename(day: Optional[datetime.date] = None) -> str:
     if day is None:
         day = datetime.date.today()
     return os.path.join(LOG_DIR, f"{day}.log")
 
 
+def get_binary_log_filename(day: Optional[datetime.date] = None) -> str:
+    if day is None:
+        day = datetime.date.today()
+    return os.path.join(LOG_DIR, f"{day}.bin")
+
+
+def get_archive_filename(day: datetime.date) -> str:
+    return os.path.join(LOG_DIR, "archive", f"{day:%Y-%m}.zip")
+
+
+def get_corrections_dir() -> str:
+    return os.path.join(LOG_DIR, "corrections")
+
+
+def get_corrections_filename(day: Optional[datetime.date] = None) -> str:
+    if day is None:
+        day = datetime.date.today()
+    return os.path.join(get_corrections_dir(), f"{day}.log")
+
+
+def get_machines_dir() -> str:
+    return os.path.join(LOG_DIR, "machines")
+
+
+def get_source_log_filenames(day: Optional[datetime.date] = None) -> List[str]:
+    """The day's logs besides the main one: of other machines, and corrections.
+
+    Each machine has a directory of text logs in `LOG_DIR/machines`, e.g.
+    synced from a second laptop.
+    """
+    if day is None:
+        day = datetime.date.today()
+    filenames = []
+    try:
+        machines = sorted(os.listdir(get_machines_dir()))
+    except FileNotFoundError:
+        machines = []
+    for machine in machines:
+        filename = os.path.join(get_machines_dir(), machine, f"{day}.log")
+        if os.path.exists(filename):
+            filenames.append(filename)
+    if os.path.exists(get_corrections_filename(day)):
+        filenames.append(get_corrections_filename(day))
+    return filenames
+
+
+def _scan_log_days(directory: str) -> Iterator[datetime.date]:
+    try:
+        names = os.listdir(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext == ".log":
+            try:
+                yield datetime.date.fromisoformat(stem)
+            except ValueError:
+                pass
+
+
+def list_source_log_days() -> Set[datetime.date]:
+    """The days that have logs of other machines, or corrections."""
+    days = set(_scan_log_days(get_corrections_dir()))
+    try:
+        machines = os.listdir(get_machines_dir())
+    except FileNotFoundError:
+        machines = []
+    for machine in machines:
+        days.update(_scan_log_days(os.path.join(get_machines_dir(), machine)))
+    return days
+
+
+def list_log_days() -> List[datetime.date]:
+    """The days that have a log, in order."""
+    if LOG_FORMAT == "sqlite":
+        from time_tracker.db import list_days
+
+        return list_days()
+    return list_file_log_days()
+
+
+def list_file_log_days() -> List[datetime.date]:
+    """The days that have a text, binary, archived or other log, in order."""
+    days = set()
+    try:
+        entries = os.scandir(LOG_DIR)
+    except FileNotFoundError:
+        return []
+    with entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext in (".log", ".bin"):
+                try:
+                    days.add(datetime.date.fromisoformat(stem))
+                except ValueError:
+                    pass
+            elif entry.name == "archive":
+                from time_tracker.archive import archived_days
+
+                days.update(archived_days())
+            elif entry.name in ("corrections", "machines"):
+                days.update(list_source_log_days())
+    return sorted(days)
+
+
+def format_event(event: Event) -> str:
+    """The log line of event, without the newline."""
+    return f"{event.timestamp}\t{event.name}\t{event.activity.name}\t{event.project}"
+
+
+def print_event(event: Event, log: TextIO):
+    print(format_event(event), file=log)
+
+
 def log_event(
     name: str,
     activity: Activity,
@@ -92,9 +231,20 @@ def log_event(
     os.makedirs(LOG_DIR, exist_ok=True)
     if not now:
         now = datetime.datetime.now()
-    filename = get_log_filename(now.date())
-    with open(filename, mode="a") as log:
-        print(now, name, activity.name, project, sep="\t", file=log)
+    event = Event(now, name, activity, project)
+    if LOG_FORMAT == "sqlite":
+        from time_tracker.db import append_event
+
+        append_event(event)
+        return
+    if LOG_FORMAT != "binary":
+        filename = get_log_filename(now.date())
+        with open(filename, mode="a") as log:
+            print_event(event, log)
+    if LOG_FORMAT != "text":
+        from time_tracker.binlog import append_event
+
+        append_event(event)
 
 
 def parse_log_line(line: str) -> Event:
@@ -105,22 +255,134 @@ def parse_log_line(line: str) -> Event:
     )
 
 
-def parse_log(log: TextIO) -> Sequence[Event]:
-    lines = log.readlines()
-    return [parse_log_line(line) for line in lines]
+class ParseErrors:
+    """Counts the invalid lines of a log, keeping the first few."""
+
+    MAX_LINES = 10
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.lines: List[Tuple[int, str]] = []
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def add(self, number: int, line: str) -> None:
+        self.count += 1
+        if len(self.lines) < self.MAX_LINES:
+            self.lines.append((number, line))
+
+
+def iter_log(log: TextIO, errors: Optional[ParseErrors] = None) -> Iterator[Event]:
+    """Parse the events of log, reading it line by line.
+
+    Invalid lines raise, unless errors is given; then they are skipped and
+    recorded there.
+    """
+    for number, line in enumerate(log, 1):
+        try:
+            yield parse_log_line(line)
+        except (KeyError, ValueError):
+            if errors is None:
+                raise
+            errors.add(number, line)
+
+
+def parse_log(log: TextIO, errors: Optional[ParseErrors] = None) -> Sequence[Event]:
+    return list(iter_log(log, errors))
 
 
-def load_log(day: Optional[datetime.date] = None) -> Sequence[Event]:
-    filename = get_log_filename(day)
+def iter_day_log(
+    day: Optional[datetime.date] = None, errors: Optional[ParseErrors] = None
+) -> Iterator[Event]:
+    """Like `load_log`, but yields the events as they are parsed."""
+    if LOG_FORMAT == "sqlite":
+        from time_tracker.db import iter_events
+
+        return iter_events(day)
+    return iter_file_log(day, errors)
+
+
+def reorder(events: Iterable[Event], window: int = REORDER_WINDOW) -> Iterator[Event]:
+    """Sort events that are less than window places out of order, streaming.
+
+    Events further out of order are passed on as soon as possible.
+    """
+    heap: List[Tuple[datetime.datetime, int, Event]] = []
+    for i, e in enumerate(events):
+        if len(heap) < window:
+            heapq.heappush(heap, (e.timestamp, i, e))
+        else:
+            yield heapq.heappushpop(heap, (e.timestamp, i, e))[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def merge_events(
+    main: Iterable[Event], sources: Sequence[Iterable[Event]]
+) -> Iterator[Event]:
+    """Merge the events of sources into those of main, streaming.
+
+    The events of main are taken in the order they were logged. Each of
+    sources is sorted with `reorder` first, and each of its events goes before
+    the first event of main that is later. Events at the same time keep the
+    order of main and sources.
+    """
+    if not sources:
+        return iter(main)
+    return heapq.merge(
+        main, *(reorder(source) for source in sources), key=lambda e: e.timestamp
+    )
+
+
+def iter_text_log(
+    filename: str, errors: Optional[ParseErrors] = None
+) -> Iterator[Event]:
+    with open(filename) as log:
+        yield from iter_log(log, errors)
+
+
+def iter_file_log(
+    day: Optional[datetime.date] = None, errors: Optional[ParseErrors] = None
+) -> Iterator[Event]:
+    """The events of the day's logs.
+
+    The main log is binary, text or archived, and is evaluated in the order it
+    was logged, like before there were other logs. The logs of other machines
+    and the corrections are merged into it in time order.
+    """
+    sources = [iter_text_log(f, errors) for f in get_source_log_filenames(day)]
+    return merge_events(iter_main_log(day, errors), sources)
+
+
+def iter_main_log(
+    day: Optional[datetime.date] = None, errors: Optional[ParseErrors] = None
+) -> Iterator[Event]:
+    """The events of the day's binary, text or archived log, as logged."""
+    if os.path.exists(get_binary_log_filename(day)):
+        from time_tracker.binlog import read_binary_log
+
+        yield from read_binary_log(day)
+        return
     try:
-        with open(filename) as log:
-            return parse_log(log)
+        log = open(get_log_filename(day))
     except FileNotFoundError:
-        return []
+        if day is not None and os.path.exists(get_archive_filename(day)):
+            from time_tracker.archive import iter_archived_log
+
+            yield from iter_archived_log(day, errors)
+        return
+    with log:
+        yield from iter_log(log, errors)
+
+
+def load_log(
+    day: Optional[datetime.date] = None, errors: Optional[ParseErrors] = None
+) -> Sequence[Event]:
+    return list(iter_day_log(day, errors))
 
 
-@dataclass
-class Project:
+class Project(NamedTuple):
     name: str
     symbol: str
 
@@ -135,30 +397,60 @@ def load_projects() -> List[Project]:
         return []
 
 
+class SpanState:
+    """State of the work span state machine between two events."""
+
+    def __init__(
+        self,
+        working: bool = False,
+        start: Optional[datetime.datetime] = None,
+        project: str = "",
+    ):
+        self.working = working
+        self.start = start if start is not None else datetime.datetime.now()
+        self.project = project
+
+    def feed(self, e: Event) -> Optional[Span]:
+        """Advance the state by one event, returning the span it closes, if any."""
+        if e.activity is Activity.WORKING:
+            if not self.working:
+                self.working = True
+                self.start = e.timestamp
+            if e.project and e.project != self.project:
+                closed = None
+                if e.timestamp > self.start:
+                    closed = Span(self.start, e.timestamp, self.project)
+                    self.start = e.timestamp
+                self.project = e.project
+                return closed
+        else:
+            if self.working:
+                self.working = False
+                return Span(self.start, e.timestamp, self.project)
+        return None
+
+    def open_span(self, now: datetime.datetime) -> Optional[Span]:
+        """The span that is still open at now, if any."""
+        if self.working and self.start.date() == now.date():
+            return Span(self.start, now, self.project)
+        return None
+
+
+@functools.singledispatch
 def get_work_spans(
     events: Sequence[Event], now: datetime.datetime = datetime.datetime.now()
 ) -> Iterable[Span]:
-    working = False
-    start = datetime.datetime.now()
-    project = ""
+    state = SpanState()
     for e in events:
-        if e.activity is Activity.WORKING:
-            if not working:
-                working = True
-                start = e.timestamp
-            if e.project and e.project != project:
-                if e.timestamp > start:
-                    yield Span(start, e.timestamp, project)
-                    start = e.timestamp
-                project = e.project
-        else:
-            if working:
-                working = False
-                yield Span(start, e.timestamp, project)
-    if working and start.date() == now.date():
-        yield Span(start, now, project)
+        span = state.feed(e)
+        if span is not None:
+            yield span
+    span = state.open_span(now)
+    if span is not None:
+        yield span
 
 
+@functools.singledispatch
 def filter_short_breaks(spans: Iterable[Span]) -> Iterable[Span]:
     it = iter(spans)
     try:
@@ -175,14 +467,17 @@ def filter_short_breaks(spans: Iterable[Span]) -> Iterable[Span]:
     yield current
 
 
+@functools.singledispatch
 def filter_short_work(spans: Iterable[Span]) -> Iterable[Span]:
     return (s for s in spans if s.duration() > SHORT_WORK)
 
 
+@functools.singledispatch
 def filter_spans(spans: Iterable[Span]) -> List[Span]:
     return list(filter_short_work(filter_short_breaks(spans)))
 
 
+@functools.singledispatch
 def get_cumulative_work(spans: Iterable[Span]) -> float:
     # TODO adjust durations for required breaks
     total = sum((s.rounded_duration() for s in spans), datetime.timedelta())
@@ -202,8 +497,7 @@ class Level(enum.IntEnum):
         return f"{self.ansi_color_code()}{text}{ANSI_RESET}"
 
 
-@dataclass
-class Message:
+class Message(NamedTuple):
     level: Level
     text: str
 
@@ -230,10 +524,17 @@ class DayResults:
     messages: List[Message] = []
     level: Level = Level.ERROR
 
-    def __init__(self, events: Sequence[Event]):
+    def __init__(self, events: Sequence[Event], spans: Optional[Iterable[Span]] = None):
+        """Evaluate the events of a day.
+
+        If the work spans have already been derived from the events, pass them
+        as spans. Then events only needs to hold the last event of the day.
+        """
         if events:
             try:
-                self.spans = filter_spans(get_work_spans(events))
+                if spans is None:
+                    spans = get_work_spans(events)
+                self.spans = filter_spans(spans)
                 self.total_hours = get_cumulative_work(self.spans)
                 self.messages = list(get_messages(self.spans, self.total_hours))
                 last = events[-1]
@@ -254,6 +555,56 @@ class DayResults:
             self.messages = [Message(Level.ERROR, "No log file")]
 
 
+def warn_parse_errors(results: DayResults, errors: ParseErrors) -> None:
+    """Add a warning about the skipped invalid lines, if any, to results."""
+    if errors:
+        number, _line = errors.lines[0]
+        results.messages = results.messages + [
+            Message(
+                Level.WARNING,
+                f"Skipped {errors.count} invalid log lines, the first in line {number}",
+            )
+        ]
+        results.level = max(m.level for m in results.messages)
+
+
+def write_parse_errors(errors: ParseErrors) -> None:
+    """Warn about the invalid lines skipped by a command over many logs."""
+    if errors:
+        _number, line = errors.lines[0]
+        print(
+            Level.WARNING.ansi_format(
+                f"Skipped {errors.count} invalid log lines, the first {line.strip()!r}"
+            )
+        )
+
+
+def evaluate_day(
+    day: Optional[datetime.date] = None, now: Optional[datetime.datetime] = None
+) -> DayResults:
+    """Like `DayResults(load_log(day))`, but streaming and tolerant.
+
+    Only the work spans are kept in memory, not the events. Invalid lines are
+    skipped with a warning rather than failing the whole day.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    errors = ParseErrors()
+    state = SpanState()
+    spans: List[Span] = []
+    last: Optional[Event] = None
+    for last in iter_day_log(day, errors):
+        span = state.feed(last)
+        if span is not None:
+            spans.append(span)
+    span = state.open_span(now)
+    if span is not None:
+        spans.append(span)
+    results = DayResults([last], spans) if last is not None else DayResults([])
+    warn_parse_errors(results, errors)
+    return results
+
+
 class ProjectStats:
     stats: defaultdict[str, float]
     total = 0.0
@@ -268,7 +619,9 @@ class ProjectStats:
 
 
 def write_menu():
-    results = DayResults(load_log())
+    from time_tracker.status import load_status_results
+
+    results = load_status_results()
     projects = load_projects()
 
     project_symbol = "questionmark.circle"
@@ -299,58 +652,335 @@ def write_menu():
         )
 
 
-def write_report():
+def _init_report_worker(log_dir: str):
+    global LOG_DIR
+    LOG_DIR = log_dir
+
+
+def map_day_results(
+    days: Sequence[datetime.date], today: datetime.date, jobs: int = 1
+) -> Iterable[DayResults]:
+    """Evaluate days, in order, using up to jobs processes."""
+    from time_tracker.cache import load_day_results
+
+    if jobs <= 1 or len(days) <= 1:
+        for day in days:
+            yield load_day_results(day, today)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    import itertools
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_report_worker, initargs=(LOG_DIR,)
+    ) as pool:
+        yield from pool.map(load_day_results, days, itertools.repeat(today))
+
+
+def write_weekly_totals(project_stats: ProjectStats):
+    print()
+    print(f"{ANSI_BOLD}Weekly totals:{ANSI_RESET}")
+    for project, hours in project_stats.stats.items():
+        print(f"{hours:5.2f} - {project}")
+    print(f"{ANSI_BOLD}{project_stats.total:5.2f} - total{ANSI_RESET}")
+
+
+def write_report(
+    jobs: int = 1,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+):
+    """Report the weekdays from start to end, with the totals of each week.
+
+    Without a range, report the weekdays since the first of the month a week
+    ago, up to yesterday, including those without a log. With a range, only
+    report the weekdays that have a log. Either way, only days with a log are
+    evaluated, found with a single scan of the log directory.
+    """
+    from time_tracker.cache import evict_cache
+
     today = datetime.date.today()
-    a_week_ago = today - datetime.timedelta(days=7)
-    day = datetime.date(a_week_ago.year, a_week_ago.month, 1)
+    logged = list_log_days()
+    if start is None and end is None:
+        a_week_ago = today - datetime.timedelta(days=7)
+        start = datetime.date(a_week_ago.year, a_week_ago.month, 1)
+        end = today - datetime.timedelta(days=1)
+        days = [
+            start + datetime.timedelta(days=i) for i in range((end - start).days + 1)
+        ]
+        weekdays = [day for day in days if day.isoweekday() < 6]
+    else:
+        start = start or datetime.date.min
+        end = end or today
+        weekdays = [
+            day for day in logged if start <= day <= end and day.isoweekday() < 6
+        ]
+    logged_set = set(logged)
+    day_results = iter(
+        map_day_results([day for day in weekdays if day in logged_set], today, jobs)
+    )
     project_stats = ProjectStats()
-    while day < today:
-        weekday = day.isoweekday()
-        if weekday < 6:
-            results = DayResults(load_log(day=day))
-            print()
-            print(
-                f"{ANSI_BOLD}{day:%d.%m.%Y - %A}: {results.total_hours:.2f}{ANSI_RESET}"
-            )
-            for i, s in enumerate(results.spans):
-                print(f"{ANSI_SHADES[i % 2]}{s}{ANSI_RESET}")
-            for message in results.messages:
-                print(message.level.ansi_format(message.text))
-            project_stats.add(results.spans)
-        elif weekday == 6:
-            print()
-            print(f"{ANSI_BOLD}Weekly totals:{ANSI_RESET}")
-            for project, hours in project_stats.stats.items():
-                print(f"{hours:5.2f} - {project}")
-            print(f"{ANSI_BOLD}{project_stats.total:5.2f} - total{ANSI_RESET}")
+    week = None
+    for day in weekdays:
+        monday = day - datetime.timedelta(days=day.weekday())
+        if week is not None and monday != week:
+            write_weekly_totals(project_stats)
             project_stats = ProjectStats()
-
-        day += datetime.timedelta(days=1)
+        week = monday
+        results = next(day_results) if day in logged_set else DayResults([])
+        print()
+        print(f"{ANSI_BOLD}{day:%d.%m.%Y - %A}: {results.total_hours:.2f}{ANSI_RESET}")
+        for i, s in enumerate(results.spans):
+            print(f"{ANSI_SHADES[i % 2]}{s}{ANSI_RESET}")
+        for message in results.messages:
+            print(message.level.ansi_format(message.text))
+        project_stats.add(results.spans)
+    # Only total the last week once it is over.
+    if week is not None and week + datetime.timedelta(days=5) <= end:
+        write_weekly_totals(project_stats)
+    evict_cache()
 
 
 def log_project(project: str):
-    log_event("project", Activity.WORKING, project)
+    from time_tracker.spool import spool_for_team
+    from time_tracker.status import update_status
 
+    now = datetime.datetime.now()
+    log_event("project", Activity.WORKING, project, now)
+    spool_for_team(Event(now, "project", Activity.WORKING, project))
+    update_status()
 
-def log_project_back(project: str):
-    events = load_log()
-    timestamp = events[0].timestamp if events else None
-    log_event("project-back", Activity.WORKING, project, now=timestamp)
 
+def log_correction(event: Event):
+    """Log an event of the past, to the corrections rather than the main log."""
+    if LOG_FORMAT == "sqlite":
+        log_event(event.name, event.activity, event.project, event.timestamp)
+        return
+    os.makedirs(get_corrections_dir(), exist_ok=True)
+    with open(get_corrections_filename(event.timestamp.date()), mode="a") as log:
+        print_event(event, log)
 
-def main():
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "report":
-            write_report()
-        elif sys.argv[1] == "project":
-            log_project(sys.argv[2])
-        elif sys.argv[1] == "project-back":
-            log_project_back(sys.argv[2])
-        else:
-            print(f"Unknown command: {sys.argv[1]}")
+
+def log_project_back(project: str, now: Optional[datetime.datetime] = None):
+    """Switch to project, back to when the current project was chosen.
+
+    That is back to the last event with a project since work started, or to
+    when work started. When not working, it's like `log_project`.
+    """
+    from time_tracker.spool import spool_for_team
+    from time_tracker.status import update_status
+
+    if now is None:
+        now = datetime.datetime.now()
+    state = SpanState()
+    since = None
+    for e in load_log(now.date()):
+        was_working = state.working
+        state.feed(e)
+        if not state.working:
+            since = None
+        elif not was_working or e.project:
+            since = e.timestamp
+    if since is not None:
+        event = Event(since, "project-back", Activity.WORKING, project)
+        log_correction(event)
+    else:
+        event = Event(now, "project-back", Activity.WORKING, project)
+        log_event(event.name, event.activity, event.project, event.timestamp)
+    spool_for_team(event)
+    update_status(now.date())
+
+
+def add_range_arguments(parser):
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=datetime.date.fromisoformat,
+        help="first day (YYYY-MM-DD), default: the first log",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=datetime.date.fromisoformat,
+        help="last day (YYYY-MM-DD), default: today",
+    )
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="time_tracker",
+        description="Track working hours. Without a command, write the menu.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record where the time goes, see the perf command",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser(
+        "report", help="report the recent weeks, or the days with logs in a range"
+    )
+    add_range_arguments(report)
+    report.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="evaluate days in this many processes",
+    )
+    project = commands.add_parser("project", help="switch to a project")
+    project.add_argument("project")
+    project_back = commands.add_parser(
+        "project-back", help="switch to a project since the start of the day"
+    )
+    project_back.add_argument("project")
+    convert = commands.add_parser("convert", help="convert the logs of past days")
+    convert.add_argument("format", choices=["binary", "text"])
+    commands.add_parser("compact", help="archive the logs of past months")
+    commands.add_parser("import-db", help="import the logs into the database")
+    commands.add_parser(
+        "totals", help="show the running totals of today, the week and the month"
+    )
+    commands.add_parser("reconcile", help="rebuild the running totals from the logs")
+    export = commands.add_parser(
+        "export", help="export the work spans as CSV or JSON lines"
+    )
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    export.add_argument(
+        "--days", action="store_true", help="export the results of each day instead"
+    )
+    add_range_arguments(export)
+    export.add_argument(
+        "-o", "--output", help="the file to write, default: standard output"
+    )
+    heatmap = commands.add_parser(
+        "heatmap", help="show the hours worked by weekday and hour of the day"
+    )
+    add_range_arguments(heatmap)
+    heatmap.add_argument("-p", "--project", help="only this project")
+    heatmap.add_argument(
+        "--by-project", action="store_true", help="one heatmap per project"
+    )
+    commands.add_parser("watch", help="show today live, until interrupted")
+    team_server = commands.add_parser("team-server", help="run the team server")
+    team_server.add_argument(
+        "--listen",
+        required=True,
+        help="unix:PATH or HOST:PORT to accept the agents' events on",
+    )
+    team_server.add_argument(
+        "--data", help="where to store the events, default: the team directory"
+    )
+    team_query = commands.add_parser(
+        "team-query", help="sum up the team's hours on the team server"
+    )
+    add_range_arguments(team_query)
+    perf = commands.add_parser("perf", help="summarize the recorded timings")
+    perf.add_argument(
+        "-n", "--runs", type=int, default=100, help="the number of recent runs"
+    )
+    query = commands.add_parser("query", help="sum up the hours worked")
+    query.add_argument("-p", "--project", help="only this project")
+    add_range_arguments(query)
+    query.add_argument(
+        "--rebuild", action="store_true", help="rebuild the index from all logs"
+    )
+    stats = commands.add_parser("stats", help="sum up the hours by period")
+    stats.add_argument(
+        "--by", choices=["week", "month", "quarter", "year"], default="month"
+    )
+    add_range_arguments(stats)
+    return parser
+
+
+def run_command(argv: Sequence[str]):
+    args = build_parser().parse_args(argv)
+    if args.command == "report":
+        write_report(args.jobs, args.start, args.end)
+    elif args.command == "project":
+        log_project(args.project)
+    elif args.command == "project-back":
+        log_project_back(args.project)
+    elif args.command == "convert":
+        from time_tracker.binlog import convert_logs
+
+        print(f"Converted {convert_logs(args.format)} logs to {args.format}")
+    elif args.command == "compact":
+        from time_tracker.archive import compact
+
+        logs, archives = compact()
+        print(f"Archived {logs} logs into {archives} archives")
+    elif args.command == "import-db":
+        from time_tracker.db import get_db_filename, import_logs
+
+        print(f"Imported {import_logs()} days into {get_db_filename()}")
+    elif args.command == "totals":
+        from time_tracker.totals import write_totals
+
+        write_totals()
+    elif args.command == "reconcile":
+        from time_tracker.totals import reconcile
+
+        days, drifted = reconcile()
+        print(f"Rebuilt the totals of {days} days, {drifted} of them had drifted")
+    elif args.command == "export":
+        from time_tracker.export import export
+
+        export(args.format, args.days, args.start, args.end, args.output)
+    elif args.command == "heatmap":
+        from time_tracker.heatmap import write_heatmap
+
+        write_heatmap(args.start, args.end, args.project, args.by_project)
+    elif args.command == "watch":
+        from time_tracker.watch import watch
+
+        try:
+            watch()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "team-server":
+        import asyncio
+
+        from time_tracker.team import serve
+
+        asyncio.run(serve(args.listen, args.data))
+    elif args.command == "team-query":
+        from time_tracker.team import write_team_query
+
+        today = datetime.date.today()
+        write_team_query(args.start or datetime.date.min, args.end or today)
+    elif args.command == "perf":
+        from time_tracker.perf import write_perf
+
+        write_perf(args.runs)
+    elif args.command == "query":
+        from time_tracker.index import write_query
+
+        write_query(args.project, args.start, args.end, args.rebuild)
+    elif args.command == "stats":
+        from time_tracker.rollup import write_stats
+
+        write_stats(args.by, args.start, args.end)
+
+
+def run(argv: Sequence[str]):
+    if argv:
+        run_command(argv)
     else:
         write_menu()
 
 
+def main():
+    argv = sys.argv[1:]
+    if "--profile" in argv or os.environ.get("TIME_TRACKER_PROFILE"):
+        from time_tracker.perf import run_profiled
+
+        run_profiled(run, [arg for arg in argv if arg != "--profile"])
+    else:
+        run(argv)
+
+
 if __name__ == "__main__":
     main()
@@ -2,15 +2,19 @@ import AppKit
 import Foundation
 from PyObjCTools import AppHelper
 
-from time_tracker import Activity, log_event
+from time_tracker import Activity
+from time_tracker.spool import client_from_env
+from time_tracker.writer import EventWriter
+
+writer = EventWriter(team=client_from_env())
 
 
 class Observer(Foundation.NSObject):
     def onActivation_(self, notification: Foundation.NSNotification):
-        log_event(notification.name(), Activity.WORKING)
+        writer.log(notification.name(), Activity.WORKING)
 
     def onDeactivation_(self, notification: Foundation.NSNotification):
-        log_event(notification.name(), Activity.IDLE)
+        writer.log(notification.name(), Activity.IDLE)
 
 
 def main() -> None:
@@ -48,14 +52,17 @@ def main() -> None:
         wnc.addObserver_selector_name_object_(
             observer, "onDeactivation:", notification, None
         )
-    log_event("AgentStart", Activity.WORKING)
+    writer.start()
+    writer.log("AgentStart", Activity.WORKING)
     try:
         AppHelper.runConsoleEventLoop()
     except KeyboardInterrupt:
-        log_event("AgentStop", Activity.IDLE)
+        writer.log("AgentStop", Activity.IDLE)
     except Exception as e:
         print(e)
-        log_event("AgentException", Activity.IDLE)
+        writer.log("AgentException", Activity.IDLE)
+    finally:
+        writer.close()
 
 
 if __name__ == "__main__":
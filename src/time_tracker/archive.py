@@ -0,0 +1,161 @@
+"""Monthly archives of the logs of past days.
+
+`time_tracker compact` packs the logs of each closed month into a single zip
+file, `LOG_DIR/archive/YYYY-MM.zip`, with one compressed member per log file.
+The zip's central directory is the index of the days: reading one day seeks
+straight to its member, and reading a month is one sequential read.
+
+An archive is written to a temporary file, synced, read back and compared with
+the logs, and only then moved into place; the logs are removed last. After a
+crash at any point, each log is still loose or in a verified archive. Loose
+logs take precedence over archived ones, and are merged into the archive by
+the next `compact`.
+"""
+
+import datetime
+import io
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+import zipfile
+
+import time_tracker
+from time_tracker import Event, ParseErrors, get_archive_filename, iter_log
+from time_tracker.binlog import StringTable, decode_events
+
+LOG_EXTENSIONS = (".bin", ".log")
+
+
+def get_archive_dir() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "archive")
+
+
+class ArchiveReader:
+    """Reads day logs from the archives, keeping each archive open once read."""
+
+    def __init__(self) -> None:
+        self.archives: Dict[str, Optional[zipfile.ZipFile]] = {}
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for archive in self.archives.values():
+            if archive is not None:
+                archive.close()
+        self.archives.clear()
+
+    def read(self, day: datetime.date) -> Optional[Tuple[str, bytes]]:
+        """The extension and contents of the day's archived log, if any."""
+        filename = get_archive_filename(day)
+        if filename not in self.archives:
+            try:
+                self.archives[filename] = zipfile.ZipFile(filename)
+            except FileNotFoundError:
+                self.archives[filename] = None
+        archive = self.archives[filename]
+        if archive is None:
+            return None
+        for ext in LOG_EXTENSIONS:
+            try:
+                return ext, archive.read(f"{day}{ext}")
+            except KeyError:
+                pass
+        return None
+
+
+def iter_archived_log(
+    day: datetime.date, errors: Optional[ParseErrors] = None
+) -> Iterator[Event]:
+    """Like `iter_day_log`, for an archived day."""
+    with ArchiveReader() as reader:
+        found = reader.read(day)
+    if found is None:
+        return
+    ext, data = found
+    if ext == ".bin":
+        yield from decode_events(data, StringTable())
+    else:
+        yield from iter_log(io.StringIO(data.decode()), errors)
+
+
+def archived_days() -> List[datetime.date]:
+    """The days that have an archived log, in order."""
+    days = set()
+    try:
+        names = os.listdir(get_archive_dir())
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not name.endswith(".zip"):
+            continue
+        with zipfile.ZipFile(os.path.join(get_archive_dir(), name)) as archive:
+            for member in archive.namelist():
+                days.add(datetime.date.fromisoformat(os.path.splitext(member)[0]))
+    return sorted(days)
+
+
+def _write_archive(filename: str, members: Dict[str, bytes]) -> None:
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(members):
+            archive.writestr(name, members[name])
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    with zipfile.ZipFile(tmp) as archive:
+        verified = sorted(archive.namelist()) == sorted(members) and all(
+            archive.read(name) == data for name, data in members.items()
+        )
+    if not verified:
+        os.remove(tmp)
+        raise ValueError(f"Failed to verify {filename}")
+    os.replace(tmp, filename)
+    fd = os.open(os.path.dirname(filename), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def compact(today: Optional[datetime.date] = None) -> Tuple[int, int]:
+    """Archive the logs of all closed months.
+
+    Returns the number of archived logs and of written archives.
+    """
+    if today is None:
+        today = datetime.date.today()
+    this_month = today.replace(day=1)
+    months: Dict[datetime.date, List[str]] = {}
+    try:
+        entries = os.scandir(time_tracker.LOG_DIR)
+    except FileNotFoundError:
+        return 0, 0
+    with entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext not in LOG_EXTENSIONS:
+                continue
+            try:
+                day = datetime.date.fromisoformat(stem)
+            except ValueError:
+                continue
+            if day < this_month:
+                months.setdefault(day.replace(day=1), []).append(entry.path)
+    os.makedirs(get_archive_dir(), exist_ok=True)
+    archived = 0
+    for month, paths in sorted(months.items()):
+        filename = get_archive_filename(month)
+        members: Dict[str, bytes] = {}
+        if os.path.exists(filename):
+            with zipfile.ZipFile(filename) as archive:
+                members = {name: archive.read(name) for name in archive.namelist()}
+        for path in paths:
+            with open(path, "rb") as log:
+                members[os.path.basename(path)] = log.read()
+        _write_archive(filename, members)
+        for path in paths:
+            os.remove(path)
+        archived += len(paths)
+    return archived, len(months)
@@ -0,0 +1,413 @@
+"""Column-oriented events and spans for analyzing long stretches of history.
+
+`load_event_array` reads the logs of many days into a few flat arrays of
+integers: timestamps in microseconds since the epoch, activity codes, and
+codes into shared lists of event and project names. `get_work_span_array`
+runs the work span state machine over those arrays, and `filter_span_array`
+applies the same filters as `filter_spans`. No `Event` or `Span` objects are
+created on the way.
+
+`EventArray` and `SpanArray` iterate like lists of `Event` and `Span`, and
+once this module is imported, `get_work_spans`, the span filters and
+`get_cumulative_work` accept them and use the functions here.
+
+`parse_log` and `get_work_spans` remain the reference implementation; the
+results here are the same, day by day. Like `iter_log`, `load_event_array`
+skips invalid lines and records them if given a `ParseErrors`.
+"""
+
+from array import array
+import datetime
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import time_tracker
+from time_tracker import (
+    SHORT_BREAK,
+    SHORT_WORK,
+    Activity,
+    Event,
+    ParseErrors,
+    Span,
+    filter_short_breaks,
+    filter_short_work,
+    filter_spans,
+    get_cumulative_work,
+    get_binary_log_filename,
+    get_log_filename,
+    get_work_spans,
+    iter_file_log,
+    list_source_log_days,
+)
+from time_tracker.archive import ArchiveReader
+from time_tracker.binlog import (
+    ACTIVITIES,
+    ONE_MICROSECOND,
+    StringTable,
+    from_epoch_us,
+    to_epoch_us,
+    unpack_records,
+)
+from time_tracker.mmlog import MappedLog
+
+US_PER_SECOND = 1_000_000
+US_PER_MINUTE = 60 * US_PER_SECOND
+US_PER_DAY = 86_400 * US_PER_SECOND
+
+IDLE = Activity.IDLE.value
+WORKING = Activity.WORKING.value
+
+
+class Codes:
+    """Categorical codes for strings; code 0 is the empty string."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = [""]
+        self.codes: Dict[str, int] = {"": 0}
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class EventArray:
+    """The events of several days, as columns.
+
+    Iterating yields `Event` objects, so an `EventArray` can stand in for the
+    list returned by `load_log`.
+    """
+
+    def __init__(self, projects: Optional[Codes] = None):
+        self.timestamps = array("q")
+        self.names = array("I")
+        self.activities = array("b")
+        self.projects = array("I")
+        self.name_codes = Codes()
+        self.project_codes = projects if projects is not None else Codes()
+        # The days, and the index of the first event of each.
+        self.days: List[datetime.date] = []
+        self.day_starts = array("q")
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> "EventArray":
+        result = cls()
+        for e in events:
+            result.append(e)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, i: int) -> Event:
+        return Event(
+            from_epoch_us(self.timestamps[i]),
+            self.name_codes.names[self.names[i]],
+            ACTIVITIES[self.activities[i]],
+            self.project_codes.names[self.projects[i]],
+        )
+
+    def __iter__(self) -> Iterator[Event]:
+        names = self.name_codes.names
+        projects = self.project_codes.names
+        for timestamp, name, activity, project in zip(
+            self.timestamps, self.names, self.activities, self.projects
+        ):
+            yield Event(
+                from_epoch_us(timestamp),
+                names[name],
+                ACTIVITIES[activity],
+                projects[project],
+            )
+
+    def append(self, e: Event) -> None:
+        day = e.timestamp.date()
+        if not self.days or self.days[-1] != day:
+            self.days.append(day)
+            self.day_starts.append(len(self.timestamps))
+        self.timestamps.append(to_epoch_us(e.timestamp))
+        self.names.append(self.name_codes.code(e.name))
+        self.activities.append(e.activity.value)
+        self.projects.append(self.project_codes.code(e.project))
+
+    def day_bounds(self) -> Iterator[tuple[int, int]]:
+        """The (start, end) indices of the events of each day."""
+        ends = list(self.day_starts[1:]) + [len(self.timestamps)]
+        return zip(self.day_starts, ends)
+
+
+class SpanArray:
+    """Work spans as columns.
+
+    Iterating and indexing yield `Span` objects, so a `SpanArray` can stand in
+    for a list of spans.
+    """
+
+    def __init__(self, projects: Codes):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.projects = array("I")
+        self.project_codes = projects
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[Span]) -> "SpanArray":
+        codes = Codes()
+        result = cls(codes)
+        for s in spans:
+            result.append(
+                to_epoch_us(s.start), to_epoch_us(s.end), codes.code(s.project)
+            )
+        return result
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i: int) -> Span:
+        return Span(
+            from_epoch_us(self.starts[i]),
+            from_epoch_us(self.ends[i]),
+            self.project_codes.names[self.projects[i]],
+        )
+
+    def __iter__(self) -> Iterator[Span]:
+        names = self.project_codes.names
+        for start, end, project in zip(self.starts, self.ends, self.projects):
+            yield Span(from_epoch_us(start), from_epoch_us(end), names[project])
+
+    def append(self, start: int, end: int, project: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.projects.append(project)
+
+    def rounded_minutes(self) -> array:
+        """Rounded duration of each span in minutes, like `Span.rounded_duration`."""
+        return array(
+            "q",
+            (
+                round_minute(end) - round_minute(start)
+                for start, end in zip(self.starts, self.ends)
+            ),
+        )
+
+
+def round_minute(us: int) -> int:
+    """The minute since the epoch nearest to us, like `rounded_datetime`."""
+    minute, rest = divmod(us, US_PER_MINUTE)
+    return minute + (rest >= 30 * US_PER_SECOND)
+
+
+def _parse_text(
+    log: MappedLog, events: EventArray, errors: Optional[ParseErrors] = None
+) -> None:
+    records = list(log.records(errors))
+    if not records:
+        return
+    timestamps, names, activities, projects = zip(*records)
+    # Our codes of the raw names and projects, decoded once per string.
+    name_codes = {n: events.name_codes.code(n.decode()) for n in dict.fromkeys(names)}
+    project_codes = {
+        p: events.project_codes.code(p.decode()) for p in dict.fromkeys(projects)
+    }
+    events.timestamps.extend(timestamps)
+    events.names.extend(map(name_codes.__getitem__, names))
+    events.activities.extend(activities)
+    events.projects.extend(map(project_codes.__getitem__, projects))
+
+
+def _parse_binary(data: bytes, table: StringTable, events: EventArray) -> None:
+    records = list(unpack_records(data))
+    if records and max(max(r[1], r[2]) for r in records) >= len(table.strings):
+        table.load()
+    # String table ids to our codes, looked up once per string.
+    name_codes = [-1] * len(table.strings)
+    project_codes = [-1] * len(table.strings)
+    for timestamp, name, project, activity in records:
+        name_code = name_codes[name]
+        if name_code < 0:
+            name_code = name_codes[name] = events.name_codes.code(table.strings[name])
+        code = project_codes[project]
+        if code < 0:
+            code = project_codes[project] = events.project_codes.code(
+                table.strings[project]
+            )
+        events.timestamps.append(timestamp)
+        events.names.append(name_code)
+        events.activities.append(activity)
+        events.projects.append(code)
+
+
+def _read_log(
+    day: datetime.date, archives: ArchiveReader
+) -> Optional[Union[bytes, MappedLog]]:
+    """The contents of the day's binary log, or its text log mapped, loose or
+    archived."""
+    try:
+        with open(get_binary_log_filename(day), "rb") as log:
+            return log.read()
+    except FileNotFoundError:
+        pass
+    try:
+        return MappedLog(get_log_filename(day), names=True)
+    except FileNotFoundError:
+        pass
+    found = archives.read(day)
+    if found is None:
+        return None
+    ext, data = found
+    return MappedLog.from_bytes(data, names=True) if ext == ".log" else data
+
+
+def load_event_array(
+    days: Iterable[datetime.date], errors: Optional[ParseErrors] = None
+) -> EventArray:
+    """Load the logs of days, skipping days without a log.
+
+    Invalid lines raise, unless errors is given; then they are skipped and
+    recorded there.
+    """
+    events = EventArray()
+    if time_tracker.LOG_FORMAT == "sqlite":
+        from time_tracker.db import load_events
+
+        for _day, day_events in load_events(days):
+            for e in day_events:
+                events.append(e)
+        return events
+    table: Optional[StringTable] = None
+    merged = list_source_log_days()
+    with ArchiveReader() as archives:
+        for day in days:
+            if day in merged:
+                # Merge with the other logs of the day.
+                for e in iter_file_log(day, errors):
+                    events.append(e)
+                continue
+            found = _read_log(day, archives)
+            if found is None:
+                continue
+            start = len(events)
+            if isinstance(found, MappedLog):
+                with found:
+                    _parse_text(found, events, errors)
+            else:
+                if table is None:
+                    table = StringTable()
+                _parse_binary(found, table, events)
+            if len(events) > start:
+                events.days.append(day)
+                events.day_starts.append(start)
+    return events
+
+
+def _span_array(
+    projects: Codes, starts: Iterable[int], ends: Iterable[int], codes: Iterable[int]
+) -> SpanArray:
+    spans = SpanArray(projects)
+    spans.starts.extend(starts)
+    spans.ends.extend(ends)
+    spans.projects.extend(codes)
+    return spans
+
+
+def get_work_span_array(
+    events: EventArray, now: Optional[datetime.datetime] = None
+) -> SpanArray:
+    """Like `get_work_spans`, applied to each day of events."""
+    if now is None:
+        now = datetime.datetime.now()
+    now_us = to_epoch_us(now)
+    today = now_us // US_PER_DAY
+    # The span columns, collected in lists, which append faster than arrays.
+    starts: List[int] = []
+    ends: List[int] = []
+    codes: List[int] = []
+    timestamps = events.timestamps
+    activities = events.activities
+    projects = events.projects
+    for first, last in events.day_bounds():
+        working = False
+        start = 0
+        project = 0
+        for timestamp, activity, p in zip(
+            timestamps[first:last], activities[first:last], projects[first:last]
+        ):
+            if activity == WORKING:
+                if not working:
+                    working = True
+                    start = timestamp
+                if p and p != project:
+                    if timestamp > start:
+                        starts.append(start)
+                        ends.append(timestamp)
+                        codes.append(project)
+                        start = timestamp
+                    project = p
+            elif working:
+                working = False
+                starts.append(start)
+                ends.append(timestamp)
+                codes.append(project)
+        if working and start // US_PER_DAY == today:
+            starts.append(start)
+            ends.append(now_us)
+            codes.append(project)
+    return _span_array(events.project_codes, starts, ends, codes)
+
+
+def filter_short_break_array(spans: SpanArray) -> SpanArray:
+    """Like `filter_short_breaks`; spans of different days are never merged."""
+    short_break = SHORT_BREAK // ONE_MICROSECOND
+    if not spans:
+        return SpanArray(spans.project_codes)
+    starts: List[int] = []
+    ends: List[int] = []
+    codes: List[int] = []
+    start, end, project = spans.starts[0], spans.ends[0], spans.projects[0]
+    for s, e, p in zip(spans.starts[1:], spans.ends[1:], spans.projects[1:]):
+        if (
+            s - end < short_break
+            and p == project
+            and s // US_PER_DAY == start // US_PER_DAY
+        ):
+            end = e
+        else:
+            starts.append(start)
+            ends.append(end)
+            codes.append(project)
+            start, end, project = s, e, p
+    starts.append(start)
+    ends.append(end)
+    codes.append(project)
+    return _span_array(spans.project_codes, starts, ends, codes)
+
+
+def filter_short_work_array(spans: SpanArray) -> SpanArray:
+    """Like `filter_short_work`."""
+    short_work = SHORT_WORK // ONE_MICROSECOND
+    keep = [end - start > short_work for start, end in zip(spans.starts, spans.ends)]
+    return _span_array(
+        spans.project_codes,
+        compress(spans.starts, keep),
+        compress(spans.ends, keep),
+        compress(spans.projects, keep),
+    )
+
+
+def filter_span_array(spans: SpanArray) -> SpanArray:
+    """Like `filter_spans`; spans of different days are never merged."""
+    return filter_short_work_array(filter_short_break_array(spans))
+
+
+def get_cumulative_work_array(spans: SpanArray) -> float:
+    """Like `get_cumulative_work`."""
+    return sum(spans.rounded_minutes()) / 60
+
+
+# The functions of the reference implementation accept the arrays, too.
+get_work_spans.register(EventArray, get_work_span_array)
+filter_short_breaks.register(SpanArray, filter_short_break_array)
+filter_short_work.register(SpanArray, filter_short_work_array)
+filter_spans.register(SpanArray, filter_span_array)
+get_cumulative_work.register(SpanArray, get_cumulative_work_array)
@@ -0,0 +1,197 @@
+"""Compact binary event log.
+
+Each event is a fixed-width record of the timestamp in microseconds since
+the epoch, the interned ids of its name and project, and its activity.
+Names and projects are interned in `LOG_DIR/strings.txt`, where the id of a
+string is its line number. Reading a binary log is a bulk `struct` unpack
+instead of splitting lines and parsing ISO timestamps.
+
+Binary logs are `LOG_DIR/YYYY-MM-DD.bin`, next to the text logs. Which formats
+`log_event` writes is controlled by `LOG_FORMAT`; `load_log` prefers the
+binary log of a day if there is one.
+"""
+
+import datetime
+import fcntl
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import time_tracker
+from time_tracker import (
+    Activity,
+    Event,
+    get_binary_log_filename,
+    get_log_filename,
+    parse_log,
+    print_event,
+)
+
+# timestamp, name id, project id, activity
+RECORD = struct.Struct("<qHHB")
+EPOCH = datetime.datetime(1970, 1, 1)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+ACTIVITIES = {a.value: a for a in Activity}
+
+
+def to_epoch_us(dt: datetime.datetime) -> int:
+    return (dt - EPOCH) // ONE_MICROSECOND
+
+
+def from_epoch_us(us: int) -> datetime.datetime:
+    return EPOCH + datetime.timedelta(microseconds=us)
+
+
+def get_strings_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "strings.txt")
+
+
+class StringTable:
+    """The strings interned in `LOG_DIR/strings.txt`."""
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(get_strings_filename()) as f:
+                self.strings = f.read().splitlines()
+        except FileNotFoundError:
+            self.strings = []
+        self.ids = {s: i for i, s in enumerate(self.strings)}
+
+    def intern(self, s: str) -> int:
+        try:
+            return self.ids[s]
+        except KeyError:
+            pass
+        os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+        with open(get_strings_filename(), "a+") as f:
+            # Another process may have added strings since we loaded them.
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            self.strings = f.read().splitlines()
+            self.ids = {s: i for i, s in enumerate(self.strings)}
+            if s not in self.ids:
+                if len(self.strings) > 0xFFFF:
+                    raise ValueError("Too many distinct names and projects")
+                print(s, file=f)
+                self.ids[s] = len(self.strings)
+                self.strings.append(s)
+        return self.ids[s]
+
+
+def encode_events(events: Iterable[Event], table: StringTable) -> bytes:
+    return b"".join(
+        RECORD.pack(
+            to_epoch_us(e.timestamp),
+            table.intern(e.name),
+            table.intern(e.project),
+            e.activity.value,
+        )
+        for e in events
+    )
+
+
+def unpack_records(data: bytes) -> Iterable[Tuple[int, int, int, int]]:
+    """The raw (timestamp, name id, project id, activity) records in data."""
+    # Ignore a partially written record at the end.
+    end = len(data) - len(data) % RECORD.size
+    return RECORD.iter_unpack(memoryview(data)[:end])
+
+
+def decode_events(data: bytes, table: StringTable) -> List[Event]:
+    records = list(unpack_records(data))
+    if records and max(max(r[1], r[2]) for r in records) >= len(table.strings):
+        table.load()
+    strings = table.strings
+    return [
+        Event(
+            EPOCH + datetime.timedelta(microseconds=us),
+            strings[name],
+            ACTIVITIES[activity],
+            strings[project],
+        )
+        for us, name, project, activity in records
+    ]
+
+
+def append_event(event: Event, table: Optional[StringTable] = None) -> None:
+    """Append event to the binary log of its day."""
+    if table is None:
+        table = StringTable()
+    day = event.timestamp.date()
+    filename = get_binary_log_filename(day)
+    if not os.path.exists(filename) and os.path.exists(get_log_filename(day)):
+        # This day started out with a text log; carry its events over.
+        convert_to_binary(day, table)
+        if time_tracker.LOG_FORMAT == "both":
+            # The text log already includes event.
+            return
+    with open(filename, "ab") as log:
+        log.write(encode_events([event], table))
+
+
+def read_binary_log(
+    day: Optional[datetime.date] = None, table: Optional[StringTable] = None
+) -> Sequence[Event]:
+    with open(get_binary_log_filename(day), "rb") as log:
+        data = log.read()
+    return decode_events(data, table if table is not None else StringTable())
+
+
+def convert_to_binary(day: datetime.date, table: StringTable) -> None:
+    with open(get_log_filename(day)) as log:
+        events = parse_log(log)
+    filename = get_binary_log_filename(day)
+    tmp = f"{filename}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode_events(events, table))
+    os.replace(tmp, filename)
+
+
+def convert_to_text(day: datetime.date, table: StringTable) -> None:
+    events = read_binary_log(day, table)
+    filename = get_log_filename(day)
+    tmp = f"{filename}.tmp"
+    with open(tmp, "w") as f:
+        for e in events:
+            print_event(e, f)
+    os.replace(tmp, filename)
+
+
+def convert_logs(to: str, today: Optional[datetime.date] = None) -> int:
+    """Convert the logs of all closed days to the given format.
+
+    Days that already have a log in that format are left alone.
+    Returns the number of converted days.
+    """
+    if to == "binary":
+        source, target, convert = ".log", ".bin", convert_to_binary
+    elif to == "text":
+        source, target, convert = ".bin", ".log", convert_to_text
+    else:
+        raise ValueError(f"Unknown log format: {to}")
+    if today is None:
+        today = datetime.date.today()
+    try:
+        names = set(os.listdir(time_tracker.LOG_DIR))
+    except FileNotFoundError:
+        return 0
+    table = StringTable()
+    converted = 0
+    for name in sorted(names):
+        stem, ext = os.path.splitext(name)
+        if ext != source or stem + target in names:
+            continue
+        try:
+            day = datetime.date.fromisoformat(stem)
+        except ValueError:
+            continue
+        # Today's log is still being written.
+        if day < today:
+            convert(day, table)
+            converted += 1
+    return converted
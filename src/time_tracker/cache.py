@@ -0,0 +1,157 @@
+"""On-disk cache of per-day results.
+
+Log files of past days rarely change, so the report keeps the evaluated
+`DayResults` of each closed day in a small JSON file under `LOG_DIR/cache`.
+An entry is only used while the file holding the log (text, binary or
+archive) still has the size and mtime it was computed from, and entries not
+used for `CACHE_MAX_AGE` are evicted.
+"""
+
+import datetime
+import json
+import os
+import time
+from typing import Any, Optional
+
+import time_tracker
+from time_tracker import (
+    DayResults,
+    Level,
+    Message,
+    Span,
+    evaluate_day,
+    get_archive_filename,
+    get_binary_log_filename,
+    get_log_filename,
+    get_source_log_filenames,
+    write_json,
+)
+
+CACHE_VERSION = 1
+CACHE_MAX_AGE = datetime.timedelta(days=90)
+
+
+def get_cache_dir() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "cache")
+
+
+def get_cache_filename(day: datetime.date) -> str:
+    return os.path.join(get_cache_dir(), f"{day}.json")
+
+
+def encode_results(results: DayResults) -> dict[str, Any]:
+    return {
+        "spans": [
+            [s.start.isoformat(), s.end.isoformat(), s.project] for s in results.spans
+        ],
+        "total_hours": results.total_hours,
+        "messages": [[m.level.value, m.text] for m in results.messages],
+        "level": results.level.value,
+    }
+
+
+def decode_results(data: dict[str, Any]) -> DayResults:
+    # Bypass __init__, which would evaluate events we don't have.
+    results = DayResults.__new__(DayResults)
+    results.spans = [
+        Span(
+            datetime.datetime.fromisoformat(start),
+            datetime.datetime.fromisoformat(end),
+            project,
+        )
+        for start, end, project in data["spans"]
+    ]
+    results.total_hours = data["total_hours"]
+    results.messages = [Message(Level(level), text) for level, text in data["messages"]]
+    results.level = Level(data["level"])
+    return results
+
+
+def _read_entry(day: datetime.date, stat: os.stat_result) -> Optional[DayResults]:
+    filename = get_cache_filename(day)
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if (
+        data.get("version") != CACHE_VERSION
+        or data.get("size") != stat.st_size
+        or data.get("mtime_ns") != stat.st_mtime_ns
+    ):
+        return None
+    try:
+        results = decode_results(data)
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Mark the entry as recently used, so eviction keeps it.
+    os.utime(filename)
+    return results
+
+
+def _write_entry(day: datetime.date, results: DayResults, stat: os.stat_result):
+    os.makedirs(get_cache_dir(), exist_ok=True)
+    data = {
+        "version": CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        **encode_results(results),
+    }
+    write_json(get_cache_filename(day), data)
+
+
+def _stat_log(day: datetime.date) -> Optional[os.stat_result]:
+    """Stat the file holding the day's log: binary, text or archive."""
+    for filename in [
+        get_binary_log_filename(day),
+        get_log_filename(day),
+        get_archive_filename(day),
+    ]:
+        try:
+            return os.stat(filename)
+        except FileNotFoundError:
+            pass
+    return None
+
+
+def load_day_results(
+    day: datetime.date, today: Optional[datetime.date] = None
+) -> DayResults:
+    """Evaluate the log of the given day, using the cache for closed days."""
+    if today is None:
+        today = datetime.date.today()
+    if time_tracker.LOG_FORMAT == "sqlite":
+        from time_tracker.db import day_results
+
+        # The spans are stored already, there is nothing to cache.
+        return day_results(day)
+    if day >= today or get_source_log_filenames(day):
+        # Today's results change with every event and with the clock, and
+        # the entry would only depend on the main log.
+        return evaluate_day(day)
+    stat = _stat_log(day)
+    if stat is None:
+        return DayResults([])
+    results = _read_entry(day, stat)
+    if results is None:
+        results = evaluate_day(day)
+        _write_entry(day, results, stat)
+    return results
+
+
+def evict_cache(max_age: datetime.timedelta = CACHE_MAX_AGE) -> int:
+    """Remove cache entries that haven't been used for max_age.
+
+    Returns the number of removed entries.
+    """
+    cutoff = time.time() - max_age.total_seconds()
+    removed = 0
+    try:
+        entries = list(os.scandir(get_cache_dir()))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
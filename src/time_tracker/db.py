@@ -0,0 +1,285 @@
+"""SQLite storage of events and work spans.
+
+With `TIME_TRACKER_LOG_FORMAT=sqlite`, `log_event` writes to
+`LOG_DIR/time_tracker.db` instead of the log files, and everything that reads
+logs reads from there. Besides the events, the database keeps the raw work
+spans of each day, closed as the events arrive, and the span state between
+events. The menu and the report evaluate a day from its spans and its last
+event, and `query` and `stats` read the spans of their range through the
+index on their start. Events and spans are also indexed by project and time,
+for lookups of one project's history.
+
+Within a day, events are evaluated in the order they were logged, like the
+lines of a log file. Timestamps are microseconds since the epoch.
+
+`time_tracker import-db` imports the existing logs, in batched transactions.
+"""
+
+import datetime
+import os
+import sqlite3
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import time_tracker
+from time_tracker import (
+    DayResults,
+    Event,
+    ParseErrors,
+    Span,
+    SpanState,
+    iter_file_log,
+    list_file_log_days,
+)
+from time_tracker.binlog import ACTIVITIES, from_epoch_us, to_epoch_us
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    activity INTEGER NOT NULL,
+    project TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_project_timestamp ON events (project, timestamp);
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    project TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spans_start ON spans (start);
+CREATE INDEX IF NOT EXISTS spans_project_start ON spans (project, start);
+CREATE TABLE IF NOT EXISTS states (
+    day TEXT PRIMARY KEY,
+    working INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    project TEXT NOT NULL
+);
+"""
+# Days imported per transaction.
+IMPORT_BATCH = 100
+
+
+def get_db_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "time_tracker.db")
+
+
+def connect() -> sqlite3.Connection:
+    os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+    db = sqlite3.connect(get_db_filename())
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def day_range(day: datetime.date) -> Tuple[int, int]:
+    """The first and the last + 1 timestamp of day."""
+    start = to_epoch_us(datetime.datetime.combine(day, datetime.time()))
+    return start, start + 86_400_000_000
+
+
+def _load_state(db: sqlite3.Connection, day: datetime.date) -> SpanState:
+    row = db.execute(
+        "SELECT working, start, project FROM states WHERE day = ?", (str(day),)
+    ).fetchone()
+    if row is None:
+        return SpanState()
+    working, start, project = row
+    return SpanState(bool(working), from_epoch_us(start), project)
+
+
+def _save_state(db: sqlite3.Connection, day: datetime.date, state: SpanState):
+    db.execute(
+        "INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?)",
+        (str(day), state.working, to_epoch_us(state.start), state.project),
+    )
+
+
+def _insert(
+    db: sqlite3.Connection, events: Iterable[Event], state: SpanState
+) -> List[Span]:
+    """Insert events, returning the spans they close."""
+    spans = []
+    rows = []
+    for e in events:
+        rows.append((to_epoch_us(e.timestamp), e.name, e.activity.value, e.project))
+        span = state.feed(e)
+        if span is not None:
+            spans.append(span)
+    db.executemany(
+        "INSERT INTO events (timestamp, name, activity, project) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    db.executemany(
+        "INSERT INTO spans (start, end, project) VALUES (?, ?, ?)",
+        [(to_epoch_us(s.start), to_epoch_us(s.end), s.project) for s in spans],
+    )
+    return spans
+
+
+def append_event(event: Event) -> None:
+    day = event.timestamp.date()
+    db = connect()
+    try:
+        with db:
+            # Lock out other writers before reading the state, or a concurrent
+            # update of it could be lost.
+            db.execute("BEGIN IMMEDIATE")
+            state = _load_state(db, day)
+            _insert(db, [event], state)
+            _save_state(db, day, state)
+    finally:
+        db.close()
+
+
+def _rows_to_events(rows: Iterable[tuple]) -> Iterator[Event]:
+    for timestamp, name, activity, project in rows:
+        yield Event(from_epoch_us(timestamp), name, ACTIVITIES[activity], project)
+
+
+def iter_events(day: Optional[datetime.date] = None) -> Iterator[Event]:
+    """The events of day, in the order they were logged."""
+    if day is None:
+        day = datetime.date.today()
+    if not os.path.exists(get_db_filename()):
+        return
+    db = connect()
+    try:
+        yield from _rows_to_events(
+            db.execute(
+                "SELECT timestamp, name, activity, project FROM events"
+                " WHERE timestamp >= ? AND timestamp < ? ORDER BY id",
+                day_range(day),
+            )
+        )
+    finally:
+        db.close()
+
+
+def load_events(
+    days: Iterable[datetime.date],
+) -> List[Tuple[datetime.date, List[Event]]]:
+    """The events of each of days that has events, read in one query."""
+    days = sorted(days)
+    if not days or not os.path.exists(get_db_filename()):
+        return []
+    wanted = set(days)
+    db = connect()
+    try:
+        rows = db.execute(
+            "SELECT timestamp, name, activity, project FROM events"
+            " WHERE timestamp >= ? AND timestamp < ? ORDER BY id",
+            (day_range(days[0])[0], day_range(days[-1])[1]),
+        ).fetchall()
+    finally:
+        db.close()
+    by_day: dict = {}
+    for row in rows:
+        day = from_epoch_us(row[0]).date()
+        if day in wanted:
+            by_day.setdefault(day, []).append(row)
+    return [(day, list(_rows_to_events(rows))) for day, rows in sorted(by_day.items())]
+
+
+def list_days() -> List[datetime.date]:
+    if not os.path.exists(get_db_filename()):
+        return []
+    db = connect()
+    try:
+        rows = db.execute("SELECT day FROM states ORDER BY day").fetchall()
+    finally:
+        db.close()
+    return [datetime.date.fromisoformat(day) for (day,) in rows]
+
+
+def query_spans(
+    start: datetime.date,
+    end: datetime.date,
+    now: Optional[datetime.datetime] = None,
+) -> List[Span]:
+    """The raw work spans starting from start to end, inclusive.
+
+    Like `get_work_spans`, they include the span still open at now, if its day
+    is in the range.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    if not os.path.exists(get_db_filename()):
+        return []
+    first, last = day_range(start)[0], day_range(end)[1]
+    db = connect()
+    try:
+        spans = [
+            Span(from_epoch_us(s), from_epoch_us(e), p)
+            for s, e, p in db.execute(
+                "SELECT start, end, project FROM spans"
+                " WHERE start >= ? AND start < ? ORDER BY start",
+                (first, last),
+            )
+        ]
+        state = _load_state(db, now.date())
+    finally:
+        db.close()
+    span = state.open_span(now)
+    if span is not None and start <= now.date() <= end:
+        spans.append(span)
+    return spans
+
+
+def day_results(
+    day: datetime.date, now: Optional[datetime.datetime] = None
+) -> DayResults:
+    """Evaluate the day from its stored spans, like `DayResults(load_log(day))`."""
+    if now is None:
+        now = datetime.datetime.now()
+    if not os.path.exists(get_db_filename()):
+        return DayResults([])
+    first, last = day_range(day)
+    db = connect()
+    try:
+        row = db.execute(
+            "SELECT timestamp, name, activity, project FROM events"
+            " WHERE timestamp >= ? AND timestamp < ? ORDER BY id DESC LIMIT 1",
+            (first, last),
+        ).fetchone()
+        if row is None:
+            return DayResults([])
+        spans = [
+            Span(from_epoch_us(s), from_epoch_us(e), p)
+            for s, e, p in db.execute(
+                "SELECT start, end, project FROM spans"
+                " WHERE start >= ? AND start < ? ORDER BY start",
+                (first, last),
+            )
+        ]
+        state = _load_state(db, day)
+    finally:
+        db.close()
+    span = state.open_span(now)
+    if span is not None:
+        spans.append(span)
+    return DayResults(list(_rows_to_events([row])), spans)
+
+
+def import_logs() -> int:
+    """Import the logs of the days that aren't in the database yet.
+
+    Invalid lines are skipped, like when evaluating a day. Returns the number
+    of imported days.
+    """
+    days = list_file_log_days()
+    known = set(list_days())
+    days = [day for day in days if day not in known]
+    db = connect()
+    try:
+        for i in range(0, len(days), IMPORT_BATCH):
+            with db:
+                for day in days[i : i + IMPORT_BATCH]:
+                    state = SpanState()
+                    _insert(db, iter_file_log(day, ParseErrors()), state)
+                    _save_state(db, day, state)
+    finally:
+        db.close()
+    return len(days)
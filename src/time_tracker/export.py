@@ -0,0 +1,120 @@
+"""Export of the work spans or the daily results as CSV or JSON lines.
+
+`time_tracker export` evaluates the days with logs one at a time, in order,
+like the report (with its cache), and writes the rows of each day as it goes.
+Rows are buffered and written in chunks of about `CHUNK_SIZE` characters, so
+memory stays bounded however long the range. An export to a file replaces it
+only once complete.
+"""
+
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from time_tracker import ONE_HOUR, DayResults, list_log_days, map_day_results
+
+FORMATS = ["csv", "jsonl"]
+SPAN_FIELDS = ["day", "start", "end", "project", "hours"]
+DAY_FIELDS = ["day", "total_hours", "level", "messages"]
+CHUNK_SIZE = 64 * 1024
+
+Row = Dict[str, Any]
+
+
+def iter_day_results(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    today: Optional[datetime.date] = None,
+) -> Iterator[tuple[datetime.date, DayResults]]:
+    """The days with logs from start to end, inclusive, with their results."""
+    if today is None:
+        today = datetime.date.today()
+    days = [
+        day
+        for day in list_log_days()
+        if (start is None or day >= start) and (end is None or day <= end)
+    ]
+    return zip(days, map_day_results(days, today))
+
+
+def span_rows(results: Iterable[tuple[datetime.date, DayResults]]) -> Iterator[Row]:
+    for day, r in results:
+        for s in r.spans:
+            yield {
+                "day": day.isoformat(),
+                "start": s.start.isoformat(),
+                "end": s.end.isoformat(),
+                "project": s.project,
+                "hours": round(s.duration() / ONE_HOUR, 4),
+            }
+
+
+def day_rows(results: Iterable[tuple[datetime.date, DayResults]]) -> Iterator[Row]:
+    for day, r in results:
+        yield {
+            "day": day.isoformat(),
+            "total_hours": round(r.total_hours, 4),
+            "level": r.level.name,
+            "messages": [m.text for m in r.messages],
+        }
+
+
+def format_chunks(rows: Iterable[Row], format: str, fields: List[str]) -> Iterator[str]:
+    """The rows formatted as CSV, with a header, or JSON lines, in chunks."""
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(fields)
+    for row in rows:
+        if format == "csv":
+            writer.writerow(
+                "; ".join(v) if isinstance(v, list) else v
+                for v in (row[f] for f in fields)
+            )
+        else:
+            buffer.write(json.dumps(row))
+            buffer.write("\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_chunks(chunks: Iterable[str], out: TextIO) -> None:
+    for chunk in chunks:
+        out.write(chunk)
+
+
+def export(
+    format: str = "csv",
+    days: bool = False,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    output: Optional[str] = None,
+):
+    """Export the spans, or with days the daily results, to output or stdout."""
+    if format not in FORMATS:
+        raise ValueError(f"Invalid format {format!r}")
+    results = iter_day_results(start, end)
+    if days:
+        chunks = format_chunks(day_rows(results), format, DAY_FIELDS)
+    else:
+        chunks = format_chunks(span_rows(results), format, SPAN_FIELDS)
+    if output is None or output == "-":
+        write_chunks(chunks, sys.stdout)
+        return
+    tmp = f"{output}.tmp"
+    try:
+        with open(tmp, "w", newline="") as out:
+            write_chunks(chunks, out)
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
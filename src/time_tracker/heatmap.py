@@ -0,0 +1,124 @@
+"""When work happens: a heatmap of weekday by hour of the day.
+
+The days come from `time_tracker.timeline`, one bitset of minutes per
+project, with short breaks and short work filtered out. The minutes of each
+hour are the population count of its 60 bits, so spans are split at the hour
+boundaries without looking at single minutes. Each cell shows the minutes
+worked in that hour on an average such weekday in the range, with `BARS`.
+"""
+
+import datetime
+from typing import Dict, List, Optional
+
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ANSI_SHADES,
+    BARS,
+    ParseErrors,
+    list_log_days,
+    write_parse_errors,
+)
+from time_tracker.timeline import load_timelines
+
+HOUR_MASK = (1 << 60) - 1
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+Grid = List[List[int]]
+
+
+def hour_minutes(bits: int) -> List[int]:
+    """The minutes set in each hour of a day's bits."""
+    return [(bits >> (60 * hour) & HOUR_MASK).bit_count() for hour in range(24)]
+
+
+def count_weekdays(start: datetime.date, end: datetime.date) -> List[int]:
+    """How often each weekday occurs from start to end, inclusive."""
+    weeks, rest = divmod((end - start).days + 1, 7)
+    counts = [weeks] * 7
+    for i in range(rest):
+        counts[(start.weekday() + i) % 7] += 1
+    return counts
+
+
+def load_heatmaps(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    project: Optional[str] = None,
+    by_project: bool = False,
+    now: Optional[datetime.datetime] = None,
+    errors: Optional[ParseErrors] = None,
+) -> Dict[str, Grid]:
+    """The minutes worked per weekday and hour, from start to end, inclusive.
+
+    Of all work, under "", of only project, or with by_project, of each project.
+    Invalid lines are skipped and recorded in errors, if given.
+    """
+    days = [
+        day
+        for day in list_log_days()
+        if (start is None or day >= start) and (end is None or day <= end)
+    ]
+    grids: Dict[str, Grid] = {}
+
+    def add(key: str, weekday: int, bits: int):
+        if key not in grids:
+            grids[key] = [[0] * 24 for _ in range(7)]
+        row = grids[key][weekday]
+        for hour, minutes in enumerate(hour_minutes(bits)):
+            row[hour] += minutes
+
+    for day, timeline in load_timelines(days, now, errors, filtered=True).items():
+        if by_project:
+            for p, bits in sorted(timeline.bits.items()):
+                add(p, day.weekday(), bits)
+        elif project is not None:
+            if project in timeline.bits:
+                add(project, day.weekday(), timeline.bits[project])
+        else:
+            add("", day.weekday(), timeline.working())
+    return dict(sorted(grids.items()))
+
+
+def format_heatmap(grid: Grid, weekdays: List[int]) -> List[str]:
+    # Label every third hour; each hour is two characters wide.
+    lines = ["    " + "".join(f"{hour:<6}" for hour in range(0, 24, 3)) + "  hours"]
+    for weekday, row in enumerate(grid):
+        count = max(weekdays[weekday], 1)
+        cells = []
+        for hour, minutes in enumerate(row):
+            bar = BARS[min(round(minutes / count / 60 * 8), 8)]
+            cells.append(f"{ANSI_SHADES[hour % 2]}{bar * 2}{ANSI_RESET}")
+        lines.append(
+            f"{WEEKDAYS[weekday]} " + "".join(cells) + f"{sum(row) / count / 60:7.2f}"
+        )
+    return lines
+
+
+def write_heatmap(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    project: Optional[str] = None,
+    by_project: bool = False,
+):
+    errors = ParseErrors()
+    grids = load_heatmaps(start, end, project, by_project, errors=errors)
+    if not grids:
+        print("No work in this range")
+        write_parse_errors(errors)
+        return
+    if start is None:
+        start = list_log_days()[0]
+    if end is None:
+        end = datetime.date.today()
+    weekdays = count_weekdays(start, end)
+    for key, grid in grids.items():
+        print()
+        if by_project or project is not None:
+            title = key or "(no project)"
+        else:
+            title = "All projects"
+        print(f"{ANSI_BOLD}{title}, {start} to {end}:{ANSI_RESET}")
+        for line in format_heatmap(grid, weekdays):
+            print(line)
+    write_parse_errors(errors)
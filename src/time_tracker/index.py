@@ -0,0 +1,262 @@
+"""Index of the work spans of all closed days, for range queries.
+
+For all spans, and for the spans of each project, the index keeps the start
+times in order together with the running total of their rounded durations.
+The hours worked between two days are then the difference of two running
+totals, found by binary search.
+
+The index is saved in `LOG_DIR/index.bin`: a JSON header line followed by the
+raw arrays. Days that closed since it was last saved are added when it is
+loaded; `time_tracker query --rebuild` starts over, e.g. after editing the log
+of a past day. The SQLite backend needs no such index: there, the spans of the
+range are read from the database.
+"""
+
+from array import array
+from bisect import bisect_left
+import datetime
+import json
+import os
+from typing import Dict, List, Optional
+
+import time_tracker
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ONE_MINUTE,
+    ParseErrors,
+    list_log_days,
+    write_parse_errors,
+)
+from time_tracker.arrays import (
+    Codes,
+    SpanArray,
+    filter_span_array,
+    get_work_span_array,
+    load_event_array,
+)
+from time_tracker.binlog import to_epoch_us
+from time_tracker.cache import load_day_results
+
+INDEX_VERSION = 1
+
+
+def get_index_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "index.bin")
+
+
+def day_start_us(day: datetime.date) -> int:
+    return to_epoch_us(datetime.datetime.combine(day, datetime.time()))
+
+
+class Series:
+    """Span start times, with the running total of minutes before each."""
+
+    def __init__(self) -> None:
+        self.starts = array("q")
+        self.totals = array("q", [0])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, start: int, minutes: int) -> None:
+        self.starts.append(start)
+        self.totals.append(self.totals[-1] + minutes)
+
+    def minutes(self, start: int, end: int) -> int:
+        """Minutes of the spans starting at or after start, and before end."""
+        return (
+            self.totals[bisect_left(self.starts, end)]
+            - self.totals[bisect_left(self.starts, start)]
+        )
+
+
+class SpanIndex:
+    def __init__(self) -> None:
+        # The last day in the index.
+        self.through: Optional[datetime.date] = None
+        self.project_codes = Codes()
+        self.all = Series()
+        self.projects: Dict[int, Series] = {}
+
+    def add_days(
+        self,
+        days: List[datetime.date],
+        now: datetime.datetime,
+        errors: Optional[ParseErrors] = None,
+    ) -> None:
+        """Add the spans of days, which must follow the days in the index.
+
+        Invalid lines are skipped and recorded in errors, if given.
+        """
+        if errors is None:
+            errors = ParseErrors()
+        events = load_event_array(days, errors)
+        spans = filter_span_array(get_work_span_array(events, now))
+        names = spans.project_codes.names
+        for start, project, minutes in zip(
+            spans.starts, spans.projects, spans.rounded_minutes()
+        ):
+            code = self.project_codes.code(names[project])
+            self.all.append(start, minutes)
+            if code not in self.projects:
+                self.projects[code] = Series()
+            self.projects[code].append(start, minutes)
+        if days:
+            self.through = days[-1]
+
+    def minutes(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+        project: Optional[str] = None,
+    ) -> int:
+        """Minutes worked from start to end, inclusive."""
+        if end < start:
+            return 0
+        series: Optional[Series] = self.all
+        if project is not None:
+            code = self.project_codes.codes.get(project)
+            series = self.projects.get(code) if code is not None else None
+        if series is None:
+            return 0
+        return series.minutes(
+            day_start_us(start), day_start_us(end + datetime.timedelta(days=1))
+        )
+
+    def save(self) -> None:
+        codes = sorted(self.projects)
+        header = {
+            "version": INDEX_VERSION,
+            "through": self.through.isoformat() if self.through else None,
+            "projects": self.project_codes.names,
+            "series": [len(self.all)] + [[c, len(self.projects[c])] for c in codes],
+        }
+        filename = get_index_filename()
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for series in [self.all] + [self.projects[c] for c in codes]:
+                series.starts.tofile(f)
+                series.totals.tofile(f)
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls) -> "SpanIndex":
+        index = cls()
+        try:
+            with open(get_index_filename(), "rb") as f:
+                header = json.loads(f.readline())
+                if header["version"] != INDEX_VERSION:
+                    return index
+                length, *projects = header["series"]
+                index.all = _read_series(f, length)
+                for code, length in projects:
+                    index.projects[code] = _read_series(f, length)
+        except (FileNotFoundError, EOFError, KeyError, ValueError):
+            return cls()
+        for name in header["projects"]:
+            index.project_codes.code(name)
+        if header["through"]:
+            index.through = datetime.date.fromisoformat(header["through"])
+        return index
+
+
+def _read_series(f, length: int) -> Series:
+    series = Series()
+    series.starts.fromfile(f, length)
+    series.totals = array("q")
+    series.totals.fromfile(f, length + 1)
+    return series
+
+
+def load_index(
+    rebuild: bool = False,
+    now: Optional[datetime.datetime] = None,
+    errors: Optional[ParseErrors] = None,
+) -> SpanIndex:
+    """Load the index, adding the days that closed since it was saved.
+
+    Invalid lines of those days are skipped and recorded in errors, if given.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    today = now.date()
+    index = SpanIndex() if rebuild else SpanIndex.load()
+    if index.through is None:
+        days = [day for day in list_log_days() if day < today]
+    else:
+        days = [
+            index.through + datetime.timedelta(days=i)
+            for i in range(1, (today - index.through).days)
+        ]
+    if days:
+        index.add_days(days, now, errors)
+        # Days without a log are closed, too.
+        index.through = today - datetime.timedelta(days=1)
+        os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+        index.save()
+    return index
+
+
+def query_index(
+    start: datetime.date,
+    end: datetime.date,
+    rebuild: bool = False,
+    errors: Optional[ParseErrors] = None,
+) -> Dict[str, int]:
+    """The minutes worked per project from start to end, inclusive."""
+    index = load_index(rebuild, errors=errors)
+    today = datetime.date.today()
+    # Today isn't in the index yet.
+    yesterday = today - datetime.timedelta(days=1)
+    minutes = {
+        p: index.minutes(start, min(end, yesterday), p)
+        for p in index.project_codes.names
+    }
+    if start <= today <= end:
+        for s in load_day_results(today, today).spans:
+            minutes[s.project] = (
+                minutes.get(s.project, 0) + s.rounded_duration() // ONE_MINUTE
+            )
+    return minutes
+
+
+def query_database(start: datetime.date, end: datetime.date) -> Dict[str, int]:
+    """Like `query_index`, from the spans in the SQLite database."""
+    from time_tracker.db import query_spans
+
+    spans = filter_span_array(SpanArray.from_spans(query_spans(start, end)))
+    names = spans.project_codes.names
+    minutes: Dict[str, int] = {}
+    for project, m in zip(spans.projects, spans.rounded_minutes()):
+        minutes[names[project]] = minutes.get(names[project], 0) + m
+    return minutes
+
+
+def write_query(
+    project: Optional[str],
+    start: Optional[datetime.date],
+    end: Optional[datetime.date],
+    rebuild: bool = False,
+):
+    errors = ParseErrors()
+    today = datetime.date.today()
+    if start is None:
+        days = list_log_days()
+        start = days[0] if days else today
+    if end is None:
+        end = today
+    if time_tracker.LOG_FORMAT == "sqlite":
+        # The database has an index of the spans already.
+        minutes = query_database(start, end)
+    else:
+        minutes = query_index(start, end, rebuild, errors)
+    if project is not None:
+        print(f"{minutes.get(project, 0) / 60:7.2f} - {project}")
+    else:
+        for p, m in minutes.items():
+            if m:
+                print(f"{m / 60:7.2f} - {p}")
+        print(f"{ANSI_BOLD}{sum(minutes.values()) / 60:7.2f} - total{ANSI_RESET}")
+    write_parse_errors(errors)
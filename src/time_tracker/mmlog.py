@@ -0,0 +1,168 @@
+"""Reading text logs through `mmap`, one record at a time.
+
+`MappedLog` maps a text log into memory and only scans it for the line
+boundaries when first indexed. It is a `Sequence[Event]` like the list
+`load_log` returns, but an event is only parsed when it is accessed, from the
+bytes of its own line: the file is not read into a string, and not split into
+lines up front. The name of an event is only decoded with names=True;
+otherwise it is "". `MappedLog.timestamps` reads just the timestamps of all
+events, for scans that need nothing else, and `MappedLog.records` the fields
+of all events as raw bytes, in one split of the whole log, for
+`time_tracker.arrays.load_event_array` to decode each distinct name and
+project only once.
+
+Timestamps are parsed by `datetime.fromisoformat`, which is faster in
+CPython than taking the fields apart byte by byte.
+"""
+
+from array import array
+from collections.abc import Sequence
+import datetime
+from functools import cached_property
+import mmap
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union, overload
+
+from time_tracker import Activity, Event, ParseErrors, get_log_filename
+from time_tracker.binlog import EPOCH, ONE_MICROSECOND
+
+# Activities, and their values, by their name in the log.
+ACTIVITY_NAMES = {a.name.encode(): a for a in Activity}
+ACTIVITY_VALUES = {a.name.encode(): a.value for a in Activity}
+
+
+class MappedLog(Sequence):
+    """The events of a text log, parsed on access."""
+
+    def __init__(self, filename: str, names: bool = False):
+        self.names = names
+        self._file: Optional[BinaryIO] = open(filename, "rb")
+        self._map: Union[mmap.mmap, bytes] = b""
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped.
+            pass
+
+    @classmethod
+    def from_bytes(cls, data: bytes, names: bool = False) -> "MappedLog":
+        """The events of a text log already in memory, e.g. an archived one."""
+        log = cls.__new__(cls)
+        log.names = names
+        log._file = None
+        log._map = data
+        return log
+
+    @cached_property
+    def _starts(self) -> array:
+        """The offsets of the line starts, and of the end."""
+        data = self._map
+        find = data.find
+        starts = array("q")
+        start = 0
+        size = len(data)
+        while start < size:
+            starts.append(start)
+            end = find(b"\n", start)
+            if end < 0:
+                start = size
+                break
+            start = end + 1
+        starts.append(size)
+        return starts
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "MappedLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+    def _line(self, i: int) -> bytes:
+        return self._map[self._starts[i] : self._starts[i + 1]].strip()
+
+    def _parse(self, i: int) -> Event:
+        line = self._line(i)
+        try:
+            timestamp, name, activity, *rest = line.split(b"\t")
+            return Event(
+                datetime.datetime.fromisoformat(timestamp.decode()),
+                name.decode() if self.names else "",
+                ACTIVITY_NAMES[activity],
+                rest[0].decode() if rest else "",
+            )
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid log line {i + 1}: {line!r}") from None
+
+    @overload
+    def __getitem__(self, i: int) -> Event: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Event]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._parse(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("log index out of range")
+        return self._parse(i)
+
+    def __iter__(self) -> Iterator[Event]:
+        for i in range(len(self)):
+            yield self._parse(i)
+
+    def records(
+        self, errors: Optional[ParseErrors] = None
+    ) -> Iterator[Tuple[int, bytes, int, bytes]]:
+        """The timestamp in microseconds since the epoch, name, activity value
+        and project of each event, with the name and the project undecoded.
+
+        Invalid lines raise, unless errors is given; then they are skipped and
+        recorded there.
+        """
+        fromisoformat = datetime.datetime.fromisoformat
+        lines = self._map[:].split(b"\n")
+        if not lines[-1]:
+            lines.pop()
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            try:
+                timestamp, name, activity, *rest = line.split(b"\t")
+                us = (fromisoformat(timestamp.decode()) - EPOCH) // ONE_MICROSECOND
+                record = (us, name, ACTIVITY_VALUES[activity], rest[0] if rest else b"")
+            except (KeyError, ValueError):
+                if errors is None:
+                    raise ValueError(f"Invalid log line {number}: {line!r}") from None
+                errors.add(number, line.decode(errors="replace"))
+                continue
+            yield record
+
+    def timestamps(self) -> array:
+        """The timestamps of all events, in microseconds since the epoch."""
+        data = self._map
+        find = data.find
+        fromisoformat = datetime.datetime.fromisoformat
+        starts = self._starts
+        result = array("q")
+        for i in range(len(self)):
+            start = starts[i]
+            end = find(b"\t", start, starts[i + 1])
+            if end < 0:
+                raise ValueError(f"Invalid log line {i + 1}: {self._line(i)!r}")
+            timestamp = fromisoformat(data[start:end].decode())
+            result.append((timestamp - EPOCH) // ONE_MICROSECOND)
+        return result
+
+
+def map_log(day: Optional[datetime.date] = None, names: bool = False) -> MappedLog:
+    """Map the text log of day; raises FileNotFoundError without one."""
+    return MappedLog(get_log_filename(day), names)
@@ -0,0 +1,228 @@
+"""Opt-in timing of where a run of the menu or a command spends its time.
+
+With `TIME_TRACKER_PROFILE=1` or `--profile`, the hot functions are wrapped
+to record their wall time and calls, and each run appends one JSON line to
+`LOG_DIR/perf.jsonl`. Time is attributed to the innermost phase, so the
+phases add up to the wall time of the run; printing counts as rendering.
+`time_tracker perf` summarizes the percentiles over the recent runs.
+
+The wrappers cost a little per call and per yielded item, so the numbers are
+for comparing runs with each other rather than with unprofiled ones.
+"""
+
+import builtins
+from collections import defaultdict
+import datetime
+import functools
+import importlib
+import json
+import math
+import os
+import sys
+import time
+import types
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import time_tracker
+from time_tracker import ANSI_BOLD, ANSI_RESET
+
+# (module, function, phase)
+PHASES = [
+    ("time_tracker", "load_log", "load_log"),
+    ("time_tracker", "iter_log", "parse_log"),
+    ("time_tracker", "get_work_spans", "get_work_spans"),
+    ("time_tracker", "filter_spans", "filter_spans"),
+    ("time_tracker", "get_messages", "get_messages"),
+    ("time_tracker.status", "load_status_results", "status"),
+    ("time_tracker.cache", "load_day_results", "cache"),
+]
+PERCENTILES = (50, 90, 99)
+# Rotate the log when it grows larger than this.
+PERF_MAX_BYTES = 1_000_000
+
+
+def get_perf_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "perf.jsonl")
+
+
+class Profile:
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.files_opened = 0
+        self.bytes_read = 0
+        self.phase = "other"
+        self.since = time.perf_counter()
+
+    def enter(self, phase: str) -> str:
+        """Switch to phase, returning the phase to switch back to."""
+        now = time.perf_counter()
+        self.seconds[self.phase] += now - self.since
+        self.since = now
+        previous, self.phase = self.phase, phase
+        return previous
+
+    def timed(self, phase: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self.calls[phase] += 1
+            previous = self.enter(phase)
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                self.enter(previous)
+            if isinstance(result, types.GeneratorType):
+                return self._timed_iter(phase, result)
+            return result
+
+        return wrapper
+
+    def _timed_iter(self, phase: str, it: Iterator) -> Iterator:
+        while True:
+            previous = self.enter(phase)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.enter(previous)
+            yield item
+
+    def opened(self, f) -> None:
+        """Count a file opened for reading under `LOG_DIR`."""
+        self.files_opened += 1
+        close = f.close
+
+        def counting_close():
+            if not f.closed:
+                # How far the file was read, including read-ahead and seeks.
+                self.bytes_read += os.lseek(f.fileno(), 0, os.SEEK_CUR)
+            close()
+
+        f.close = counting_close
+
+
+def _patch(name: str, old: Any, new: Any) -> None:
+    """Rebind name in all time_tracker modules that imported old."""
+    for module_name, module in list(sys.modules.items()):
+        if module_name.split(".")[0] == "time_tracker":
+            if getattr(module, name, None) is old:
+                setattr(module, name, new)
+
+
+def enable() -> Profile:
+    profile = Profile()
+    for module_name, name, phase in PHASES:
+        fn = getattr(importlib.import_module(module_name), name)
+        _patch(name, fn, profile.timed(phase, fn))
+    builtins.print = profile.timed("render", builtins.print)
+    real_open = builtins.open
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        f = real_open(file, mode, *args, **kwargs)
+        if (
+            isinstance(file, str)
+            and "r" in mode
+            and os.path.abspath(file).startswith(os.path.abspath(time_tracker.LOG_DIR))
+        ):
+            profile.opened(f)
+        return f
+
+    builtins.open = counting_open
+    return profile
+
+
+def run_profiled(run: Callable[[Sequence[str]], Any], argv: Sequence[str]) -> None:
+    """Run the menu or a command, then append its timings to the perf log."""
+    started = datetime.datetime.now()
+    # The CPU time of the process so far: interpreter startup and imports.
+    import_s = time.process_time()
+    start = time.perf_counter()
+    saved = builtins.print, builtins.open
+    profile = enable()
+    try:
+        run(argv)
+    finally:
+        profile.enter("other")
+        wall_s = time.perf_counter() - start
+        builtins.print, builtins.open = saved
+        record = {
+            "time": started.isoformat(timespec="seconds"),
+            "command": argv[0] if argv else "menu",
+            "wall_s": wall_s,
+            "import_s": import_s,
+            "files_opened": profile.files_opened,
+            "bytes_read": profile.bytes_read,
+            "phases": {
+                phase: {"s": s, "calls": profile.calls.get(phase, 0)}
+                for phase, s in profile.seconds.items()
+            },
+        }
+        append_record(record)
+        for module_name, name, _phase in PHASES:
+            fn = getattr(sys.modules[module_name], name)
+            _patch(name, fn, fn.__wrapped__)
+
+
+def append_record(record: Dict[str, Any]) -> None:
+    filename = get_perf_filename()
+    os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+    try:
+        if os.path.getsize(filename) > PERF_MAX_BYTES:
+            os.replace(filename, f"{filename}.1")
+    except FileNotFoundError:
+        pass
+    with open(filename, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_records(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """The most recent records, oldest first."""
+    records = []
+    filename = get_perf_filename()
+    for name in [f"{filename}.1", filename]:
+        try:
+            with open(name) as f:
+                records += [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            pass
+    return records[-limit:] if limit else records
+
+
+def percentile(values: List[float], p: float) -> float:
+    """The nearest-rank percentile p of values."""
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def _row(label: str, values: List[float], format: str) -> str:
+    return f"{label:16}" + "".join(
+        f"{percentile(values, p):{format}}" for p in PERCENTILES
+    )
+
+
+def write_perf(limit: int = 100):
+    records = load_records(limit)
+    if not records:
+        print(f"No timings in {get_perf_filename()}, run with --profile first.")
+        return
+    by_command: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        by_command[record["command"]].append(record)
+    for command, runs in by_command.items():
+        ms: Dict[str, List[float]] = {
+            "wall": [r["wall_s"] * 1000 for r in runs],
+            "import": [r["import_s"] * 1000 for r in runs],
+        }
+        for r in runs:
+            for phase, data in r["phases"].items():
+                ms.setdefault(phase, []).append(data["s"] * 1000)
+        print()
+        print(f"{ANSI_BOLD}{command}: {len(runs)} runs{ANSI_RESET}")
+        print(f"{'':16}" + "".join(f"{f'p{p} ms':>9}" for p in PERCENTILES))
+        for phase, values in ms.items():
+            # Phases not hit in a run took no time in it.
+            values += [0.0] * (len(runs) - len(values))
+            print(_row(phase, values, "9.2f"))
+        print(_row("files opened", [r["files_opened"] for r in runs], "9"))
+        print(_row("kB read", [r["bytes_read"] / 1000 for r in runs], "9.1f"))
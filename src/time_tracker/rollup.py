@@ -0,0 +1,160 @@
+"""Hours per project, summed up by calendar week, month, quarter or year.
+
+The spans of all days in the range come from the column-oriented path in
+`time_tracker.arrays`. Each period has a row of totals in microseconds,
+indexed by project code. Summing up is one Python loop over the span
+columns, adding each span to its period's row, and the row is only looked up
+when the day changes. No `Span` objects are created, but the loop still costs
+a few operations per span. With the SQLite backend, the spans are read from
+its table of spans instead.
+"""
+
+from array import array
+import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import time_tracker
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ParseErrors,
+    list_log_days,
+    write_parse_errors,
+)
+from time_tracker.arrays import (
+    US_PER_DAY,
+    Codes,
+    SpanArray,
+    filter_span_array,
+    get_work_span_array,
+    load_event_array,
+)
+from time_tracker.binlog import EPOCH
+
+US_PER_HOUR = 3600 * 1_000_000
+PERIODS = ["week", "month", "quarter", "year"]
+EPOCH_DAY = EPOCH.date()
+
+
+def period_start(day: datetime.date, by: str) -> datetime.date:
+    """The first day of the period containing day."""
+    if by == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if by == "month":
+        return day.replace(day=1)
+    if by == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if by == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Invalid period {by!r}")
+
+
+def period_label(start: datetime.date, by: str) -> str:
+    if by == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02}"
+    if by == "month":
+        return f"{start:%Y-%m}"
+    if by == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return f"{start.year}"
+
+
+class Rollup:
+    """Microseconds worked per period and project."""
+
+    def __init__(self, by: str, projects: Optional[Codes] = None):
+        if by not in PERIODS:
+            raise ValueError(f"Invalid period {by!r}")
+        self.by = by
+        self.project_codes = projects if projects is not None else Codes()
+        self.periods: List[datetime.date] = []
+        self.rows: List[array] = []
+        self._index: Dict[datetime.date, int] = {}
+
+    def _row(self, day_number: int, width: int) -> array:
+        start = period_start(EPOCH_DAY + datetime.timedelta(days=day_number), self.by)
+        i = self._index.get(start)
+        if i is None:
+            i = self._index[start] = len(self.periods)
+            self.periods.append(start)
+            self.rows.append(array("q", [0]) * width)
+        return self.rows[i]
+
+    def add(self, spans: SpanArray) -> None:
+        """Add spans, attributing each to the period of its start."""
+        projects = spans.projects
+        if spans.project_codes is not self.project_codes:
+            # Map the spans' project codes to ours, in one pass.
+            codes = [self.project_codes.code(n) for n in spans.project_codes.names]
+            projects = array("I", map(codes.__getitem__, projects))
+        width = len(self.project_codes.names)
+        for row in self.rows:
+            row.extend([0] * (width - len(row)))
+        day_number = None
+        row = array("q")
+        for start, end, project in zip(spans.starts, spans.ends, projects):
+            day = start // US_PER_DAY
+            if day != day_number:
+                day_number = day
+                row = self._row(day, width)
+            row[project] += end - start
+
+    def __iter__(self) -> Iterator[Tuple[datetime.date, Dict[str, float]]]:
+        """Each period in order, with the hours per project worked in it."""
+        names = self.project_codes.names
+        for start, i in sorted(self._index.items()):
+            yield start, {
+                names[code]: us / US_PER_HOUR
+                for code, us in enumerate(self.rows[i])
+                if us
+            }
+
+
+def load_rollup(
+    by: str,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    now: Optional[datetime.datetime] = None,
+    errors: Optional[ParseErrors] = None,
+) -> Rollup:
+    """Sum up the logs from start to end, inclusive.
+
+    Invalid lines are skipped and recorded in errors, if given.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    if errors is None:
+        errors = ParseErrors()
+    if time_tracker.LOG_FORMAT == "sqlite":
+        from time_tracker.db import query_spans
+
+        spans = SpanArray.from_spans(
+            query_spans(start or datetime.date.min, end or now.date(), now)
+        )
+    else:
+        days = [
+            day
+            for day in list_log_days()
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
+        spans = get_work_span_array(load_event_array(days, errors), now)
+    rollup = Rollup(by, spans.project_codes)
+    rollup.add(filter_span_array(spans))
+    return rollup
+
+
+def write_stats(
+    by: str,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+):
+    errors = ParseErrors()
+    rollup = load_rollup(by, start, end, errors=errors)
+    for period, hours in rollup:
+        print()
+        print(f"{ANSI_BOLD}{period_label(period, by)}:{ANSI_RESET}")
+        for project, h in hours.items():
+            print(f"{h:7.2f} - {project}")
+        print(f"{ANSI_BOLD}{sum(hours.values()):7.2f} - total{ANSI_RESET}")
+    write_parse_errors(errors)
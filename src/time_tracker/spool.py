@@ -0,0 +1,187 @@
+"""Sending events to the team server.
+
+With `TIME_TRACKER_TEAM_SERVER` set to `unix:<path>` or `<host>:<port>`, every
+event is appended to `LOG_DIR/team-spool.log`, numbered in sequence: the
+agent's writer spools the events it logs, and the project commands spool
+theirs, without waiting for the network. The agent's `TeamClient` then sends
+the whole spool as one batch, after each event and every minute. While the
+server is unreachable the spool grows, and sending is retried with
+exponential backoff.
+
+The sequence is kept in `LOG_DIR/team-seq`, together with a random id of this
+client, so that the server keeps one sequence per user and client. It skips
+sequence numbers it has already applied, so a batch whose reply got lost can
+safely be sent again. If the sequence is lost, a new client id starts a new
+one, rather than reusing numbers the server would skip.
+"""
+
+import contextlib
+import datetime
+import fcntl
+import os
+import socket
+import time
+from typing import Iterator, List, Optional, Tuple
+import uuid
+
+import time_tracker
+from time_tracker import Event, format_event
+
+RETRY_MIN = 1.0
+RETRY_MAX = 300.0
+TIMEOUT = 10.0
+
+
+def get_spool_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "team-spool.log")
+
+
+def get_sequence_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "team-seq")
+
+
+@contextlib.contextmanager
+def spool_lock() -> Iterator[None]:
+    """Hold the lock of the spool and the sequence, shared by all processes."""
+    os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+    with open(f"{get_spool_filename()}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def next_sequence() -> Tuple[str, int]:
+    """The client id and the next sequence number; call with the lock held."""
+    try:
+        with open(get_sequence_filename()) as f:
+            fields = f.read().split()
+        if len(fields) == 1:
+            # Written before client ids.
+            client, seq = "", int(fields[0])
+        else:
+            client, seq = fields[0], int(fields[1])
+    except (FileNotFoundError, ValueError, IndexError):
+        client, seq = uuid.uuid4().hex, 0
+    seq += 1
+    with open(get_sequence_filename(), "w") as f:
+        f.write(f"{client}\t{seq}")
+    return client, seq
+
+
+def spool_event(event: Event) -> None:
+    """Append event to the spool, for the agent to send."""
+    with spool_lock():
+        client, seq = next_sequence()
+        with open(get_spool_filename(), "a") as spool:
+            spool.write(f"{client}\t{seq}\t{format_event(event)}\n")
+
+
+def spool_for_team(event: Event) -> None:
+    """Spool event if there is a team server, like the agent does."""
+    if os.environ.get("TIME_TRACKER_TEAM_SERVER"):
+        spool_event(event)
+
+
+def split_batches(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """The spooled lines as batches of `<seq> <log line>` per client id."""
+    batches: List[Tuple[str, List[str]]] = []
+    for line in lines:
+        if line.count("\t") == 4:
+            # Spooled before client ids.
+            client, rest = "", line
+        else:
+            client, _, rest = line.partition("\t")
+        if not batches or batches[-1][0] != client:
+            batches.append((client, []))
+        batches[-1][1].append(rest)
+    return batches
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """The socket family and address of `unix:<path>` or `<host>:<port>`."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[5:]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid team server address {address!r}")
+    return socket.AF_INET, (host, int(port))
+
+
+def default_user() -> str:
+    import getpass
+
+    return os.environ.get("TIME_TRACKER_TEAM_USER") or getpass.getuser()
+
+
+class TeamClient:
+    def __init__(self, address: str, user: Optional[str] = None):
+        self.family, self.address = parse_address(address)
+        self.user = user if user is not None else default_user()
+        self.retry_at = 0.0
+        self.backoff = RETRY_MIN
+
+    def send(self, event: Event) -> bool:
+        """Spool event and try to send the spool; True if it was sent."""
+        spool_event(event)
+        return self.flush()
+
+    def flush(self, force: bool = False) -> bool:
+        """Send the spool, unless backing off; True if it is empty now."""
+        with spool_lock():
+            try:
+                with open(get_spool_filename()) as spool:
+                    lines = spool.readlines()
+            except FileNotFoundError:
+                return True
+        if not lines:
+            return True
+        if not force and time.monotonic() < self.retry_at:
+            return False
+        try:
+            for client, batch in split_batches(lines):
+                self._send_batch(client, batch)
+        except (OSError, ValueError):
+            self.retry_at = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, RETRY_MAX)
+            return False
+        self.backoff = RETRY_MIN
+        self.retry_at = 0.0
+        with spool_lock():
+            # Keep what was spooled while sending.
+            with open(get_spool_filename()) as spool:
+                rest = spool.readlines()[len(lines) :]
+            if rest:
+                tmp = f"{get_spool_filename()}.tmp"
+                with open(tmp, "w") as spool:
+                    spool.writelines(rest)
+                os.replace(tmp, get_spool_filename())
+            else:
+                os.remove(get_spool_filename())
+        return not rest
+
+    def _send_batch(self, client: str, lines: List[str]) -> None:
+        with socket.socket(self.family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(TIMEOUT)
+            sock.connect(self.address)
+            header = f"EVENTS\t{self.user}\t{client}\t{len(lines)}\n"
+            sock.sendall((header + "".join(lines)).encode())
+            reply = sock.makefile("r").readline().rstrip("\n").split("\t")
+        if reply[0] != "OK":
+            raise ValueError(f"Team server refused the events: {reply}")
+
+    def query(self, start: datetime.date, end: datetime.date) -> dict:
+        """The team's hours from start to end, inclusive."""
+        import json
+
+        with socket.socket(self.family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(TIMEOUT)
+            sock.connect(self.address)
+            sock.sendall(f"QUERY\t{start}\t{end}\n".encode())
+            reply = sock.makefile("r").readline()
+        if not reply.startswith("{"):
+            raise ValueError(f"Team server refused the query: {reply.strip()}")
+        return json.loads(reply)
+
+
+def client_from_env() -> Optional[TeamClient]:
+    address = os.environ.get("TIME_TRACKER_TEAM_SERVER")
+    return TeamClient(address) if address else None
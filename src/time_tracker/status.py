@@ -0,0 +1,139 @@
+"""Snapshot of today's status, kept up to date by whoever logs an event.
+
+The agent and the project commands call `update_status` after logging. It
+brings the incremental evaluation of today's log up to date and writes
+`LOG_DIR/status.json` with the open span, the spans closed so far (with short
+breaks already merged), and the results as of the last event. The menu then
+only has to check that the snapshot still matches the log and the day's
+corrections, and otherwise needs no parsing at all. The running totals of
+`time_tracker.totals` are updated along the way.
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Optional
+
+import time_tracker
+from time_tracker import (
+    DayResults,
+    SpanState,
+    evaluate_day,
+    filter_short_breaks,
+    get_corrections_filename,
+    get_log_filename,
+    get_source_log_filenames,
+    warn_parse_errors,
+    write_json,
+)
+from time_tracker.cache import decode_results, encode_results
+from time_tracker.tail import (
+    decode_errors,
+    decode_event,
+    decode_span,
+    encode_errors,
+    encode_event,
+    encode_span,
+    update_tail,
+)
+from time_tracker.totals import update_totals
+
+STATUS_VERSION = 3
+
+
+def get_status_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "status.json")
+
+
+def update_status(day: Optional[datetime.date] = None) -> Optional[dict[str, Any]]:
+    """Update and return the snapshot of the day's log, and the totals.
+
+    Returns None if there is no text log for the day, if it has to be merged
+    with the logs of other machines, or if only a full replay can put its
+    events and corrections in order.
+    """
+    try:
+        tail = update_tail(day)
+    except ValueError:
+        tail = None
+    if tail is None or tail.log.stat is None:
+        update_totals(day)
+        return None
+    update_totals(tail.day, tail.spans)
+    spans = list(filter_short_breaks(tail.spans))
+    closed = DayResults([tail.last], spans) if tail.last else DayResults([])
+    warn_parse_errors(closed, tail.errors)
+    status = {
+        "version": STATUS_VERSION,
+        "day": tail.day.isoformat(),
+        "log": stat_key(tail.log.stat),
+        "corrections": stat_key(tail.corrections.stat),
+        "working": tail.state.working,
+        "start": tail.state.start.isoformat(),
+        "project": tail.state.project,
+        "spans": [encode_span(s) for s in spans],
+        "last": encode_event(tail.last) if tail.last else None,
+        "errors": encode_errors(tail.errors),
+        "results": encode_results(closed),
+    }
+    write_json(get_status_filename(), status)
+    return status
+
+
+def stat_key(stat: Optional[os.stat_result]) -> Optional[list[int]]:
+    """What tells whether a log has changed since stat."""
+    if stat is None:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def read_status(day: datetime.date) -> Optional[dict[str, Any]]:
+    """The snapshot of the day's log and corrections, if it is still current."""
+    try:
+        with open(get_status_filename()) as f:
+            status = json.load(f)
+        log = stat_key(os.stat(get_log_filename(day)))
+        corrections = None
+        for filename in get_source_log_filenames(day):
+            if filename != get_corrections_filename(day):
+                # The snapshot doesn't cover the logs of other machines.
+                return None
+            corrections = stat_key(os.stat(filename))
+    except (FileNotFoundError, ValueError):
+        return None
+    if (
+        status.get("version") != STATUS_VERSION
+        or status.get("day") != day.isoformat()
+        or status.get("log") != log
+        or status.get("corrections") != corrections
+    ):
+        return None
+    return status
+
+
+def load_status_results(now: Optional[datetime.datetime] = None) -> DayResults:
+    """Evaluate today's log like `evaluate_day`, from the snapshot."""
+    if now is None:
+        now = datetime.datetime.now()
+    if time_tracker.LOG_FORMAT == "sqlite":
+        from time_tracker.db import day_results
+
+        return day_results(now.date(), now)
+    status = read_status(now.date())
+    if status is None:
+        status = update_status(now.date())
+    if status is None:
+        # No text log, other logs to merge, or events out of order.
+        return evaluate_day(now.date(), now)
+    state = SpanState(
+        status["working"],
+        datetime.datetime.fromisoformat(status["start"]),
+        status["project"],
+    )
+    span = state.open_span(now)
+    if span is None:
+        return decode_results(status["results"])
+    spans = [decode_span(s) for s in status["spans"]]
+    results = DayResults([decode_event(status["last"])], spans + [span])
+    warn_parse_errors(results, decode_errors(status["errors"]))
+    return results
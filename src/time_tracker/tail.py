@@ -0,0 +1,326 @@
+"""Incremental evaluation of today's log.
+
+The menu is refreshed every minute, but usually only a few events have been
+appended since the last refresh. Instead of replaying the whole log each
+time, we save how far we have read, together with the span state machine and
+the spans closed so far, in `LOG_DIR/tail.json`. The next run only parses the
+lines appended since then, to the log and to the day's corrections, like the
+ones `project-back` logs. If a log was truncated or rewritten, we start over
+from the beginning. Invalid lines are skipped and counted, like
+`evaluate_day` does.
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Iterator, List, Optional, Tuple
+
+import time_tracker
+from time_tracker import (
+    Activity,
+    DayResults,
+    Event,
+    ParseErrors,
+    Span,
+    SpanState,
+    evaluate_day,
+    get_corrections_filename,
+    get_log_filename,
+    get_source_log_filenames,
+    parse_log_line,
+    warn_parse_errors,
+    write_json,
+)
+
+TAIL_VERSION = 3
+
+
+def get_tail_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "tail.json")
+
+
+def encode_span(span: Span) -> list[str]:
+    return [span.start.isoformat(), span.end.isoformat(), span.project]
+
+
+def decode_span(data: list[str]) -> Span:
+    start, end, project = data
+    return Span(
+        datetime.datetime.fromisoformat(start),
+        datetime.datetime.fromisoformat(end),
+        project,
+    )
+
+
+def encode_event(event: Event) -> list[str]:
+    return [
+        event.timestamp.isoformat(),
+        event.name,
+        event.activity.name,
+        event.project,
+    ]
+
+
+def decode_event(data: list[str]) -> Event:
+    timestamp, name, activity, project = data
+    return Event(
+        datetime.datetime.fromisoformat(timestamp), name, Activity[activity], project
+    )
+
+
+def encode_errors(errors: ParseErrors) -> dict[str, Any]:
+    return {"count": errors.count, "lines": errors.lines}
+
+
+def decode_errors(data: dict[str, Any]) -> ParseErrors:
+    errors = ParseErrors()
+    errors.count = data["count"]
+    errors.lines = [(number, line) for number, line in data["lines"]]
+    return errors
+
+
+class LogPosition:
+    """How far a log has been consumed."""
+
+    def __init__(self) -> None:
+        self.inode = 0
+        self.offset = 0
+        # The number of consumed lines.
+        self.lines = 0
+        # The last consumed line, to recognize a rewritten log.
+        self.check = b""
+        # The log as of the last update; not saved.
+        self.stat: Optional[os.stat_result] = None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "inode": self.inode,
+            "offset": self.offset,
+            "lines": self.lines,
+            "check": self.check.decode(errors="replace"),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "LogPosition":
+        position = cls()
+        position.inode = data["inode"]
+        position.offset = data["offset"]
+        position.lines = data["lines"]
+        position.check = data["check"].encode()
+        return position
+
+    def read(self, filename: str) -> Optional[bytes]:
+        """What was appended to the log since, or None if it was rewritten."""
+        with open(filename, "rb") as log:
+            stat = os.fstat(log.fileno())
+            if self.offset:
+                if stat.st_ino != self.inode or stat.st_size < self.offset:
+                    return None
+                log.seek(self.offset - len(self.check))
+                if log.read(len(self.check)) != self.check:
+                    return None
+            self.inode = stat.st_ino
+            self.stat = stat
+            if stat.st_size == self.offset:
+                return b""
+            return log.read()
+
+    def consume(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """The numbered complete lines at the start of data."""
+        end = data.rfind(b"\n") + 1
+        if not end:
+            # A partially written line; wait until it is complete.
+            return []
+        lines = data[:end].splitlines(keepends=True)
+        self.offset += end
+        self.check = lines[-1]
+        first = self.lines + 1
+        self.lines += len(lines)
+        return list(enumerate(lines, first))
+
+
+class TailState:
+    """How far a day's log and its corrections have been consumed, and what
+    they amounted to.
+
+    A correction is only folded into the state if it is no earlier than the
+    last event that changed the state, and so ends up where the merge of
+    `iter_file_log` would put it: before events that only confirm that work
+    goes on. Otherwise, only a full replay can merge it.
+    """
+
+    def __init__(self, day: datetime.date):
+        self.day = day
+        self.log = LogPosition()
+        self.corrections = LogPosition()
+        # The invalid lines of both logs.
+        self.errors = ParseErrors()
+        self.state = SpanState()
+        self.spans: List[Span] = []
+        self.last: Optional[Event] = None
+        # The time of the last event that changed the state, and of the last
+        # correction.
+        self.changed: Optional[datetime.datetime] = None
+        self.corrected: Optional[datetime.datetime] = None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "version": TAIL_VERSION,
+            "day": self.day.isoformat(),
+            "log": self.log.to_json(),
+            "corrections": self.corrections.to_json(),
+            "errors": encode_errors(self.errors),
+            "working": self.state.working,
+            "start": self.state.start.isoformat(),
+            "project": self.state.project,
+            "spans": [encode_span(s) for s in self.spans],
+            "last": encode_event(self.last) if self.last else None,
+            "changed": self.changed.isoformat() if self.changed else None,
+            "corrected": self.corrected.isoformat() if self.corrected else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "TailState":
+        if data["version"] != TAIL_VERSION:
+            raise ValueError(f"Unsupported tail state version {data['version']}")
+        tail = cls(datetime.date.fromisoformat(data["day"]))
+        tail.log = LogPosition.from_json(data["log"])
+        tail.corrections = LogPosition.from_json(data["corrections"])
+        tail.errors = decode_errors(data["errors"])
+        tail.state = SpanState(
+            data["working"],
+            datetime.datetime.fromisoformat(data["start"]),
+            data["project"],
+        )
+        tail.spans = [decode_span(s) for s in data["spans"]]
+        if data["last"]:
+            tail.last = decode_event(data["last"])
+        if data["changed"]:
+            tail.changed = datetime.datetime.fromisoformat(data["changed"])
+        if data["corrected"]:
+            tail.corrected = datetime.datetime.fromisoformat(data["corrected"])
+        return tail
+
+    def _parse(self, lines: List[Tuple[int, bytes]]) -> Iterator[Event]:
+        for number, line in lines:
+            try:
+                event = parse_log_line(line.decode())
+            except (KeyError, ValueError):
+                self.errors.add(number, line.decode(errors="replace"))
+                continue
+            yield event
+
+    def _advance(self, event: Event) -> None:
+        if (
+            event.activity is not Activity.WORKING
+            or not self.state.working
+            or event.project
+        ):
+            self.changed = event.timestamp
+        span = self.state.feed(event)
+        if span is not None:
+            self.spans.append(span)
+        if self.last is None or event.timestamp >= self.last.timestamp:
+            self.last = event
+
+    def feed(self, data: bytes) -> None:
+        """Consume the complete lines at the start of data, from the log."""
+        for event in self._parse(self.log.consume(data)):
+            if self.last is not None and event.timestamp < self.last.timestamp:
+                # Only a full replay can merge it.
+                raise ValueError(f"Event out of order: {event}")
+            if self.corrected is not None and event.timestamp <= self.corrected:
+                # The merge puts it before a correction.
+                raise ValueError(f"Event before a correction: {event}")
+            self._advance(event)
+
+    def feed_corrections(self, data: bytes) -> None:
+        """Consume the complete lines at the start of data, from the corrections."""
+        for event in self._parse(self.corrections.consume(data)):
+            if self.changed is not None and event.timestamp < self.changed:
+                raise ValueError(f"Correction before a change: {event}")
+            self._advance(event)
+            if self.corrected is None or event.timestamp > self.corrected:
+                self.corrected = event.timestamp
+
+
+def load_tail_state(day: datetime.date) -> TailState:
+    try:
+        with open(get_tail_filename()) as f:
+            tail = TailState.from_json(json.load(f))
+    except (FileNotFoundError, KeyError, TypeError, ValueError):
+        return TailState(day)
+    if tail.day != day:
+        return TailState(day)
+    return tail
+
+
+def save_tail_state(tail: TailState) -> None:
+    os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+    write_json(get_tail_filename(), tail.to_json())
+
+
+def update_tail(day: Optional[datetime.date] = None) -> Optional[TailState]:
+    """Bring the saved state for the day's log and corrections up to date.
+
+    Returns None if there is no log for the day, or if it has to be merged
+    with the logs of other machines. Raises ValueError if a full replay is
+    needed to merge the corrections, or to put the events in order.
+    """
+    if day is None:
+        day = datetime.date.today()
+    corrections = get_corrections_filename(day)
+    sources = get_source_log_filenames(day)
+    if any(filename != corrections for filename in sources):
+        return None
+    tail = load_tail_state(day)
+    try:
+        data = tail.log.read(get_log_filename(day))
+        fixes = tail.corrections.read(corrections) if sources else b""
+        if data is None or fixes is None or (tail.corrections.offset and not sources):
+            # Rewritten or removed; start over.
+            tail = TailState(day)
+            data = tail.log.read(get_log_filename(day))
+            fixes = tail.corrections.read(corrections) if sources else b""
+    except FileNotFoundError:
+        return None
+    offsets = tail.log.offset, tail.corrections.offset
+    tail.feed(data)
+    tail.feed_corrections(fixes)
+    if (tail.log.offset, tail.corrections.offset) != offsets:
+        save_tail_state(tail)
+    return tail
+
+
+def get_today_spans(
+    now: Optional[datetime.datetime] = None,
+) -> Tuple[List[Span], Optional[Event], ParseErrors]:
+    """Today's work spans, last event and invalid lines, evaluated incrementally."""
+    if now is None:
+        now = datetime.datetime.now()
+    tail = update_tail(now.date())
+    if tail is None:
+        return [], None, ParseErrors()
+    spans = list(tail.spans)
+    span = tail.state.open_span(now)
+    if span is not None:
+        spans.append(span)
+    return spans, tail.last, tail.errors
+
+
+def load_today_results(now: Optional[datetime.datetime] = None) -> DayResults:
+    """Evaluate today's log like `evaluate_day`, but incrementally."""
+    if now is None:
+        now = datetime.datetime.now()
+    try:
+        spans, last, errors = get_today_spans(now)
+    except ValueError:
+        # Events out of order, or a correction that goes before some of
+        # them; only a full replay can put them in order.
+        return evaluate_day(now.date(), now)
+    if last is None:
+        # Without a text log, there may still be a binary one.
+        return evaluate_day(now.date(), now)
+    results = DayResults([last], spans)
+    warn_parse_errors(results, errors)
+    return results
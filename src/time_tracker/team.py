@@ -0,0 +1,268 @@
+"""The team server, collecting the events of many people.
+
+`time_tracker team-server` accepts batches of events from the agents of a team
+(see `time_tracker.spool`) over a Unix socket or TCP. Each person's events are
+stored like a local `LOG_DIR`, in `<data>/<user>/YYYY-MM-DD.log`, and running
+totals per person, day and project are kept with the same span rules as the
+menu, counting closed spans. Range queries are answered from those totals in
+the same event loop, while the disk writes of the ingestion run in threads,
+so neither blocks the other.
+
+The protocol is line based, with tab-separated fields:
+
+    EVENTS <user> <client> <n>, then n lines of <seq> <log line>  ->  OK <last seq>
+    QUERY <from> <to>  ->  one JSON line of hours per user and project
+
+Each client of a user, e.g. each of their machines, numbers its events in its
+own sequence, and events with a sequence number the server has already
+applied for that user and client are skipped. `EVENTS <user> <n>` is the same
+as an empty client id.
+"""
+
+import asyncio
+from collections import defaultdict
+import datetime
+import json
+import os
+import re
+import socket
+from typing import Dict, List, Optional
+
+import time_tracker
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ONE_MINUTE,
+    Event,
+    ParseErrors,
+    Span,
+    SpanState,
+    filter_spans,
+    format_event,
+    iter_log,
+    parse_log_line,
+)
+from time_tracker.spool import parse_address
+
+USER_PATTERN = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.@-]*")
+CLIENT_PATTERN = re.compile(r"[A-Za-z0-9_.-]{0,64}")
+# Agents connect in bursts, e.g. after a network outage.
+BACKLOG = 1024
+# Upper bound for the events of one batch.
+MAX_BATCH = 100_000
+
+
+def get_team_dir() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "team")
+
+
+class DayTotals:
+    """The work spans of a person's day, and their minutes per project."""
+
+    def __init__(self) -> None:
+        self.state = SpanState()
+        self.spans: List[Span] = []
+        self.minutes: Dict[str, int] = {}
+
+    def feed(self, events: List[Event]) -> None:
+        for e in events:
+            span = self.state.feed(e)
+            if span is not None:
+                self.spans.append(span)
+        minutes: Dict[str, int] = defaultdict(int)
+        for s in filter_spans(self.spans):
+            minutes[s.project] += s.rounded_duration() // ONE_MINUTE
+        self.minutes = dict(minutes)
+
+
+class UserShard:
+    """A person's stored events and totals."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # The last applied sequence number per client.
+        self.seqs: Dict[str, int] = {}
+        self.days: Dict[datetime.date, DayTotals] = {}
+        # Batches of one person are stored one at a time, in order.
+        self.lock = asyncio.Lock()
+
+    def get_seq_filename(self) -> str:
+        return os.path.join(self.directory, "seq")
+
+    def load(self) -> None:
+        try:
+            with open(self.get_seq_filename()) as f:
+                seqs = json.load(f)
+        except (FileNotFoundError, ValueError):
+            seqs = {}
+        # A single number was written before client ids.
+        self.seqs = {"": seqs} if isinstance(seqs, int) else seqs
+        for name in sorted(os.listdir(self.directory)):
+            stem, ext = os.path.splitext(name)
+            if ext != ".log":
+                continue
+            with open(os.path.join(self.directory, name)) as log:
+                events = list(iter_log(log, ParseErrors()))
+            self.days[datetime.date.fromisoformat(stem)] = totals = DayTotals()
+            totals.feed(events)
+
+    def store(
+        self, days: Dict[datetime.date, List[Event]], seqs: Dict[str, int]
+    ) -> None:
+        """Append the events to the logs, then record the last sequence numbers."""
+        os.makedirs(self.directory, exist_ok=True)
+        for day, events in days.items():
+            with open(os.path.join(self.directory, f"{day}.log"), "a") as log:
+                log.writelines(format_event(e) + "\n" for e in events)
+        tmp = f"{self.get_seq_filename()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(seqs, f)
+        os.replace(tmp, self.get_seq_filename())
+
+    def apply(
+        self, days: Dict[datetime.date, List[Event]], seqs: Dict[str, int]
+    ) -> None:
+        for day, events in days.items():
+            if day not in self.days:
+                self.days[day] = DayTotals()
+            self.days[day].feed(events)
+        self.seqs = seqs
+
+
+class TeamServer:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory if directory is not None else get_team_dir()
+        self.shards: Dict[str, UserShard] = {}
+        self.events = 0
+
+    def load(self) -> None:
+        """Load the totals of the stored events."""
+        os.makedirs(self.directory, exist_ok=True)
+        for user in sorted(os.listdir(self.directory)):
+            if USER_PATTERN.fullmatch(user):
+                shard = self.shards[user] = UserShard(
+                    os.path.join(self.directory, user)
+                )
+                shard.load()
+
+    def shard(self, user: str) -> UserShard:
+        if not USER_PATTERN.fullmatch(user):
+            raise ValueError(f"Invalid user {user!r}")
+        if user not in self.shards:
+            self.shards[user] = UserShard(os.path.join(self.directory, user))
+        return self.shards[user]
+
+    async def ingest(self, user: str, client: str, lines: List[str]) -> int:
+        """Store and count the events of a client of user, returning its last
+        sequence number."""
+        if not CLIENT_PATTERN.fullmatch(client):
+            raise ValueError(f"Invalid client {client!r}")
+        shard = self.shard(user)
+        async with shard.lock:
+            days: Dict[datetime.date, List[Event]] = {}
+            last = seq = shard.seqs.get(client, 0)
+            for line in lines:
+                number, _, log_line = line.partition("\t")
+                if int(number) <= seq:
+                    continue
+                event = parse_log_line(log_line)
+                days.setdefault(event.timestamp.date(), []).append(event)
+                seq = int(number)
+            if seq > last:
+                seqs = {**shard.seqs, client: seq}
+                await asyncio.to_thread(shard.store, days, seqs)
+                shard.apply(days, seqs)
+                self.events += sum(len(events) for events in days.values())
+            return seq
+
+    def query(self, start: datetime.date, end: datetime.date) -> Dict:
+        """Hours per user and project from start to end, inclusive."""
+        users: Dict[str, Dict[str, float]] = {}
+        projects: Dict[str, float] = defaultdict(float)
+        for user, shard in sorted(self.shards.items()):
+            minutes: Dict[str, int] = defaultdict(int)
+            for day, totals in shard.days.items():
+                if start <= day <= end:
+                    for project, m in totals.minutes.items():
+                        minutes[project] += m
+            if minutes:
+                users[user] = {p: m / 60 for p, m in sorted(minutes.items())}
+                for p, m in minutes.items():
+                    projects[p] += m / 60
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "users": users,
+            "projects": dict(sorted(projects.items())),
+            "total": sum(projects.values()),
+        }
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := (await reader.readline()).decode():
+                command, *args = line.rstrip("\n").split("\t")
+                if command == "EVENTS":
+                    if len(args) == 2:
+                        user, client, count = args[0], "", int(args[1])
+                    else:
+                        user, client, count = args[0], args[1], int(args[2])
+                    if not 0 <= count <= MAX_BATCH:
+                        raise ValueError(f"Invalid batch size {count}")
+                    lines = [
+                        (await reader.readline()).decode().rstrip("\n")
+                        for _ in range(count)
+                    ]
+                    seq = await self.ingest(user, client, lines)
+                    reply = f"OK\t{seq}"
+                elif command == "QUERY":
+                    start, end = (datetime.date.fromisoformat(a) for a in args[:2])
+                    reply = json.dumps(self.query(start, end))
+                else:
+                    raise ValueError(f"Invalid command {command!r}")
+                writer.write(reply.encode() + b"\n")
+                await writer.drain()
+        except (ValueError, IndexError, KeyError) as e:
+            writer.write(f"ERROR\t{e}\n".encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        await asyncio.to_thread(self.load)
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            return await asyncio.start_unix_server(
+                self.handle, path=addr, backlog=BACKLOG
+            )
+        host, port = addr
+        return await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+
+
+async def serve(address: str, directory: Optional[str] = None) -> None:
+    server = await TeamServer(directory).start(address)
+    async with server:
+        await server.serve_forever()
+
+
+def write_team_query(start: datetime.date, end: datetime.date):
+    from time_tracker.spool import client_from_env
+
+    client = client_from_env()
+    if client is None:
+        print("Set TIME_TRACKER_TEAM_SERVER to the address of the team server.")
+        return
+    result = client.query(start, end)
+    for user, hours in result["users"].items():
+        print()
+        print(f"{ANSI_BOLD}{user}{ANSI_RESET}")
+        for project, h in hours.items():
+            print(f"{h:7.2f} - {project}")
+    print()
+    print(f"{ANSI_BOLD}Team{ANSI_RESET}")
+    for project, h in result["projects"].items():
+        print(f"{h:7.2f} - {project}")
+    print(f"{ANSI_BOLD}{result['total']:7.2f} - total{ANSI_RESET}")
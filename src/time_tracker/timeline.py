@@ -0,0 +1,240 @@
+"""Minute-resolution timelines of work, as bitsets.
+
+A `DayTimeline` holds, for each project, an `int` with bit i set if minute i
+of the day was worked on it. Spans are rounded to the minute like
+`Span.rounded_duration`, so the number of set bits is the rounded minutes
+worked, as counted by `get_cumulative_work`. Unions, intersections and totals
+across days, projects or machines are then a few big-integer operations
+rather than loops over spans.
+
+`load_timelines` with filtered=True applies `filter_span_array` to the spans
+before setting their bits, so its timelines add up to what the report and
+`stats` show. `DayTimeline.filtered` applies the same rules to timelines that
+are already bits, e.g. unions across machines, as morphological operations:
+closing fills the breaks shorter than `SHORT_BREAK`, opening drops the work no
+longer than `SHORT_WORK`. Unlike the spans, the bits are rounded to the minute
+first, so the two only agree on spans that are at least a few minutes long.
+"""
+
+from collections import defaultdict
+import datetime
+import os
+from typing import Dict, Iterable, List, Optional
+
+from time_tracker import (
+    ONE_MINUTE,
+    SHORT_BREAK,
+    ParseErrors,
+    SHORT_WORK,
+    Span,
+    get_corrections_filename,
+    get_source_log_filenames,
+    get_work_spans,
+    iter_main_log,
+    iter_text_log,
+)
+from time_tracker.arrays import (
+    US_PER_MINUTE,
+    SpanArray,
+    filter_span_array,
+    get_work_span_array,
+    load_event_array,
+    round_minute,
+)
+from time_tracker.binlog import EPOCH, to_epoch_us
+
+MINUTES_PER_DAY = 1440
+DAY_MASK = (1 << MINUTES_PER_DAY) - 1
+
+
+def minute_of_day(day: datetime.date, dt: datetime.datetime) -> int:
+    """The minute of dt after the start of day, rounded like `rounded_datetime`."""
+    start = to_epoch_us(datetime.datetime.combine(day, datetime.time()))
+    return round_minute(to_epoch_us(dt)) - start // US_PER_MINUTE
+
+
+def span_bits(start: int, end: int) -> int:
+    """The bits of the minutes from start to end, clipped to the day."""
+    start, end = max(start, 0), min(end, MINUTES_PER_DAY)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def close(bits: int, gap: int) -> int:
+    """Fill the gaps of up to gap minutes between set bits."""
+    dilated = bits
+    for i in range(1, gap + 1):
+        dilated |= bits << i
+    closed = dilated
+    for i in range(1, gap + 1):
+        closed &= dilated >> i
+    return closed & DAY_MASK
+
+
+def open_(bits: int, length: int) -> int:
+    """Drop the runs of up to length set bits."""
+    eroded = bits
+    for i in range(1, length + 1):
+        eroded &= bits >> i
+    opened = eroded
+    for i in range(1, length + 1):
+        opened |= eroded << i
+    return opened & DAY_MASK
+
+
+def runs(bits: int) -> Iterable[tuple[int, int]]:
+    """The (start, end) minutes of each run of set bits, in order."""
+    offset = 0
+    while bits:
+        # Skip the unset bits, then take the set ones.
+        skip = (bits & -bits).bit_length() - 1
+        bits >>= skip
+        offset += skip
+        length = (~bits & (bits + 1)).bit_length() - 1
+        yield offset, offset + length
+        bits >>= length
+        offset += length
+
+
+class DayTimeline:
+    """The minutes worked on a day, one bitset per project."""
+
+    def __init__(self, day: datetime.date, bits: Optional[Dict[str, int]] = None):
+        self.day = day
+        self.bits: Dict[str, int] = dict(bits) if bits else {}
+
+    @classmethod
+    def from_spans(cls, day: datetime.date, spans: Iterable[Span]) -> "DayTimeline":
+        bits: Dict[str, int] = defaultdict(int)
+        for s in spans:
+            bits[s.project] |= span_bits(
+                minute_of_day(day, s.start), minute_of_day(day, s.end)
+            )
+        return cls(day, {p: b for p, b in bits.items() if b})
+
+    def working(self) -> int:
+        """The minutes worked on any project."""
+        result = 0
+        for b in self.bits.values():
+            result |= b
+        return result
+
+    def minutes(self, project: Optional[str] = None) -> int:
+        if project is None:
+            return self.working().bit_count()
+        return self.bits.get(project, 0).bit_count()
+
+    def hours(self, project: Optional[str] = None) -> float:
+        return self.minutes(project) / 60
+
+    def filtered(self) -> "DayTimeline":
+        """Like `filter_spans`: without short breaks, and short work."""
+        gap = -(-SHORT_BREAK // ONE_MINUTE) - 1
+        length = SHORT_WORK // ONE_MINUTE
+        working = self.working()
+        bits = {}
+        for project, b in self.bits.items():
+            # Only fill breaks, not the work on other projects.
+            b = close(b, gap) & ~(working & ~b)
+            b = open_(b, length)
+            if b:
+                bits[project] = b
+        return DayTimeline(self.day, bits)
+
+    def spans(self) -> List[Span]:
+        """The runs of minutes of each project as spans, in order."""
+        midnight = datetime.datetime.combine(self.day, datetime.time())
+        spans = [
+            Span(midnight + start * ONE_MINUTE, midnight + end * ONE_MINUTE, project)
+            for project, b in self.bits.items()
+            for start, end in runs(b)
+        ]
+        return sorted(spans, key=lambda s: s.start)
+
+    def _combine(self, other: "DayTimeline", op) -> "DayTimeline":
+        bits = {}
+        for project in self.bits.keys() | other.bits.keys():
+            b = op(self.bits.get(project, 0), other.bits.get(project, 0))
+            if b:
+                bits[project] = b
+        return DayTimeline(self.day, bits)
+
+    def __or__(self, other: "DayTimeline") -> "DayTimeline":
+        return self._combine(other, int.__or__)
+
+    def __and__(self, other: "DayTimeline") -> "DayTimeline":
+        return self._combine(other, int.__and__)
+
+
+def timelines_from_span_array(spans: SpanArray) -> Dict[datetime.date, DayTimeline]:
+    """The timeline of each day of spans, without `Span` objects per span."""
+    names = spans.project_codes.names
+    days: Dict[int, Dict[int, int]] = {}
+    for start, end, project in zip(spans.starts, spans.ends, spans.projects):
+        first, last = round_minute(start), round_minute(end)
+        day_number = start // (MINUTES_PER_DAY * US_PER_MINUTE)
+        offset = day_number * MINUTES_PER_DAY
+        bits = days.setdefault(day_number, {})
+        bits[project] = bits.get(project, 0) | span_bits(first - offset, last - offset)
+    result = {}
+    for day_number, bits in sorted(days.items()):
+        day = EPOCH.date() + datetime.timedelta(days=day_number)
+        result[day] = DayTimeline(
+            day, {names[code]: b for code, b in bits.items() if b}
+        )
+    return result
+
+
+def load_timelines(
+    days: Iterable[datetime.date],
+    now: Optional[datetime.datetime] = None,
+    errors: Optional[ParseErrors] = None,
+    filtered: bool = False,
+) -> Dict[datetime.date, DayTimeline]:
+    """The timelines of the days with logs, raw or like `filter_spans`.
+
+    Invalid lines are skipped and recorded in errors, if given.
+    """
+    if errors is None:
+        errors = ParseErrors()
+    spans = get_work_span_array(load_event_array(days, errors), now)
+    if filtered:
+        spans = filter_span_array(spans)
+    return timelines_from_span_array(spans)
+
+
+def load_source_timelines(
+    day: datetime.date, now: Optional[datetime.datetime] = None
+) -> Dict[str, DayTimeline]:
+    """The raw timeline of each log of day: "" for the main log, and machines."""
+    if now is None:
+        now = datetime.datetime.now()
+    sources = {"": iter_main_log(day)}
+    for filename in get_source_log_filenames(day):
+        if filename != get_corrections_filename(day):
+            sources[os.path.basename(os.path.dirname(filename))] = iter_text_log(
+                filename
+            )
+    return {
+        name: DayTimeline.from_spans(day, get_work_spans(list(events), now))
+        for name, events in sources.items()
+    }
+
+
+def total_minutes(
+    timelines: Iterable[DayTimeline], project: Optional[str] = None
+) -> int:
+    """The minutes worked on the timelines, e.g. of many days."""
+    return sum(t.minutes(project) for t in timelines)
+
+
+def overlap_minutes(timelines: Iterable[DayTimeline]) -> int:
+    """The minutes of a day worked on more than one of its timelines."""
+    seen = 0
+    twice = 0
+    for t in timelines:
+        working = t.working()
+        twice |= seen & working
+        seen |= working
+    return twice.bit_count()
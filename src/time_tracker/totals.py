@@ -0,0 +1,173 @@
+"""Running totals per project, by day, week and month.
+
+Whoever logs an event calls `update_status`, which passes the spans closed so
+far on the day to `update_totals`. The minutes worked on the day per project
+are counted like everywhere else, with short breaks merged and rounded to the
+minute like `Span.rounded_duration`, and the difference to the day's stored
+counters is added to the counters of its week and month. Reading the totals
+of a week or a month is then a lookup in `LOG_DIR/totals.json`, whatever the
+number of days.
+
+Only closed spans count, so the open span of today is not included. If the
+counters drift from the logs, e.g. after editing the log of a past day,
+`time_tracker reconcile` rebuilds them.
+"""
+
+import datetime
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import time_tracker
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ONE_MINUTE,
+    ParseErrors,
+    Span,
+    SpanState,
+    filter_spans,
+    iter_day_log,
+    list_log_days,
+    write_json,
+)
+
+TOTALS_VERSION = 1
+PERIODS = ["day", "week", "month"]
+
+Minutes = Dict[str, int]
+
+
+def get_totals_filename() -> str:
+    return os.path.join(time_tracker.LOG_DIR, "totals.json")
+
+
+def period_key(day: datetime.date, by: str) -> str:
+    """The key of the period containing day: its day, Monday or month."""
+    if by == "day":
+        return day.isoformat()
+    if by == "week":
+        return (day - datetime.timedelta(days=day.weekday())).isoformat()
+    if by == "month":
+        return f"{day:%Y-%m}"
+    raise ValueError(f"Invalid period {by!r}")
+
+
+def count_minutes(spans: Iterable[Span]) -> Minutes:
+    """The rounded minutes worked per project."""
+    minutes: Minutes = {}
+    for s in filter_spans(spans):
+        minutes[s.project] = (
+            minutes.get(s.project, 0) + s.rounded_duration() // ONE_MINUTE
+        )
+    return minutes
+
+
+def closed_spans(day: datetime.date) -> List[Span]:
+    """The spans closed by the events of the day's log."""
+    state = SpanState()
+    spans = []
+    for e in iter_day_log(day, ParseErrors()):
+        span = state.feed(e)
+        if span is not None:
+            spans.append(span)
+    return spans
+
+
+class Totals:
+    def __init__(self) -> None:
+        self.counters: Dict[str, Dict[str, Minutes]] = {by: {} for by in PERIODS}
+
+    def get(self, day: datetime.date, by: str) -> Minutes:
+        """The minutes per project of the period containing day."""
+        return dict(self.counters[by].get(period_key(day, by), {}))
+
+    def set_day(self, day: datetime.date, minutes: Minutes) -> bool:
+        """Set the minutes of day, returning whether they changed."""
+        old = self.counters["day"].get(period_key(day, "day"), {})
+        if old == minutes:
+            return False
+        for by in PERIODS[1:]:
+            key = period_key(day, by)
+            counters = self.counters[by].setdefault(key, {})
+            for project in set(old) | set(minutes):
+                m = counters.get(project, 0) + minutes.get(project, 0)
+                m -= old.get(project, 0)
+                if m:
+                    counters[project] = m
+                else:
+                    counters.pop(project, None)
+            if not counters:
+                del self.counters[by][key]
+        if minutes:
+            self.counters["day"][period_key(day, "day")] = minutes
+        else:
+            self.counters["day"].pop(period_key(day, "day"), None)
+        return True
+
+    def save(self) -> None:
+        os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+        write_json(get_totals_filename(), {"version": TOTALS_VERSION, **self.counters})
+
+
+def load_totals() -> Totals:
+    totals = Totals()
+    try:
+        with open(get_totals_filename()) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return totals
+    if data.get("version") == TOTALS_VERSION:
+        totals.counters = {by: data.get(by, {}) for by in PERIODS}
+    return totals
+
+
+def update_totals(
+    day: Optional[datetime.date] = None, spans: Optional[List[Span]] = None
+) -> None:
+    """Count the spans closed on day, read from its log unless given."""
+    if day is None:
+        day = datetime.date.today()
+    if spans is None:
+        spans = closed_spans(day)
+    totals = load_totals()
+    if totals.set_day(day, count_minutes(spans)):
+        totals.save()
+
+
+def reconcile() -> Tuple[int, int]:
+    """Rebuild the counters from the logs.
+
+    Returns the number of days with logs, and of those whose counters were off.
+    """
+    old = load_totals()
+    totals = Totals()
+    days = list_log_days()
+    drifted = 0
+    for day in days:
+        minutes = count_minutes(closed_spans(day))
+        totals.set_day(day, minutes)
+        if old.get(day, "day") != minutes:
+            drifted += 1
+    # Days whose logs are gone.
+    known = {day.isoformat() for day in days}
+    drifted += sum(1 for key in old.counters["day"] if key not in known)
+    totals.save()
+    return len(days), drifted
+
+
+def _write_minutes(label: str, minutes: Minutes):
+    print()
+    print(f"{ANSI_BOLD}{label}:{ANSI_RESET}")
+    for project, m in sorted(minutes.items()):
+        print(f"{m / 60:7.2f} - {project}")
+    print(f"{ANSI_BOLD}{sum(minutes.values()) / 60:7.2f} - total{ANSI_RESET}")
+
+
+def write_totals(day: Optional[datetime.date] = None):
+    if day is None:
+        day = datetime.date.today()
+    totals = load_totals()
+    _write_minutes(f"{day:%d.%m.%Y}", totals.get(day, "day"))
+    _write_minutes(f"Week of {period_key(day, 'week')}", totals.get(day, "week"))
+    _write_minutes(f"{day:%B %Y}", totals.get(day, "month"))
@@ -0,0 +1,100 @@
+"""A live view of today in the terminal.
+
+`time_tracker watch` shows today's spans, the total and the messages, and
+keeps them current. It polls the modification time and size of the day's
+logs, waiting longer between polls, up to `POLL_MAX`, while nothing changes.
+Once a log changes, only the events appended to it are evaluated, through
+the incremental state of `time_tracker.tail`. Otherwise, the view is only
+redrawn each minute, for the open span.
+"""
+
+import datetime
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+import time_tracker
+from time_tracker import (
+    ANSI_BOLD,
+    ANSI_RESET,
+    ANSI_SHADES,
+    BARS,
+    DayResults,
+    get_binary_log_filename,
+    get_log_filename,
+    get_source_log_filenames,
+)
+from time_tracker.tail import load_today_results
+
+POLL_MIN = 0.1
+# Changes show up within this many seconds.
+POLL_MAX = 1.0
+ANSI_CLEAR = "\033[H\033[J"
+
+Signature = List[Tuple[str, int, int]]
+
+
+def stat_logs(day: datetime.date) -> Signature:
+    """The modification time and size of each of the day's logs."""
+    filenames = [get_log_filename(day), get_binary_log_filename(day)]
+    filenames += get_source_log_filenames(day)
+    if time_tracker.LOG_FORMAT == "sqlite":
+        from time_tracker.db import get_db_filename
+
+        # Changes go to the write-ahead log first.
+        filenames += [get_db_filename(), f"{get_db_filename()}-wal"]
+    signature = []
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        signature.append((filename, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def format_view(results: DayResults, now: datetime.datetime) -> List[str]:
+    lines = [
+        results.level.ansi_format(
+            f"{now:%d.%m.%Y %H:%M}: {results.total_hours:.2f} "
+            f"{BARS[min(int(results.total_hours), 8)]}"
+        ),
+        "",
+    ]
+    for i, s in enumerate(results.spans):
+        lines.append(f"{ANSI_SHADES[i % 2]}{s}{ANSI_RESET}")
+    if results.spans and results.spans[-1].end == now:
+        span = results.spans[-1]
+        project = f" on {span.project}" if span.project else ""
+        lines.append(
+            f"{ANSI_BOLD}Working{project} since {span.start:%H:%M}{ANSI_RESET}"
+        )
+    for message in results.messages:
+        lines.append(message.level.ansi_format(message.text))
+    return lines
+
+
+def watch(
+    clock: Callable[[], datetime.datetime] = datetime.datetime.now,
+    sleep: Callable[[float], None] = time.sleep,
+    polls: Optional[int] = None,
+):
+    """Redraw the view on changes, for polls polls or until interrupted."""
+    signature: Optional[Signature] = None
+    shown: Optional[datetime.datetime] = None
+    interval = POLL_MIN
+    while polls is None or polls > 0:
+        now = clock()
+        current = stat_logs(now.date())
+        minute = now.replace(second=0, microsecond=0)
+        if current != signature:
+            interval = POLL_MIN
+        else:
+            interval = min(interval * 2, POLL_MAX)
+        if current != signature or minute != shown:
+            signature, shown = current, minute
+            results = load_today_results(now)
+            print(ANSI_CLEAR + "\n".join(format_view(results, now)), flush=True)
+        sleep(interval)
+        if polls is not None:
+            polls -= 1
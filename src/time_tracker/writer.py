@@ -0,0 +1,122 @@
+"""Background event writer for the agent.
+
+Notifications arrive on the Cocoa run loop, which should never wait for the
+disk. `EventWriter.log` only timestamps the event and puts it on a queue; a
+background thread appends it to the log, keeping the day's log file open
+between events, and then updates the status snapshot. With a team client, it
+also sends the event to the team server, and every `FLUSH_INTERVAL` it sends
+what the project commands have spooled.
+
+A single wake or unlock fires several notifications within a fraction of a
+second. Events with the same activity as the last written one, arriving
+within `COALESCE_WINDOW` of it, change nothing and are dropped.
+"""
+
+import datetime
+import os
+import queue
+import sys
+import threading
+from typing import Optional, TextIO
+
+import time_tracker
+from time_tracker import Activity, Event, get_log_filename, log_event, print_event
+from time_tracker.spool import TeamClient
+from time_tracker.status import update_status
+
+COALESCE_WINDOW = datetime.timedelta(seconds=2)
+FLUSH_INTERVAL = 60.0
+
+
+class EventWriter:
+    def __init__(
+        self,
+        window: datetime.timedelta = COALESCE_WINDOW,
+        team: Optional[TeamClient] = None,
+    ):
+        self.window = window
+        self.team = team
+        self.queue: queue.Queue[Optional[Event]] = queue.Queue()
+        self.thread = threading.Thread(
+            target=self._run, name="EventWriter", daemon=True
+        )
+        self.last: Optional[Event] = None
+        self.log_file: Optional[TextIO] = None
+        self.log_day: Optional[datetime.date] = None
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def log(
+        self,
+        name: str,
+        activity: Activity,
+        project: str = "",
+        now: Optional[datetime.datetime] = None,
+    ) -> None:
+        """Queue an event; like `log_event`, but returns immediately."""
+        if not now:
+            now = datetime.datetime.now()
+        self.queue.put(Event(now, name, activity, project))
+
+    def close(self) -> None:
+        """Write all queued events, then stop."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def is_redundant(self, event: Event) -> bool:
+        last = self.last
+        return (
+            last is not None
+            and not event.project
+            and event.activity is last.activity
+            and event.timestamp.date() == last.timestamp.date()
+            and event.timestamp - last.timestamp < self.window
+        )
+
+    def _open_log(self, day: datetime.date) -> TextIO:
+        log = self.log_file
+        if log is not None and (
+            day != self.log_day or os.fstat(log.fileno()).st_nlink == 0
+        ):
+            # A new day, or the log was removed under us.
+            log.close()
+            log = None
+        if log is None:
+            os.makedirs(time_tracker.LOG_DIR, exist_ok=True)
+            log = self.log_file = open(get_log_filename(day), mode="a")
+            self.log_day = day
+        return log
+
+    def write(self, event: Event) -> None:
+        if self.is_redundant(event):
+            return
+        if time_tracker.LOG_FORMAT == "text":
+            log = self._open_log(event.timestamp.date())
+            print_event(event, log)
+            log.flush()
+        else:
+            log_event(event.name, event.activity, event.project, event.timestamp)
+        self.last = event
+        update_status(event.timestamp.date())
+        if self.team is not None:
+            self.team.send(event)
+
+    def _next_event(self) -> Optional[Event]:
+        while True:
+            if self.team is None:
+                return self.queue.get()
+            try:
+                return self.queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                self.team.flush()
+
+    def _run(self) -> None:
+        while (event := self._next_event()) is not None:
+            try:
+                self.write(event)
+            except Exception as e:
+                print(f"Failed to log {event}: {e}", file=sys.stderr)
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
@@ -0,0 +1,132 @@
+import contextlib
+import datetime
+import io
+import os
+import random
+import unittest
+from unittest import mock
+import zipfile
+
+from time_tracker import (
+    Activity,
+    get_archive_filename,
+    get_log_filename,
+    list_log_days,
+    load_log,
+    log_event,
+    run_command,
+)
+from time_tracker.archive import archived_days, compact
+from time_tracker.arrays import load_event_array
+from time_tracker.binlog import convert_logs
+from time_tracker.cache import load_day_results
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2025, 1, 20)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(50)]
+TODAY = datetime.date(2025, 3, 10)
+
+
+def write_logs(days, seed=0):
+    rnd = random.Random(seed)
+    for day in days:
+        t = datetime.datetime.combine(day, datetime.time(8))
+        for _ in range(rnd.randrange(1, 5)):
+            project = rnd.choice(["A", "B", ""])
+            log_event("on", Activity.WORKING, project, t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 7200))
+            log_event("off", Activity.IDLE, "", t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 3600))
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def loose_logs(self):
+        return sorted(n for n in os.listdir(self.tmp.name) if n.endswith(".log"))
+
+    def test_compact_closed_months(self):
+        write_logs(DAYS)
+        expected = {day: load_log(day) for day in DAYS}
+        self.assertEqual(compact(TODAY), (40, 2))
+        self.assertEqual(self.loose_logs(), [f"{d}.log" for d in DAYS[40:]])
+        with zipfile.ZipFile(get_archive_filename(DAYS[0])) as archive:
+            self.assertEqual(archive.namelist(), [f"{d}.log" for d in DAYS[:12]])
+        for day in DAYS:
+            with self.subTest(day=day):
+                self.assertEqual(load_log(day), expected[day])
+        self.assertEqual(list_log_days(), DAYS)
+        self.assertEqual(archived_days(), DAYS[:40])
+        events = load_event_array(DAYS)
+        self.assertEqual(list(events), [e for d in DAYS for e in expected[d]])
+
+    def test_nothing_to_compact(self):
+        write_logs(DAYS[-5:])
+        self.assertEqual(compact(TODAY), (0, 0))
+        self.assertEqual(len(self.loose_logs()), 5)
+        self.assertEqual(load_log(datetime.date(2024, 1, 1)), [])
+
+    def test_no_log_dir(self):
+        missing = os.path.join(self.tmp.name, "missing")
+        with mock.patch("time_tracker.LOG_DIR", missing):
+            self.assertEqual(compact(TODAY), (0, 0))
+        self.assertFalse(os.path.exists(missing))
+
+    def test_binary_logs(self):
+        write_logs(DAYS)
+        expected = {day: load_log(day) for day in DAYS}
+        convert_logs("binary", TODAY)
+        for day in DAYS[:-1]:
+            os.remove(get_log_filename(day))
+        compact(TODAY)
+        for day in DAYS:
+            with self.subTest(day=day):
+                self.assertEqual(load_log(day), expected[day])
+
+    def test_late_logs_are_merged(self):
+        write_logs(DAYS[:5])
+        compact(TODAY)
+        write_logs(DAYS[5:6], seed=1)
+        expected = load_log(DAYS[5])
+        self.assertEqual(compact(TODAY), (1, 1))
+        self.assertEqual(self.loose_logs(), [])
+        self.assertEqual(load_log(DAYS[5]), expected)
+        self.assertEqual(archived_days(), DAYS[:6])
+
+    def test_failed_archive_keeps_logs(self):
+        write_logs(DAYS[:5])
+        with (
+            mock.patch("time_tracker.archive.os.replace", side_effect=OSError),
+            self.assertRaises(OSError),
+        ):
+            compact(TODAY)
+        self.assertEqual(len(self.loose_logs()), 5)
+        self.assertFalse(os.path.exists(get_archive_filename(DAYS[0])))
+
+    def test_verification_failure_keeps_logs(self):
+        write_logs(DAYS[:5])
+        with (
+            mock.patch("zipfile.ZipFile.read", return_value=b"garbage"),
+            self.assertRaises(ValueError),
+        ):
+            compact(TODAY)
+        self.assertEqual(len(self.loose_logs()), 5)
+        self.assertEqual(os.listdir(os.path.dirname(get_archive_filename(DAYS[0]))), [])
+
+    def test_cache(self):
+        write_logs(DAYS[:5])
+        expected = load_day_results(DAYS[0], TODAY)
+        compact(TODAY)
+        self.assertFalse(os.path.exists(get_log_filename(DAYS[0])))
+        results = load_day_results(DAYS[0], TODAY)
+        self.assertEqual(results.spans, expected.spans)
+        self.assertEqual(results.total_hours, expected.total_hours)
+
+    def test_compact_command(self):
+        write_logs(DAYS)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["compact"])
+        self.assertEqual(out.getvalue(), "Archived 50 logs into 3 archives\n")
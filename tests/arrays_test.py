@@ -0,0 +1,196 @@
+import contextlib
+import datetime
+import io
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    DayResults,
+    ParseErrors,
+    filter_short_breaks,
+    filter_short_work,
+    filter_spans,
+    get_cumulative_work,
+    get_work_spans,
+    load_log,
+    log_event,
+    run_command,
+)
+from time_tracker.arrays import (
+    EventArray,
+    SpanArray,
+    filter_span_array,
+    get_work_span_array,
+    load_event_array,
+)
+from time_tracker.binlog import convert_logs, from_epoch_us
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2025, 1, 20)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(10)]
+NOW = datetime.datetime(2025, 1, 29, 15, 0)
+
+
+def write_random_logs(seed: int):
+    rnd = random.Random(seed)
+    for day in DAYS:
+        if rnd.random() < 0.2:
+            continue
+        t = datetime.datetime.combine(day, datetime.time(7, 0))
+        while t.hour < 20:
+            t += datetime.timedelta(seconds=rnd.randrange(1, 3600))
+            activity = rnd.choice(list(Activity))
+            project = rnd.choice(["", "", "A", "B"])
+            if t.microsecond == 0 and rnd.random() < 0.5:
+                t += datetime.timedelta(microseconds=rnd.randrange(1, 1000000))
+            log_event(f"event{activity.value}", activity, project, t)
+
+
+class TestArrays(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def reference_spans(self, filtered: bool):
+        spans = []
+        for day in DAYS:
+            day_spans = get_work_spans(load_log(day), NOW)
+            spans += filter_spans(day_spans) if filtered else list(day_spans)
+        return spans
+
+    def test_empty(self):
+        events = load_event_array(DAYS)
+        self.assertEqual(len(events), 0)
+        self.assertEqual(list(filter_span_array(get_work_span_array(events))), [])
+
+    def test_events(self):
+        write_random_logs(1)
+        events = load_event_array(DAYS)
+        expected = [e for day in DAYS for e in load_log(day)]
+        self.assertEqual(len(events), len(expected))
+        self.assertEqual(
+            [from_epoch_us(t) for t in events.timestamps],
+            [e.timestamp for e in expected],
+        )
+        self.assertEqual(list(events.activities), [e.activity.value for e in expected])
+        names = events.project_codes.names
+        self.assertEqual(
+            [names[p] for p in events.projects], [e.project for e in expected]
+        )
+        self.assertEqual(events.days, [d for d in DAYS if load_log(d)])
+        self.assertEqual(list(events), expected)
+        self.assertEqual(events[-1], expected[-1])
+
+    def test_binary_events(self):
+        write_random_logs(1)
+        expected = [e for day in DAYS for e in load_log(day)]
+        convert_logs("binary", NOW.date())
+        self.assertEqual(list(load_event_array(DAYS)), expected)
+
+    def test_from_events(self):
+        write_random_logs(4)
+        expected = [e for day in DAYS for e in load_log(day)]
+        events = EventArray.from_events(expected)
+        self.assertEqual(list(events), expected)
+        self.assertEqual(events.days, load_event_array(DAYS).days)
+        self.assertEqual(len(events.name_codes.names), 3)
+
+    def test_reference_functions_accept_arrays(self):
+        write_random_logs(5)
+        for day in DAYS:
+            events = load_log(day)
+            array_events = EventArray.from_events(events)
+            with self.subTest(day=day):
+                spans = list(get_work_spans(events, NOW))
+                array_spans = get_work_spans(array_events, NOW)
+                self.assertIsInstance(array_spans, SpanArray)
+                self.assertEqual(list(array_spans), spans)
+                self.assertEqual(
+                    list(filter_short_breaks(array_spans)),
+                    list(filter_short_breaks(spans)),
+                )
+                self.assertEqual(
+                    list(filter_short_work(array_spans)),
+                    list(filter_short_work(spans)),
+                )
+                filtered = filter_spans(array_spans)
+                self.assertEqual(list(filtered), filter_spans(spans))
+                self.assertAlmostEqual(
+                    get_cumulative_work(filtered),
+                    get_cumulative_work(filter_spans(spans)),
+                )
+                self.assertEqual(list(SpanArray.from_spans(spans)), list(array_spans))
+                if events:
+                    results = DayResults(array_events)
+                    expected = DayResults(events)
+                    self.assertEqual(list(results.spans), expected.spans)
+                    self.assertEqual(results.messages, expected.messages)
+
+    def test_spans_match_reference(self):
+        for seed in range(5):
+            with (
+                self.subTest(seed=seed),
+                tempfile.TemporaryDirectory() as tmp,
+                mock.patch("time_tracker.LOG_DIR", tmp),
+            ):
+                write_random_logs(seed)
+                spans = get_work_span_array(load_event_array(DAYS), NOW)
+                self.assertEqual(list(spans), self.reference_spans(False))
+                filtered = filter_span_array(spans)
+                self.assertEqual(list(filtered), self.reference_spans(True))
+
+    def test_binary_logs(self):
+        write_random_logs(2)
+        expected = self.reference_spans(True)
+        convert_logs("binary", NOW.date())
+        spans = filter_span_array(get_work_span_array(load_event_array(DAYS), NOW))
+        self.assertEqual(list(spans), expected)
+
+    def test_rounded_minutes(self):
+        write_random_logs(3)
+        spans = filter_span_array(get_work_span_array(load_event_array(DAYS), NOW))
+        self.assertEqual(
+            list(spans.rounded_minutes()),
+            [s.rounded_duration() // datetime.timedelta(minutes=1) for s in spans],
+        )
+
+    def test_invalid_line(self):
+        log_event("a", Activity.WORKING, "", datetime.datetime(2025, 1, 20, 9, 0))
+        with open(f"{self.tmp.name}/2025-01-20.log", "a") as log:
+            log.write("2025-01-20 10:00:00\tb\tBUSY\n")
+        with self.assertRaises(ValueError):
+            load_event_array(DAYS)
+
+    def write_truncated_line(self):
+        log_event("a", Activity.WORKING, "P", datetime.datetime(2025, 1, 20, 9, 0))
+        with open(f"{self.tmp.name}/2025-01-20.log", "a") as log:
+            log.write("2025-01-20 11:3\n")
+        log_event("b", Activity.IDLE, "", datetime.datetime(2025, 1, 20, 10, 0))
+
+    def test_invalid_line_is_skipped(self):
+        self.write_truncated_line()
+        errors = ParseErrors()
+        events = load_event_array(DAYS, errors)
+        self.assertEqual([e.name for e in events], ["a", "b"])
+        self.assertEqual(errors.count, 1)
+        self.assertEqual(errors.lines, [(2, "2025-01-20 11:3")])
+
+    def test_commands_skip_invalid_lines(self):
+        self.write_truncated_line()
+        for argv in [
+            ["stats"],
+            ["query", "--rebuild"],
+            ["heatmap", "--from", "2025-01-20", "--to", "2025-01-20"],
+        ]:
+            with self.subTest(argv=argv):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    run_command(argv)
+                self.assertIn("1.00", out.getvalue())
+                self.assertIn(
+                    "Skipped 1 invalid log lines, the first '2025-01-20 11:3'",
+                    out.getvalue(),
+                )
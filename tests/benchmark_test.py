@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+from generate import generate_logs  # noqa: E402
+import run  # noqa: E402
+import team_load  # noqa: E402
+
+from time_tracker import load_log  # noqa: E402
+
+from log_dir import temp_log_dir  # noqa: E402
+
+TODAY = datetime.date(2025, 1, 29)
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def test_generate(self):
+        generate_logs(self.tmp.name, 14, 40, today=TODAY)
+        days = sorted(
+            name for name in os.listdir(self.tmp.name) if name.endswith(".log")
+        )
+        # The weekdays of the two weeks up to Wednesday, TODAY.
+        self.assertEqual(len(days), 10)
+        for day in days:
+            events = load_log(datetime.date.fromisoformat(day[:10]))
+            self.assertGreater(len(events), 10)
+            self.assertEqual(events[0].activity.name, "WORKING")
+            self.assertEqual(events[-1].activity.name, "IDLE")
+
+    def test_generate_is_deterministic(self):
+        generate_logs(os.path.join(self.tmp.name, "a"), 5, 40, seed=3, today=TODAY)
+        generate_logs(os.path.join(self.tmp.name, "b"), 5, 40, seed=3, today=TODAY)
+        for name in os.listdir(os.path.join(self.tmp.name, "a")):
+            with (
+                open(os.path.join(self.tmp.name, "a", name)) as a,
+                open(os.path.join(self.tmp.name, "b", name)) as b,
+            ):
+                self.assertEqual(a.read(), b.read())
+
+    def test_run(self):
+        with mock.patch.dict(run.SIZES, {"tiny": (3, 10)}):
+            report = run.run(["tiny"], 1)
+        results = json.loads(json.dumps(report))["sizes"]["tiny"]["results"]
+        self.assertIn("write_report", results)
+        self.assertGreaterEqual(results["parse_log"]["median_s"], 0.0)
+        self.assertGreater(results["arrays_speedup"], 0.0)
+
+    def test_team_load(self):
+        result = asyncio.run(team_load.load_test(5, 3, 4, 2))
+        self.assertEqual(result["events"], 60)
+        self.assertGreater(result["total_hours"], 0.0)
+        self.assertGreaterEqual(result["queries"]["p99_ms"], 0.0)
@@ -0,0 +1,119 @@
+import datetime
+import os
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    Event,
+    get_binary_log_filename,
+    get_log_filename,
+    load_log,
+    log_event,
+)
+from time_tracker.binlog import (
+    RECORD,
+    StringTable,
+    convert_logs,
+    decode_events,
+    encode_events,
+    from_epoch_us,
+    to_epoch_us,
+)
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+TODAY = datetime.date(2025, 2, 3)
+
+EVENTS = [
+    Event(
+        datetime.datetime(2025, 1, 27, 9, 0, 12, 345678),
+        "com.apple.screenIsUnlocked",
+        Activity.WORKING,
+    ),
+    Event(datetime.datetime(2025, 1, 27, 9, 5), "project", Activity.WORKING, "P"),
+    Event(
+        datetime.datetime(2025, 1, 27, 12, 30, 1),
+        "com.apple.screenIsLocked",
+        Activity.IDLE,
+    ),
+]
+
+
+class TestBinaryLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def log_events(self, log_format: str):
+        with mock.patch("time_tracker.LOG_FORMAT", log_format):
+            for e in EVENTS:
+                log_event(e.name, e.activity, e.project, e.timestamp)
+
+    def test_epoch(self):
+        dt = datetime.datetime(2025, 1, 27, 9, 0, 12, 345678)
+        self.assertEqual(from_epoch_us(to_epoch_us(dt)), dt)
+
+    def test_round_trip(self):
+        table = StringTable()
+        data = encode_events(EVENTS, table)
+        self.assertEqual(len(data), RECORD.size * len(EVENTS))
+        self.assertEqual(decode_events(data, StringTable()), EVENTS)
+
+    def test_partial_record_is_ignored(self):
+        data = encode_events(EVENTS, StringTable())
+        self.assertEqual(decode_events(data[:-1], StringTable()), EVENTS[:-1])
+
+    def test_strings_are_interned(self):
+        encode_events(EVENTS + EVENTS, StringTable())
+        table = StringTable()
+        self.assertEqual(len(table.strings), 5)
+        self.assertEqual(table.intern("P"), table.ids["P"])
+
+    def test_binary_only(self):
+        self.log_events("binary")
+        self.assertFalse(os.path.exists(get_log_filename(DAY)))
+        self.assertEqual(load_log(DAY), EVENTS)
+
+    def test_both(self):
+        self.log_events("both")
+        with open(get_log_filename(DAY)) as log:
+            self.assertEqual(len(log.readlines()), len(EVENTS))
+        with open(get_binary_log_filename(DAY), "rb") as log:
+            self.assertEqual(len(log.read()), RECORD.size * len(EVENTS))
+        self.assertEqual(load_log(DAY), EVENTS)
+
+    def test_both_after_text(self):
+        with mock.patch("time_tracker.LOG_FORMAT", "text"):
+            log_event(EVENTS[0].name, EVENTS[0].activity, "", EVENTS[0].timestamp)
+        with mock.patch("time_tracker.LOG_FORMAT", "both"):
+            for e in EVENTS[1:]:
+                log_event(e.name, e.activity, e.project, e.timestamp)
+        self.assertEqual(load_log(DAY), EVENTS)
+
+    def test_convert(self):
+        self.log_events("text")
+        with open(get_log_filename(DAY)) as log:
+            text = log.read()
+        self.assertEqual(convert_logs("binary", TODAY), 1)
+        self.assertEqual(convert_logs("binary", TODAY), 0)
+        os.remove(get_log_filename(DAY))
+        self.assertEqual(load_log(DAY), EVENTS)
+
+        self.assertEqual(convert_logs("text", TODAY), 1)
+        with open(get_log_filename(DAY)) as log:
+            self.assertEqual(log.read(), text)
+
+    def test_convert_skips_today(self):
+        self.log_events("text")
+        self.assertEqual(convert_logs("binary", DAY), 0)
+
+    def test_convert_without_log_dir(self):
+        missing = os.path.join(self.tmp.name, "missing")
+        with mock.patch("time_tracker.LOG_DIR", missing):
+            self.assertEqual(convert_logs("binary", TODAY), 0)
+        self.assertFalse(os.path.exists(missing))
+
+    def test_convert_unknown_format(self):
+        with self.assertRaises(ValueError):
+            convert_logs("xml", TODAY)
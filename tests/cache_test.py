@@ -0,0 +1,68 @@
+import datetime
+import os
+import time
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, Level, Span, get_log_filename, log_event
+from time_tracker.cache import evict_cache, get_cache_filename, load_day_results
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+TODAY = datetime.date(2025, 2, 3)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        log_event("a", Activity.WORKING, "P", datetime.datetime(2025, 1, 27, 9, 0))
+        log_event("b", Activity.IDLE, "", datetime.datetime(2025, 1, 27, 10, 30))
+
+    def test_missing_day(self):
+        results = load_day_results(DAY + datetime.timedelta(days=1), TODAY)
+        self.assertEqual(results.messages[0].text, "No log file")
+
+    def test_entry_is_written_and_reused(self):
+        results = load_day_results(DAY, TODAY)
+        self.assertTrue(os.path.exists(get_cache_filename(DAY)))
+        with mock.patch("time_tracker.cache.evaluate_day") as evaluate_day:
+            cached = load_day_results(DAY, TODAY)
+            evaluate_day.assert_not_called()
+        self.assertEqual(cached.spans, results.spans)
+        self.assertEqual(
+            cached.spans,
+            [
+                Span(
+                    datetime.datetime(2025, 1, 27, 9, 0),
+                    datetime.datetime(2025, 1, 27, 10, 30),
+                    "P",
+                )
+            ],
+        )
+        self.assertEqual(cached.total_hours, 1.5)
+        self.assertEqual(cached.messages, results.messages)
+        self.assertEqual(cached.level, Level.INFO)
+
+    def test_entry_is_invalidated_by_change(self):
+        load_day_results(DAY, TODAY)
+        log_event("c", Activity.WORKING, "", datetime.datetime(2025, 1, 27, 11, 0))
+        results = load_day_results(DAY, TODAY)
+        self.assertEqual(results.level, Level.ERROR)
+        self.assertEqual(
+            results.messages[0].text, "Started work at 11:00 without corresponding end!"
+        )
+
+    def test_today_is_not_cached(self):
+        load_day_results(DAY, DAY)
+        self.assertFalse(os.path.exists(get_cache_filename(DAY)))
+
+    def test_evict(self):
+        load_day_results(DAY, TODAY)
+        filename = get_cache_filename(DAY)
+        self.assertEqual(evict_cache(), 0)
+        old = time.time() - datetime.timedelta(days=100).total_seconds()
+        os.utime(filename, (old, old))
+        self.assertEqual(evict_cache(), 1)
+        self.assertFalse(os.path.exists(filename))
+        self.assertTrue(os.path.exists(get_log_filename(DAY)))
@@ -1,7 +1,18 @@
 import datetime
 import unittest
 
-from time_tracker import Activity, DayResults, Event, Level
+from time_tracker import (
+    Activity,
+    DayResults,
+    Event,
+    Level,
+    evaluate_day,
+    get_log_filename,
+    load_log,
+    log_event,
+)
+
+from log_dir import temp_log_dir
 
 
 class TestDayResults(unittest.TestCase):
@@ -65,3 +76,42 @@ class TestDayResults(unittest.TestCase):
         ]
         d = DayResults(events)
         self.assertEqual(d.total_hours, 0.5)
+
+
+class TestEvaluateDay(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        self.day = datetime.date(2025, 1, 27)
+        self.now = datetime.datetime(2025, 1, 28, 12, 0)
+
+    def at(self, hour: int, minute: int) -> datetime.datetime:
+        return datetime.datetime.combine(self.day, datetime.time(hour, minute))
+
+    def test_missing_log(self):
+        d = evaluate_day(self.day, self.now)
+        self.assertEqual(d.messages[0].text, "No log file")
+
+    def test_same_as_day_results(self):
+        log_event("a", Activity.WORKING, "P", self.at(9, 0))
+        log_event("b", Activity.IDLE, "", self.at(10, 30))
+        log_event("c", Activity.WORKING, "", self.at(11, 0))
+        expected = DayResults(load_log(self.day))
+        d = evaluate_day(self.day, self.now)
+        self.assertEqual(d.spans, expected.spans)
+        self.assertEqual(d.total_hours, expected.total_hours)
+        self.assertEqual(d.messages, expected.messages)
+        self.assertEqual(d.level, Level.ERROR)
+
+    def test_invalid_lines_are_skipped(self):
+        log_event("a", Activity.WORKING, "P", self.at(9, 0))
+        with open(get_log_filename(self.day), "a") as log:
+            log.write("garbage\n")
+        log_event("b", Activity.IDLE, "", self.at(10, 30))
+        with open(get_log_filename(self.day), "a") as log:
+            log.write("2025-01-27 10:4")
+        d = evaluate_day(self.day, self.now)
+        self.assertEqual(d.total_hours, 1.5)
+        self.assertEqual(d.level, Level.WARNING)
+        self.assertEqual(
+            d.messages[-1].text, "Skipped 2 invalid log lines, the first in line 2"
+        )
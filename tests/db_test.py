@@ -0,0 +1,187 @@
+import contextlib
+import datetime
+import io
+import os
+import threading
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    Event,
+    Span,
+    SpanState,
+    evaluate_day,
+    get_log_filename,
+    list_log_days,
+    load_log,
+    log_event,
+    run_command,
+)
+from time_tracker.arrays import load_event_array
+from time_tracker.cache import load_day_results
+from time_tracker.db import (
+    append_event,
+    connect,
+    day_results,
+    get_db_filename,
+    import_logs,
+    iter_events,
+    query_spans,
+)
+
+from log_dir import temp_log_dir
+
+DAYS = [datetime.date(2025, 1, 27), datetime.date(2025, 1, 28)]
+
+
+def day_events(day: datetime.date):
+    def at(hour, minute):
+        return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+    return [
+        Event(at(8, 58), "unlock", Activity.WORKING),
+        Event(at(9, 5), "project", Activity.WORKING, "P"),
+        Event(at(10, 30), "lock", Activity.IDLE),
+        Event(at(10, 35), "unlock", Activity.WORKING),
+        Event(at(12, 0), "lock", Activity.IDLE),
+        Event(at(13, 0), "project", Activity.WORKING, "Q"),
+        Event(at(14, 15), "project", Activity.WORKING, "P"),
+        Event(at(16, 0), "lock", Activity.IDLE),
+        Event(at(16, 30), "unlock", Activity.WORKING),
+    ]
+
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def log_events(self, log_format: str):
+        with mock.patch("time_tracker.LOG_FORMAT", log_format):
+            for day in DAYS:
+                for e in day_events(day):
+                    log_event(e.name, e.activity, e.project, e.timestamp)
+
+    def test_log_event(self):
+        self.log_events("sqlite")
+        self.assertFalse(os.path.exists(get_log_filename(DAYS[0])))
+        with mock.patch("time_tracker.LOG_FORMAT", "sqlite"):
+            self.assertEqual(list_log_days(), DAYS)
+            for day in DAYS:
+                self.assertEqual(load_log(day), day_events(day))
+
+    def test_project_indexes(self):
+        self.log_events("sqlite")
+        db = connect()
+        self.addCleanup(db.close)
+        for query, index in [
+            (
+                "SELECT start, end FROM spans WHERE project = ? AND start >= ?",
+                "spans_project_start",
+            ),
+            (
+                "SELECT timestamp FROM events WHERE project = ? AND timestamp >= ?",
+                "events_project_timestamp",
+            ),
+        ]:
+            plan = db.execute(f"EXPLAIN QUERY PLAN {query}", ("A", 0)).fetchall()
+            self.assertIn(index, str(plan))
+
+    def test_same_results_as_logs(self):
+        self.log_events("text")
+        self.log_events("sqlite")
+        now = datetime.datetime(2025, 1, 28, 17, 0)
+        for day in DAYS:
+            expected = evaluate_day(day, now)
+            results = day_results(day, now)
+            self.assertEqual(results.spans, expected.spans)
+            self.assertEqual(results.total_hours, expected.total_hours)
+            self.assertEqual(results.messages, expected.messages)
+        # The last day is still open.
+        self.assertEqual(results.spans[-1].end, now)
+
+    def test_cache_reads_the_database(self):
+        self.log_events("sqlite")
+        with mock.patch("time_tracker.LOG_FORMAT", "sqlite"):
+            results = load_day_results(DAYS[0], DAYS[1])
+        self.assertEqual(results.total_hours, 5.95)
+        self.assertEqual(day_results(DAYS[1] + datetime.timedelta(days=1)).spans, [])
+
+    def test_import(self):
+        self.log_events("text")
+        self.assertEqual(import_logs(), 2)
+        self.assertEqual(import_logs(), 0)
+        with mock.patch("time_tracker.LOG_FORMAT", "sqlite"):
+            for day in DAYS:
+                self.assertEqual(load_log(day), day_events(day))
+            events = load_event_array(DAYS)
+        self.assertEqual(events.days, DAYS)
+        self.assertEqual(list(events), day_events(DAYS[0]) + day_events(DAYS[1]))
+        self.assertTrue(os.path.exists(get_db_filename()))
+
+    def test_query_spans(self):
+        self.log_events("sqlite")
+        now = datetime.datetime(2025, 1, 28, 17, 0)
+        spans = query_spans(DAYS[1], DAYS[1], now)
+        self.assertEqual(
+            [s for s in spans if s.project == "Q"],
+            [
+                Span(
+                    datetime.datetime(2025, 1, 28, 13, 0),
+                    datetime.datetime(2025, 1, 28, 14, 15),
+                    "Q",
+                )
+            ],
+        )
+        # With the span still open at now.
+        self.assertEqual(spans[-1].end, now)
+        self.assertEqual(len(query_spans(DAYS[0], DAYS[1], now)), 11)
+        self.assertEqual(len(query_spans(DAYS[0], DAYS[0], now)), 5)
+
+    def test_commands_read_spans(self):
+        self.log_events("text")
+        self.log_events("sqlite")
+        for argv in [["stats", "--by", "week"], ["query"], ["query", "-p", "P"]]:
+            with self.subTest(argv=argv):
+                expected = io.StringIO()
+                with contextlib.redirect_stdout(expected):
+                    run_command(argv)
+                out = io.StringIO()
+                with (
+                    mock.patch("time_tracker.LOG_FORMAT", "sqlite"),
+                    mock.patch("time_tracker.rollup.load_event_array") as rollup,
+                    mock.patch("time_tracker.index.load_event_array") as index,
+                    contextlib.redirect_stdout(out),
+                ):
+                    run_command(argv)
+                    rollup.assert_not_called()
+                    index.assert_not_called()
+                self.assertEqual(out.getvalue(), expected.getvalue())
+
+    def test_concurrent_writers(self):
+        def log(thread: int):
+            for i in range(20):
+                t = datetime.datetime(2025, 1, 27, 9, 0, i, thread)
+                activity = Activity.WORKING if i % 3 else Activity.IDLE
+                append_event(Event(t, f"e{thread}", activity, f"P{thread}"))
+
+        with mock.patch("time_tracker.LOG_FORMAT", "sqlite"):
+            threads = [threading.Thread(target=log, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # The stored spans and state are those of the events as logged.
+            state = SpanState()
+            spans = []
+            for e in iter_events(DAYS[0]):
+                span = state.feed(e)
+                if span is not None:
+                    spans.append(span)
+            self.assertEqual(len(load_log(DAYS[0])), 80)
+        now = datetime.datetime(2025, 1, 27, 10, 0)
+        open_span = state.open_span(now)
+        self.assertEqual(
+            query_spans(DAYS[0], DAYS[0], now),
+            sorted(spans, key=lambda s: s.start) + ([open_span] if open_span else []),
+        )
@@ -0,0 +1,76 @@
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, log_event, run_command
+from time_tracker.export import export
+
+from log_dir import temp_log_dir
+
+DAYS = [datetime.date(2025, 1, 27), datetime.date(2025, 1, 28)]
+
+
+def at(day: datetime.date, hour: int, minute: int) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        for day in DAYS:
+            log_event("a", Activity.WORKING, "P", at(day, 9, 0))
+            log_event("b", Activity.IDLE, "", at(day, 10, 30))
+            log_event("c", Activity.WORKING, "Q, R", at(day, 11, 0))
+            log_event("d", Activity.IDLE, "", at(day, 12, 15))
+
+    def export(self, *args) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["export", *args])
+        return out.getvalue()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            rows[1],
+            {
+                "day": "2025-01-27",
+                "start": "2025-01-27T11:00:00",
+                "end": "2025-01-27T12:15:00",
+                "project": "Q, R",
+                "hours": "1.25",
+            },
+        )
+
+    def test_jsonl_range(self):
+        lines = self.export("--format", "jsonl", "--from", "2025-01-28").splitlines()
+        self.assertEqual(
+            [json.loads(line)["start"] for line in lines],
+            ["2025-01-28T09:00:00", "2025-01-28T11:00:00"],
+        )
+
+    def test_days(self):
+        lines = self.export("--format", "jsonl", "--days", "--to", "2025-01-27")
+        self.assertEqual(
+            json.loads(lines),
+            {
+                "day": "2025-01-27",
+                "total_hours": 2.75,
+                "level": "INFO",
+                "messages": [],
+            },
+        )
+
+    def test_file_in_chunks(self):
+        filename = os.path.join(self.tmp.name, "export.csv")
+        with mock.patch("time_tracker.export.CHUNK_SIZE", 10):
+            export("csv", output=filename)
+        with open(filename) as f:
+            self.assertEqual(f.read(), self.export())
+        self.assertFalse(os.path.exists(f"{filename}.tmp"))
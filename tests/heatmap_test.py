@@ -0,0 +1,82 @@
+import contextlib
+import datetime
+import io
+import unittest
+
+from time_tracker import Activity, log_event, run_command
+from time_tracker.heatmap import count_weekdays, hour_minutes, load_heatmaps
+
+from log_dir import temp_log_dir
+
+# A Monday and a Tuesday.
+DAYS = [datetime.date(2025, 1, 27), datetime.date(2025, 1, 28)]
+
+
+def at(day: datetime.date, hour: int, minute: int) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+class TestHeatmap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        for day in DAYS:
+            log_event("a", Activity.WORKING, "P", at(day, 8, 30))
+            log_event("b", Activity.WORKING, "Q", at(day, 10, 15))
+            log_event("c", Activity.IDLE, "", at(day, 11, 0))
+
+    def test_hour_minutes(self):
+        bits = ((1 << 90) - 1) << 30
+        self.assertEqual(hour_minutes(bits)[:3], [30, 60, 0])
+
+    def test_count_weekdays(self):
+        self.assertEqual(count_weekdays(DAYS[0], DAYS[0]), [1, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(
+            count_weekdays(DAYS[1], DAYS[1] + datetime.timedelta(days=13)),
+            [2] * 7,
+        )
+        self.assertEqual(count_weekdays(DAYS[0], datetime.date(2025, 2, 9)), [2] * 7)
+
+    def test_split_at_hours(self):
+        grid = load_heatmaps()[""]
+        self.assertEqual(grid[0][7:12], [0, 30, 60, 60, 0])
+        self.assertEqual(grid[1], grid[0])
+        self.assertEqual(sum(map(sum, grid[2:])), 0)
+
+    def test_projects(self):
+        grids = load_heatmaps(by_project=True)
+        self.assertEqual(list(grids), ["P", "Q"])
+        self.assertEqual(grids["P"][0][8:12], [30, 60, 15, 0])
+        self.assertEqual(grids["Q"][0][8:12], [0, 0, 45, 0])
+        self.assertEqual(load_heatmaps(project="Q"), {"Q": grids["Q"]})
+        only_tuesday = load_heatmaps(start=DAYS[1])[""]
+        self.assertEqual(sum(only_tuesday[0]), 0)
+
+    def test_command(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["heatmap", "--to", "2025-02-02"])
+        lines = out.getvalue().splitlines()
+        self.assertIn("2025-01-27 to 2025-02-02", lines[1])
+        self.assertTrue(lines[3].startswith("Mon "))
+        self.assertIn("█", lines[3])
+        self.assertTrue(lines[3].endswith("   2.50"))
+
+    def test_command_titles(self):
+        # Work on no project, on the Wednesday.
+        wednesday = DAYS[1] + datetime.timedelta(days=1)
+        log_event("d", Activity.WORKING, "", at(wednesday, 12, 0))
+        log_event("e", Activity.IDLE, "", at(wednesday, 13, 0))
+        for argv, titles in [
+            ([], ["All projects"]),
+            (["--by-project"], ["(no project)", "P", "Q"]),
+            (["-p", "Q"], ["Q"]),
+        ]:
+            with self.subTest(argv=argv):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    run_command(["heatmap", "--to", "2025-02-02"] + argv)
+                lines = out.getvalue().splitlines()
+                self.assertEqual(
+                    [line.split(",")[0] for line in lines if "2025-02-02:" in line],
+                    [f"\033[1m{title}" for title in titles],
+                )
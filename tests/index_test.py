@@ -0,0 +1,127 @@
+import contextlib
+import datetime
+import io
+import os
+import random
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    ONE_MINUTE,
+    Activity,
+    DayResults,
+    load_log,
+    log_event,
+    run_command,
+)
+from time_tracker.index import SpanIndex, get_index_filename, load_index
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2025, 1, 1)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(60)]
+NOW = datetime.datetime(2025, 3, 3, 12, 0)
+DAY = datetime.timedelta(days=1)
+
+
+def write_logs(days, seed=0):
+    rnd = random.Random(seed)
+    for day in days:
+        t = datetime.datetime.combine(day, datetime.time(8))
+        for _ in range(rnd.randrange(1, 8)):
+            project = rnd.choice(["A", "B", "C", ""])
+            log_event("on", Activity.WORKING, project, t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 7200))
+            log_event("off", Activity.IDLE, "", t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 3600))
+
+
+def brute_force(start, end, project=None):
+    return sum(
+        s.rounded_duration() // ONE_MINUTE
+        for day in DAYS
+        if start <= day <= end
+        for s in DayResults(load_log(day)).spans
+        if project is None or s.project == project
+    )
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def test_empty(self):
+        index = load_index(now=NOW)
+        self.assertEqual(index.minutes(DAYS[0], DAYS[-1]), 0)
+        self.assertEqual(index.minutes(DAYS[0], DAYS[-1], "A"), 0)
+
+    def test_ranges_match_brute_force(self):
+        write_logs(DAYS)
+        index = load_index(now=NOW)
+        self.assertEqual(index.through, NOW.date() - DAY)
+        rnd = random.Random(1)
+        for _ in range(30):
+            start, end = sorted(rnd.sample(DAYS, 2))
+            for project in [None, "A", "B", "", "unknown"]:
+                with self.subTest(start=start, end=end, project=project):
+                    self.assertEqual(
+                        index.minutes(start, end, project),
+                        brute_force(start, end, project),
+                    )
+        self.assertEqual(index.minutes(DAYS[5], DAYS[4]), 0)
+
+    def test_saved_and_updated(self):
+        write_logs(DAYS[:30])
+        load_index(now=datetime.datetime.combine(DAYS[30], datetime.time(12)))
+        self.assertTrue(os.path.exists(get_index_filename()))
+        self.assertEqual(SpanIndex.load().through, DAYS[29])
+        write_logs(DAYS[30:], seed=1)
+        with mock.patch.object(
+            SpanIndex, "add_days", autospec=True, side_effect=SpanIndex.add_days
+        ) as add_days:
+            index = load_index(now=NOW)
+        self.assertEqual(add_days.call_args.args[1], DAYS[30:] + [NOW.date() - DAY])
+        self.assertEqual(index.through, NOW.date() - DAY)
+        self.assertEqual(
+            index.minutes(DAYS[0], DAYS[-1]), brute_force(DAYS[0], DAYS[-1])
+        )
+        self.assertEqual(
+            SpanIndex.load().minutes(DAYS[0], DAYS[-1], "C"),
+            brute_force(DAYS[0], DAYS[-1], "C"),
+        )
+
+    def test_rebuild(self):
+        write_logs(DAYS)
+        load_index(now=NOW)
+        os.remove(os.path.join(self.tmp.name, f"{DAYS[3]}.log"))
+        index = load_index(rebuild=True, now=NOW)
+        self.assertEqual(
+            index.minutes(DAYS[0], DAYS[-1]), brute_force(DAYS[0], DAYS[-1])
+        )
+
+    def test_query_command(self):
+        write_logs(DAYS)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(
+                [
+                    "query",
+                    "--project",
+                    "A",
+                    "--from",
+                    "2025-01-10",
+                    "--to",
+                    "2025-02-10",
+                ]
+            )
+        hours = brute_force(datetime.date(2025, 1, 10), datetime.date(2025, 2, 10), "A")
+        self.assertEqual(out.getvalue(), f"{hours / 60:7.2f} - A\n")
+
+    def test_query_totals(self):
+        write_logs(DAYS)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["query"])
+        self.assertIn(
+            f"{brute_force(DAYS[0], DAYS[-1]) / 60:7.2f} - total", out.getvalue()
+        )
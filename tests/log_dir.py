@@ -0,0 +1,15 @@
+"""A temporary LOG_DIR for the tests that read or write logs."""
+
+import tempfile
+import unittest
+from unittest import mock
+
+
+def temp_log_dir(test: unittest.TestCase) -> tempfile.TemporaryDirectory:
+    """Point LOG_DIR to a new temporary directory until the end of test."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    patcher = mock.patch("time_tracker.LOG_DIR", tmp.name)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return tmp
@@ -2,7 +2,14 @@ import datetime
 from io import StringIO
 import unittest
 
-from time_tracker import Activity, Event, parse_log_line, parse_log
+from time_tracker import (
+    Activity,
+    Event,
+    ParseErrors,
+    iter_log,
+    parse_log_line,
+    parse_log,
+)
 
 
 class TestParsing(unittest.TestCase):
@@ -60,3 +67,35 @@ class TestParsing(unittest.TestCase):
 
     def test_parse_empty_file(self):
         self.assertEqual([], parse_log(StringIO("")))
+
+    def test_parse_file_with_invalid_lines(self):
+        log = (
+            "2021-03-31 15:46:35.509057\ta\tWORKING\n"
+            "garbage\n"
+            "2021-03-31 15:56:32.464708\tb\tBUSY\n"
+            "2021-03-31 19:09:28.116408\tc\tWORKING\n"
+            "2021-03-31 19:53"
+        )
+        with self.assertRaises(ValueError):
+            parse_log(StringIO(log))
+        errors = ParseErrors()
+        events = parse_log(StringIO(log), errors)
+        self.assertEqual([e.name for e in events], ["a", "c"])
+        self.assertEqual(errors.count, 3)
+        self.assertEqual([n for n, _ in errors.lines], [2, 3, 5])
+
+    def test_iter_log_is_lazy(self):
+        log = StringIO("2021-03-31 15:46:35.509057\ta\tWORKING\ngarbage\n")
+        events = iter_log(log)
+        self.assertEqual(next(events).name, "a")
+        with self.assertRaises(ValueError):
+            next(events)
+
+    def test_errors_keep_the_first_lines(self):
+        errors = ParseErrors()
+        self.assertFalse(errors)
+        for i in range(ParseErrors.MAX_LINES + 5):
+            errors.add(i, "garbage")
+        self.assertTrue(errors)
+        self.assertEqual(errors.count, ParseErrors.MAX_LINES + 5)
+        self.assertEqual(len(errors.lines), ParseErrors.MAX_LINES)
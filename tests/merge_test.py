@@ -0,0 +1,180 @@
+import datetime
+import os
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    Event,
+    Span,
+    evaluate_day,
+    get_log_filename,
+    get_machines_dir,
+    list_log_days,
+    load_log,
+    log_correction,
+    log_event,
+    log_project_back,
+    print_event,
+    reorder,
+)
+from time_tracker.arrays import load_event_array
+from time_tracker.cache import load_day_results
+from time_tracker.status import load_status_results, update_status
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+NOW = datetime.datetime(2025, 1, 27, 18, 0)
+
+
+def at(hour: int, minute: int, day: datetime.date = DAY) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+def events(*times, project=""):
+    return [Event(at(h, m), f"e{h}:{m}", Activity.WORKING, project) for h, m in times]
+
+
+class TestReorder(unittest.TestCase):
+    def test_small_displacement_is_sorted(self):
+        shuffled = events((9, 0), (9, 20), (9, 10), (9, 30), (9, 5))
+        self.assertEqual(
+            list(reorder(shuffled, 4)), sorted(shuffled, key=lambda e: e.timestamp)
+        )
+
+    def test_large_displacement_is_passed_on(self):
+        shuffled = events((9, 10), (9, 20), (9, 30), (9, 0))
+        a, b, c, d = shuffled
+        self.assertEqual(list(reorder(shuffled, 2)), [a, d, b, c])
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def log_machine(self, machine: str, events):
+        directory = os.path.join(get_machines_dir(), machine)
+        os.makedirs(directory, exist_ok=True)
+        with open(
+            os.path.join(directory, f"{events[0].timestamp.date()}.log"), "a"
+        ) as log:
+            for e in events:
+                print_event(e, log)
+
+    def test_machines(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        laptop = [
+            Event(at(13, 0), "c", Activity.WORKING, "Q"),
+            Event(at(14, 0), "d", Activity.IDLE, ""),
+        ]
+        self.log_machine("laptop", laptop)
+        self.log_machine(
+            "laptop", [Event(at(9, 0, DAY.replace(day=28)), "e", Activity.WORKING, "")]
+        )
+        log_event("f", Activity.WORKING, "P", at(15, 0))
+        log_event("g", Activity.IDLE, "", at(15, 30))
+        self.assertEqual([e.name for e in load_log(DAY)], list("abcdfg"))
+        self.assertEqual(list_log_days(), [DAY, DAY.replace(day=28)])
+        self.assertEqual(evaluate_day(DAY).total_hours, 2.5)
+        self.assertEqual(list(load_event_array([DAY])), load_log(DAY))
+        results = load_day_results(DAY, DAY.replace(day=28))
+        self.assertEqual([s.project for s in results.spans], ["P", "Q", "P"])
+
+    def test_main_log_in_logged_order(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("c", Activity.IDLE, "", at(11, 0))
+        log_event("b", Activity.WORKING, "Q", at(10, 0))
+        self.assertEqual([e.name for e in load_log(DAY)], list("acb"))
+        self.assertEqual(list(load_event_array([DAY])), load_log(DAY))
+        now = at(12, 0)
+        self.assertEqual(
+            evaluate_day(DAY, now).spans,
+            [Span(at(9, 0), at(11, 0), "P"), Span(at(10, 0), now, "Q")],
+        )
+        self.assertEqual(load_status_results(now).spans, evaluate_day(DAY, now).spans)
+
+    def test_project_back(self):
+        log_event("a", Activity.WORKING, "", at(0, 1))
+        log_event("b", Activity.WORKING, "P", at(0, 6))
+        log_project_back("Q", NOW)
+        # The main log is left as it was.
+        with open(get_log_filename(DAY)) as log:
+            self.assertEqual(len(log.readlines()), 2)
+        log_event("c", Activity.WORKING, "", at(0, 10))
+        # The correction is folded into the snapshot, without a full replay.
+        with (
+            mock.patch("time_tracker.status.evaluate_day") as status_replay,
+            mock.patch("time_tracker.tail.evaluate_day") as tail_replay,
+            mock.patch("time_tracker.totals.closed_spans") as closed_spans,
+        ):
+            spans = load_status_results(NOW).spans
+            status_replay.assert_not_called()
+            tail_replay.assert_not_called()
+            closed_spans.assert_not_called()
+        self.assertEqual([s.project for s in spans], ["", "Q"])
+        self.assertEqual(spans, evaluate_day(DAY, NOW).spans)
+
+    def test_correction_before_a_change(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.WORKING, "Q", at(10, 0))
+        log_correction(Event(at(9, 30), "fix", Activity.WORKING, "R"))
+        # Only a full replay puts it before b.
+        self.assertIsNone(update_status(DAY))
+        spans = load_status_results(NOW).spans
+        self.assertEqual([s.project for s in spans], ["P", "R", "Q"])
+        self.assertEqual(spans, evaluate_day(DAY, NOW).spans)
+
+    def test_project_back_backends(self):
+        expected = [
+            Span(at(9, 0), at(9, 5), ""),
+            Span(at(9, 5), at(10, 0), "P"),
+            Span(at(10, 30), at(12, 0), "Q"),
+            Span(at(12, 0), at(13, 0), "S"),
+            Span(at(13, 0), at(14, 0), "T"),
+            Span(at(14, 30), NOW, "U"),
+        ]
+        for log_format in ["text", "sqlite"]:
+            with (
+                self.subTest(log_format=log_format),
+                mock.patch("time_tracker.LOG_FORMAT", log_format),
+            ):
+                log_event("a", Activity.WORKING, "", at(9, 0))
+                log_event("b", Activity.WORKING, "P", at(9, 5))
+                log_event("c", Activity.IDLE, "", at(10, 0))
+                log_event("d", Activity.WORKING, "", at(10, 30))
+                log_event("e", Activity.WORKING, "", at(10, 45))
+                # Back to when work started again.
+                log_project_back("Q", at(11, 0))
+                log_event("f", Activity.WORKING, "R", at(12, 0))
+                log_project_back("S", at(12, 30))
+                # Back to when the project was last chosen.
+                log_event("g", Activity.WORKING, "S", at(13, 0))
+                log_project_back("T", at(13, 30))
+                log_event("h", Activity.IDLE, "", at(14, 0))
+                # Like choosing the project, when not working.
+                log_project_back("U", at(14, 30))
+                self.assertEqual(evaluate_day(DAY, NOW).spans, expected)
+                self.assertEqual(load_status_results(NOW).spans, expected)
+
+    def test_legacy_project_back(self):
+        # Older versions logged project-back to the main log, back-dated to
+        # the first event of the day. Its lines keep their meaning, however
+        # many events follow them.
+        for day, unlocks in [(DAY, 0), (DAY.replace(day=28), 100)]:
+            log_event("a", Activity.WORKING, "", at(9, 0, day))
+            log_event("b", Activity.WORKING, "A", at(10, 0, day))
+            for i in range(unlocks):
+                unlock = at(10, 0, day) + datetime.timedelta(seconds=i + 1)
+                log_event("unlock", Activity.WORKING, "", unlock)
+            log_event("project-back", Activity.WORKING, "B", at(9, 0, day))
+            log_event("c", Activity.IDLE, "", at(17, 0, day))
+            self.assertEqual(
+                evaluate_day(day, at(18, 0, day)).spans,
+                [
+                    Span(at(9, 0, day), at(10, 0, day), ""),
+                    Span(at(10, 0, day), at(17, 0, day), "B"),
+                ],
+            )
+            self.assertEqual(list(load_event_array([day])), load_log(day))
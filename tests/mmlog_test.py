@@ -0,0 +1,89 @@
+import datetime
+import unittest
+
+from time_tracker import (
+    Activity,
+    ParseErrors,
+    get_log_filename,
+    log_event,
+    parse_log,
+)
+from time_tracker.binlog import to_epoch_us
+from time_tracker.mmlog import MappedLog, map_log
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+
+
+class TestMappedLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        t = datetime.datetime(2025, 1, 27, 9, 0, 12, 345678)
+        for i in range(20):
+            activity = Activity.WORKING if i % 3 else Activity.IDLE
+            log_event(f"event{i}", activity, "P" if i % 5 == 0 else "", t)
+            t += datetime.timedelta(minutes=7, seconds=i)
+        with open(get_log_filename(DAY)) as log:
+            self.expected = parse_log(log)
+
+    def test_same_events(self):
+        with map_log(DAY, names=True) as log:
+            self.assertEqual(len(log), 20)
+            self.assertEqual(list(log), self.expected)
+            self.assertEqual(log[-1], self.expected[-1])
+            self.assertEqual(log[3:6], self.expected[3:6])
+            self.assertEqual(list(reversed(log)), self.expected[::-1])
+            self.assertEqual(log.index(self.expected[4]), 4)
+            with self.assertRaises(IndexError):
+                log[20]
+
+    def test_names_are_skipped(self):
+        with map_log(DAY) as log:
+            self.assertEqual(list(log), [e._replace(name="") for e in self.expected])
+
+    def test_timestamps(self):
+        with map_log(DAY) as log:
+            self.assertEqual(
+                list(log.timestamps()),
+                [to_epoch_us(e.timestamp) for e in self.expected],
+            )
+
+    def test_partial_and_invalid_lines(self):
+        with open(get_log_filename(DAY), "a") as log:
+            log.write("garbage\n")
+            log.write("2025-01-27 18:00:00\tlast\tIDLE")
+        with MappedLog(get_log_filename(DAY), names=True) as log:
+            self.assertEqual(len(log), 22)
+            self.assertEqual(log[21].name, "last")
+            with self.assertRaisesRegex(ValueError, "line 21"):
+                log[20]
+
+    def test_records(self):
+        with open(get_log_filename(DAY), "rb") as log:
+            data = log.read()
+        with MappedLog.from_bytes(data + b"garbage\n") as log:
+            with self.assertRaisesRegex(ValueError, "line 21"):
+                list(log.records())
+            errors = ParseErrors()
+            self.assertEqual(
+                list(log.records(errors)),
+                [
+                    (
+                        to_epoch_us(e.timestamp),
+                        e.name.encode(),
+                        e.activity.value,
+                        e.project.encode(),
+                    )
+                    for e in self.expected
+                ],
+            )
+            self.assertEqual(errors.lines, [(21, "garbage")])
+
+    def test_empty(self):
+        open(get_log_filename(DAY), "w").close()
+        with map_log(DAY) as log:
+            self.assertEqual(len(log), 0)
+            self.assertEqual(list(log.timestamps()), [])
+        with self.assertRaises(FileNotFoundError):
+            map_log(DAY + datetime.timedelta(days=1))
@@ -0,0 +1,120 @@
+import builtins
+import contextlib
+import datetime
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+import time_tracker
+from time_tracker import Activity, get_log_filename, log_event, main
+from time_tracker.perf import (
+    get_perf_filename,
+    load_records,
+    percentile,
+    run_profiled,
+    write_perf,
+)
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+
+
+def evaluate(argv):
+    events = time_tracker.load_log(DAY)
+    spans = time_tracker.filter_spans(time_tracker.get_work_spans(events))
+    print(spans)
+
+
+class TestPerf(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        log_event("a", Activity.WORKING, "P", datetime.datetime(2025, 1, 27, 9))
+        log_event("b", Activity.IDLE, "", datetime.datetime(2025, 1, 27, 10))
+
+    def test_record(self):
+        load_log = time_tracker.load_log
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_profiled(evaluate, ["test"])
+        [record] = load_records()
+        self.assertEqual(record["command"], "test")
+        phases = record["phases"]
+        for phase in ["load_log", "parse_log", "get_work_spans", "filter_spans"]:
+            self.assertGreater(phases[phase]["s"], 0.0)
+        self.assertEqual(phases["load_log"]["calls"], 1)
+        self.assertEqual(phases["render"]["calls"], 1)
+        self.assertAlmostEqual(
+            sum(p["s"] for p in phases.values()), record["wall_s"], places=3
+        )
+        self.assertEqual(record["files_opened"], 1)
+        self.assertEqual(record["bytes_read"], os.path.getsize(get_log_filename(DAY)))
+        self.assertGreater(record["import_s"], 0.0)
+        # Everything is back to normal.
+        self.assertIs(time_tracker.load_log, load_log)
+        self.assertIs(builtins.print, print)
+        self.assertIs(builtins.open, open)
+
+    def test_record_on_error(self):
+        def fail(argv):
+            time_tracker.load_log(DAY)
+            raise RuntimeError("failed")
+
+        with self.assertRaises(RuntimeError):
+            run_profiled(fail, [])
+        [record] = load_records()
+        self.assertEqual(record["command"], "menu")
+        self.assertEqual(record["phases"]["load_log"]["calls"], 1)
+
+    def test_rotation(self):
+        with open(get_perf_filename(), "w") as f:
+            f.write(json.dumps({"command": "old"}) + "\n")
+        with (
+            mock.patch("time_tracker.perf.PERF_MAX_BYTES", 10),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            run_profiled(evaluate, ["new"])
+        self.assertTrue(os.path.exists(get_perf_filename() + ".1"))
+        self.assertEqual([r["command"] for r in load_records()], ["old", "new"])
+        self.assertEqual([r["command"] for r in load_records(1)], ["new"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 90), 90)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 90), 5)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 0), 1)
+
+    def test_write_perf(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            write_perf()
+            self.assertIn("No timings", out.getvalue())
+            for _ in range(3):
+                run_profiled(evaluate, ["test"])
+            out.truncate(0)
+            write_perf()
+        output = out.getvalue()
+        self.assertIn("test: 3 runs", output)
+        self.assertIn("p90 ms", output)
+        self.assertIn("load_log", output)
+        self.assertIn("files opened", output)
+
+    def test_main(self):
+        with (
+            mock.patch("sys.argv", ["time_tracker", "--profile"]),
+            mock.patch("time_tracker.write_menu") as write_menu,
+        ):
+            main()
+        write_menu.assert_called_once()
+        self.assertEqual(load_records()[0]["command"], "menu")
+        with (
+            mock.patch("sys.argv", ["time_tracker", "project", "Q"]),
+            mock.patch.dict("os.environ", {"TIME_TRACKER_PROFILE": "1"}),
+        ):
+            main()
+        self.assertEqual(load_records()[1]["command"], "project")
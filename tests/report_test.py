@@ -0,0 +1,96 @@
+import contextlib
+import datetime
+import io
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, log_event, run_command, write_report
+from time_tracker.cache import load_day_results
+
+from log_dir import temp_log_dir
+
+
+def write_recent_logs():
+    today = datetime.date.today()
+    for i in range(1, 45):
+        day = today - datetime.timedelta(days=i)
+        if i % 7 == 3:
+            continue
+        start = datetime.datetime.combine(day, datetime.time(8, i % 30))
+        log_event("a", Activity.WORKING, "AB"[i % 2], start)
+        log_event("b", Activity.IDLE, "", start + datetime.timedelta(hours=4))
+        log_event("c", Activity.WORKING, "C", start + datetime.timedelta(hours=5))
+        log_event(
+            "d", Activity.IDLE, "", start + datetime.timedelta(hours=8, minutes=i)
+        )
+
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        write_recent_logs()
+
+    def report(self, *args) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["report", *args])
+        return out.getvalue()
+
+    def test_report(self):
+        report = self.report()
+        self.assertIn("Weekly totals:", report)
+        self.assertIn("No log file", report)
+        self.assertIn("- C", report)
+
+    def test_parallel_report_matches_sequential(self):
+        sequential = self.report()
+        self.assertEqual(self.report("--jobs", "3"), sequential)
+
+    def test_cached_report_matches_uncached(self):
+        uncached = io.StringIO()
+        with contextlib.redirect_stdout(uncached):
+            write_report()
+        self.assertEqual(self.report(), uncached.getvalue())
+
+
+class TestRangeReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        # Two days in January, a Saturday, and a week in March.
+        days = [datetime.date(2025, 1, 6), datetime.date(2025, 1, 8)]
+        days.append(datetime.date(2025, 1, 11))
+        days += [
+            datetime.date(2025, 3, 3) + datetime.timedelta(days=i) for i in range(5)
+        ]
+        for day in days:
+            start = datetime.datetime.combine(day, datetime.time(9, 0))
+            log_event("a", Activity.WORKING, "P", start)
+            log_event("b", Activity.IDLE, "", start + datetime.timedelta(hours=2))
+
+    def report(self, *args) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["report", *args])
+        return out.getvalue()
+
+    def test_only_days_with_logs(self):
+        with mock.patch(
+            "time_tracker.cache.load_day_results",
+            wraps=load_day_results,
+        ) as load:
+            report = self.report("--from", "2025-01-01", "--to", "2025-03-31")
+        self.assertEqual(load.call_count, 7)
+        self.assertNotIn("No log file", report)
+        self.assertNotIn("Saturday", report)
+        totals = report.split("Weekly totals:")
+        self.assertEqual(len(totals), 3)
+        self.assertIn(" 4.00 - total", totals[1])
+        self.assertIn("10.00 - total", totals[2])
+
+    def test_last_week_is_totaled_once_over(self):
+        report = self.report("--from", "2025-03-01", "--to", "2025-03-06")
+        self.assertIn("Thursday", report)
+        self.assertNotIn("Friday", report)
+        self.assertNotIn("Weekly totals:", report)
+        report = self.report("--from", "2025-03-01", "--to", "2025-03-08")
+        self.assertIn("10.00 - total", report)
@@ -0,0 +1,120 @@
+import contextlib
+import datetime
+import io
+import random
+import unittest
+
+from time_tracker import (
+    Activity,
+    DayResults,
+    ProjectStats,
+    Span,
+    load_log,
+    log_event,
+    run_command,
+)
+from time_tracker.arrays import SpanArray
+from time_tracker.rollup import Rollup, load_rollup, period_label, period_start
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2024, 12, 20)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(120)]
+NOW = datetime.datetime(2025, 4, 30, 12, 0)
+
+
+def write_logs(seed=0):
+    rnd = random.Random(seed)
+    for day in DAYS:
+        if day.isoweekday() > 5:
+            continue
+        t = datetime.datetime.combine(day, datetime.time(8))
+        for _ in range(rnd.randrange(1, 6)):
+            project = rnd.choice(["A", "B", ""])
+            log_event("on", Activity.WORKING, project, t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 7200))
+            log_event("off", Activity.IDLE, "", t)
+            t += datetime.timedelta(seconds=rnd.randrange(30, 3600))
+
+
+def reference(by):
+    stats = {}
+    for day in DAYS:
+        events = load_log(day)
+        if events:
+            start = period_start(day, by)
+            stats.setdefault(start, ProjectStats()).add(DayResults(events).spans)
+    return stats
+
+
+class TestRollup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def test_periods(self):
+        day = datetime.date(2025, 8, 14)
+        self.assertEqual(period_start(day, "week"), datetime.date(2025, 8, 11))
+        self.assertEqual(period_start(day, "month"), datetime.date(2025, 8, 1))
+        self.assertEqual(period_start(day, "quarter"), datetime.date(2025, 7, 1))
+        self.assertEqual(period_start(day, "year"), datetime.date(2025, 1, 1))
+        self.assertEqual(period_label(datetime.date(2024, 12, 30), "week"), "2025-W01")
+        self.assertEqual(period_label(datetime.date(2025, 7, 1), "quarter"), "2025-Q3")
+        self.assertEqual(period_label(datetime.date(2025, 7, 1), "month"), "2025-07")
+        self.assertEqual(period_label(datetime.date(2025, 1, 1), "year"), "2025")
+        with self.assertRaises(ValueError):
+            Rollup("day")
+
+    def test_empty(self):
+        self.assertEqual(list(load_rollup("month", now=NOW)), [])
+
+    def test_matches_project_stats(self):
+        write_logs()
+        for by in ["week", "month", "quarter", "year"]:
+            expected = reference(by)
+            actual = list(load_rollup(by, now=NOW))
+            with self.subTest(by=by):
+                self.assertEqual([p for p, _ in actual], sorted(expected))
+                for period, hours in actual:
+                    stats = expected[period]
+                    self.assertEqual(hours.keys(), stats.stats.keys())
+                    for project, h in hours.items():
+                        self.assertAlmostEqual(h, stats.stats[project])
+
+    def test_spans_with_other_codes(self):
+        def span(day, hours, project):
+            start = datetime.datetime.combine(day, datetime.time(9))
+            return Span(start, start + datetime.timedelta(hours=hours), project)
+
+        rollup = Rollup("month")
+        rollup.add(SpanArray.from_spans([span(DAYS[0], 2, "A")]))
+        rollup.add(
+            SpanArray.from_spans([span(DAYS[1], 1, "B"), span(DAYS[20], 3, "A")])
+        )
+        self.assertEqual(
+            list(rollup),
+            [
+                (datetime.date(2024, 12, 1), {"A": 2.0, "B": 1.0}),
+                (datetime.date(2025, 1, 1), {"A": 3.0}),
+            ],
+        )
+
+    def test_range(self):
+        write_logs()
+        rollup = load_rollup(
+            "month", datetime.date(2025, 2, 1), datetime.date(2025, 3, 31), NOW
+        )
+        periods = [p for p, _ in rollup]
+        self.assertEqual(
+            periods, [datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)]
+        )
+
+    def test_stats_command(self):
+        write_logs()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_command(["stats", "--by", "quarter", "--to", "2025-03-31"])
+        output = out.getvalue()
+        self.assertIn("2024-Q4:", output)
+        self.assertIn("2025-Q1:", output)
+        self.assertNotIn("2025-Q2:", output)
+        self.assertIn(" - total", output)
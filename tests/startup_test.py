@@ -0,0 +1,55 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+BENCHMARK = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "benchmarks", "startup.py"
+)
+spec = importlib.util.spec_from_file_location("startup", BENCHMARK)
+assert spec and spec.loader
+startup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(startup)
+
+# Modules that only some commands need, and the menu must not pay for.
+NOT_FOR_THE_MENU = {
+    "argparse",
+    "concurrent.futures",
+    "dataclasses",
+    "inspect",
+    "time_tracker.arrays",
+    "time_tracker.binlog",
+}
+# Generous, to catch accidental heavy imports rather than noise.
+BUDGET_US = 150_000
+
+
+class TestStartup(unittest.TestCase):
+    def test_parse_importtime(self):
+        imports = startup.parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   _json\n"
+            "import time:       300 |        400 | json\n"
+        )
+        self.assertEqual(
+            imports,
+            [
+                startup.ImportTime("_json", 100, 100, 1),
+                startup.ImportTime("json", 300, 400, 0),
+            ],
+        )
+        self.assertEqual(startup.total_us(imports), 400)
+
+    def test_menu_imports(self):
+        with tempfile.TemporaryDirectory() as home:
+            imports = startup.run_menu(home)
+        modules = {i.module for i in imports}
+        self.assertIn("time_tracker", modules)
+        # Without the imports of .pth files.
+        self.assertNotIn("site", modules)
+        self.assertEqual(modules & NOT_FOR_THE_MENU, set())
+        self.assertLess(
+            startup.total_us(imports, "time_tracker"),
+            BUDGET_US,
+            sorted(imports, key=lambda i: -i.self_us)[:10],
+        )
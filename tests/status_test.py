@@ -0,0 +1,91 @@
+import datetime
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, evaluate_day, get_log_filename, log_event
+from time_tracker.status import load_status_results, read_status, update_status
+from time_tracker.tail import load_today_results
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+NOW = datetime.datetime(2025, 1, 27, 18, 0)
+
+
+def at(hour: int, minute: int) -> datetime.datetime:
+    return datetime.datetime(2025, 1, 27, hour, minute)
+
+
+class TestStatus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def log(self, name: str, activity: Activity, project: str, now: datetime.datetime):
+        log_event(name, activity, project, now)
+        update_status(DAY)
+
+    def assertMatchesTail(self, now: datetime.datetime):
+        with mock.patch("time_tracker.status.update_tail") as update_tail:
+            results = load_status_results(now)
+            update_tail.assert_not_called()
+        expected = load_today_results(now)
+        self.assertEqual(results.spans, expected.spans)
+        self.assertEqual(results.total_hours, expected.total_hours)
+        self.assertEqual(results.messages, expected.messages)
+        self.assertEqual(results.level, expected.level)
+
+    def test_no_log(self):
+        self.assertIsNone(update_status(DAY))
+        results = load_status_results(NOW)
+        self.assertEqual(results.messages[0].text, "No log file")
+
+    def test_working(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        self.log("b", Activity.IDLE, "", at(12, 0))
+        self.log("c", Activity.WORKING, "", at(12, 2))
+        self.assertMatchesTail(NOW)
+        results = load_status_results(NOW)
+        self.assertEqual(len(results.spans), 1)
+        self.assertEqual(results.total_hours, 9.0)
+
+    def test_idle(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        self.log("b", Activity.IDLE, "", at(12, 0))
+        self.log("c", Activity.WORKING, "Q", at(13, 0))
+        self.log("d", Activity.IDLE, "", at(17, 15))
+        self.assertMatchesTail(NOW)
+        self.assertEqual(load_status_results(NOW).total_hours, 7.25)
+
+    def test_stale_snapshot_is_updated(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.IDLE, "", at(12, 0))
+        self.assertIsNone(read_status(DAY))
+        self.assertEqual(load_status_results(NOW).total_hours, 3.0)
+        self.assertIsNotNone(read_status(DAY))
+
+    def test_snapshot_of_other_day_is_ignored(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        tomorrow = DAY + datetime.timedelta(days=1)
+        log_event("a", Activity.WORKING, "", datetime.datetime(2025, 1, 28, 9, 0))
+        self.assertIsNone(read_status(tomorrow))
+
+    def test_invalid_log(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        with open(get_log_filename(DAY), "a") as log:
+            log.write("garbage\n")
+        self.assertIsNotNone(update_status(DAY))
+        self.assertIsNotNone(read_status(DAY))
+        self.assertMatchesTail(NOW)
+        self.assertEqual(
+            load_status_results(NOW).messages, evaluate_day(DAY, NOW).messages
+        )
+
+    def test_invalid_activity(self):
+        self.log("a", Activity.WORKING, "P", at(9, 0))
+        with open(get_log_filename(DAY), "a") as log:
+            log.write(f"{at(9, 30)}\tx\tBOGUS\t\n")
+        self.log("b", Activity.IDLE, "", at(10, 0))
+        self.assertMatchesTail(NOW)
+        results = load_status_results(NOW)
+        self.assertEqual(results.total_hours, 1.0)
+        self.assertEqual(results.messages, evaluate_day(DAY, NOW).messages)
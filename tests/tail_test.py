@@ -0,0 +1,158 @@
+import datetime
+import json
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    DayResults,
+    evaluate_day,
+    get_log_filename,
+    get_work_spans,
+    load_log,
+    log_event,
+    parse_log_line,
+)
+from time_tracker.tail import get_tail_filename, load_today_results, update_tail
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+NOW = datetime.datetime(2025, 1, 27, 18, 0)
+
+
+def at(hour: int, minute: int) -> datetime.datetime:
+    return datetime.datetime(2025, 1, 27, hour, minute)
+
+
+def evaluate_day_results() -> DayResults:
+    return evaluate_day(DAY, NOW)
+
+
+class TestTail(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def assertMatchesFullReplay(self, results: DayResults):
+        events = load_log(DAY)
+        expected = DayResults(events, get_work_spans(events, NOW))
+        self.assertEqual(results.spans, expected.spans)
+        self.assertEqual(results.total_hours, expected.total_hours)
+        self.assertEqual(results.messages, expected.messages)
+        self.assertEqual(results.level, expected.level)
+
+    def test_no_log(self):
+        results = load_today_results(NOW)
+        self.assertEqual(results.messages[0].text, "No log file")
+
+    def test_invalid_line_is_skipped(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        with open(get_log_filename(DAY), "a") as log:
+            log.write("garbage\n")
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 1.0)
+        self.assertEqual(
+            results.messages[-1].text,
+            "Skipped 1 invalid log lines, the first in line 2",
+        )
+
+    def test_incremental(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 1.0)
+        offset = update_tail(DAY).log.offset
+
+        log_event("c", Activity.WORKING, "", at(10, 30))
+        log_event("d", Activity.WORKING, "Q", at(11, 0))
+        with mock.patch(
+            "time_tracker.tail.parse_log_line", wraps=parse_log_line
+        ) as parse:
+            results = load_today_results(NOW)
+            self.assertEqual(parse.call_count, 2)
+        self.assertGreater(update_tail(DAY).log.offset, offset)
+        self.assertEqual(results.total_hours, 8.5)
+        self.assertEqual(results.spans[-1].project, "Q")
+        self.assertMatchesFullReplay(results)
+
+        with mock.patch("time_tracker.tail.parse_log_line") as parse:
+            load_today_results(NOW)
+            parse.assert_not_called()
+
+    def test_project_back(self):
+        log_event("a", Activity.WORKING, "", at(9, 0))
+        load_today_results(NOW)
+        log_event("project-back", Activity.WORKING, "P", at(9, 0))
+        results = load_today_results(NOW)
+        self.assertEqual(results.spans[-1].project, "P")
+
+    def test_rewritten_log_is_rebuilt(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        load_today_results(NOW)
+        with open(get_log_filename(DAY), "w") as log:
+            print(at(12, 0), "c", "WORKING", "Q", sep="\t", file=log)
+            print(at(12, 45), "d", "IDLE", "", sep="\t", file=log)
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 0.75)
+        self.assertEqual(results.spans[0].project, "Q")
+
+    def test_truncated_log_is_rebuilt(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        load_today_results(NOW)
+        with open(get_log_filename(DAY), "r+") as log:
+            log.truncate(len(log.readline()))
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 9.0)
+
+    def test_partial_line_is_not_consumed(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        with open(get_log_filename(DAY), "a") as log:
+            log.write(f"{at(10, 0)}\tb\tID")
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 9.0)
+        with open(get_log_filename(DAY), "a") as log:
+            log.write("LE\t\n")
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 1.0)
+
+    def test_state_of_other_day_is_ignored(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        load_today_results(NOW)
+        with open(get_tail_filename()) as f:
+            self.assertEqual(json.load(f)["day"], "2025-01-27")
+        tomorrow = datetime.datetime(2025, 1, 28, 9, 0)
+        log_event("a", Activity.WORKING, "Q", tomorrow)
+        results = load_today_results(tomorrow + datetime.timedelta(hours=2))
+        self.assertEqual(results.total_hours, 2.0)
+        self.assertEqual(results.spans[0].project, "Q")
+
+    def test_invalid_line(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        with open(get_log_filename(DAY), "a") as log:
+            log.write("garbage\n")
+        with mock.patch("time_tracker.tail.evaluate_day") as evaluate_day:
+            results = load_today_results(NOW)
+            evaluate_day.assert_not_called()
+        self.assertEqual(results.total_hours, 9.0)
+        self.assertEqual(results.messages, evaluate_day_results().messages)
+
+    def test_invalid_activity(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        load_today_results(NOW)
+        with open(get_log_filename(DAY), "a") as log:
+            log.write(f"{at(9, 30)}\tx\tBOGUS\t\n")
+        log_event("b", Activity.IDLE, "", at(10, 0))
+        results = load_today_results(NOW)
+        self.assertEqual(results.total_hours, 1.0)
+        self.assertEqual(results.messages, evaluate_day_results().messages)
+        self.assertEqual(
+            results.messages[-1].text,
+            "Skipped 1 invalid log lines, the first in line 2",
+        )
+        # The count survives in the saved state.
+        log_event("c", Activity.WORKING, "", at(11, 0))
+        results = load_today_results(NOW)
+        self.assertEqual(results.messages, evaluate_day_results().messages)
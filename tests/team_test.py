@@ -0,0 +1,229 @@
+import asyncio
+import datetime
+import os
+import random
+import unittest
+from unittest import mock
+
+from time_tracker import (
+    Activity,
+    DayResults,
+    Event,
+    get_log_filename,
+    load_log,
+    log_event,
+    log_project,
+)
+from time_tracker.spool import (
+    TeamClient,
+    get_sequence_filename,
+    get_spool_filename,
+    parse_address,
+)
+from time_tracker.team import TeamServer
+from time_tracker.writer import EventWriter
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2025, 1, 20)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(5)]
+
+
+def random_events(seed):
+    rnd = random.Random(seed)
+    events = []
+    for day in DAYS:
+        t = datetime.datetime.combine(day, datetime.time(8))
+        for _ in range(rnd.randrange(1, 6)):
+            project = rnd.choice(["A", "B", ""])
+            events.append(Event(t, "on", Activity.WORKING, project))
+            t += datetime.timedelta(seconds=rnd.randrange(30, 7200))
+            events.append(Event(t, "off", Activity.IDLE))
+            t += datetime.timedelta(seconds=rnd.randrange(30, 3600))
+    return events
+
+
+class TestTeam(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = temp_log_dir(self)
+        self.data = os.path.join(self.tmp.name, "team")
+        self.address = f"unix:{os.path.join(self.tmp.name, 'team.sock')}"
+
+    async def start_server(self) -> TeamServer:
+        team = TeamServer(self.data)
+        server = await team.start(self.address)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        return team
+
+    async def send(self, user, events, first_seq=1, client="c"):
+        reader, writer = await asyncio.open_unix_connection(
+            parse_address(self.address)[1]
+        )
+        lines = "".join(
+            f"{first_seq + i}\t{e.timestamp}\t{e.name}\t{e.activity.name}\t{e.project}\n"
+            for i, e in enumerate(events)
+        )
+        writer.write(f"EVENTS\t{user}\t{client}\t{len(events)}\n{lines}".encode())
+        await writer.drain()
+        reply = (await reader.readline()).decode()
+        writer.close()
+        await writer.wait_closed()
+        return reply
+
+    def expected_hours(self, events, day=None):
+        for e in events:
+            log_event(e.name, e.activity, e.project, e.timestamp)
+        hours = sum(
+            DayResults(load_log(d)).total_hours for d in DAYS if day in (None, d)
+        )
+        for d in DAYS:
+            if os.path.exists(get_log_filename(d)):
+                os.remove(get_log_filename(d))
+        return hours
+
+    async def test_totals_match_day_results(self):
+        team = await self.start_server()
+        users = {f"user{i}": random_events(i) for i in range(5)}
+        replies = await asyncio.gather(
+            *(self.send(user, events) for user, events in users.items())
+        )
+        self.assertEqual(replies, [f"OK\t{len(events)}\n" for events in users.values()])
+        result = team.query(DAYS[0], DAYS[-1])
+        for user, events in users.items():
+            with self.subTest(user=user):
+                self.assertAlmostEqual(
+                    sum(result["users"][user].values()), self.expected_hours(events)
+                )
+        day = team.query(DAYS[2], DAYS[2])
+        self.assertAlmostEqual(
+            sum(day["users"]["user0"].values()),
+            self.expected_hours(users["user0"], DAYS[2]),
+        )
+        self.assertAlmostEqual(result["total"], sum(result["projects"].values()))
+        with open(os.path.join(self.data, "user1", f"{DAYS[0]}.log")) as log:
+            self.assertTrue(log.readline().startswith(f"{DAYS[0]} 08:00:00\ton"))
+
+    async def test_batches_are_applied_once(self):
+        team = await self.start_server()
+        events = random_events(1)
+        await self.send("u", events[:4])
+        self.assertEqual(await self.send("u", events[:6]), "OK\t6\n")
+        self.assertEqual(await self.send("u", events[:6]), "OK\t6\n")
+        await self.send("u", events[6:], first_seq=7)
+        result = team.query(DAYS[0], DAYS[-1])
+        self.assertAlmostEqual(
+            sum(result["users"]["u"].values()), self.expected_hours(events)
+        )
+
+    async def test_restart(self):
+        team = await self.start_server()
+        await self.send("u", random_events(2))
+        expected = team.query(DAYS[0], DAYS[-1])
+        restarted = TeamServer(self.data)
+        restarted.load()
+        self.assertEqual(restarted.query(DAYS[0], DAYS[-1]), expected)
+        self.assertEqual(restarted.shards["u"].seqs, {"c": len(random_events(2))})
+
+    async def test_clients_of_a_user(self):
+        team = await self.start_server()
+        events = random_events(4)
+        half = len(events) // 2
+        # Two machines of one user, and a client without an id.
+        self.assertEqual(
+            await self.send("u", events[:half], client="a"), f"OK\t{half}\n"
+        )
+        self.assertEqual(
+            await self.send("u", events[half:], client="b"),
+            f"OK\t{len(events) - half}\n",
+        )
+        reader, writer = await asyncio.open_unix_connection(
+            parse_address(self.address)[1]
+        )
+        writer.write(b"EVENTS\tu\t1\n1\t2025-01-30 09:00:00\ton\tWORKING\t\n")
+        self.assertEqual(await reader.readline(), b"OK\t1\n")
+        writer.close()
+        self.assertEqual(
+            team.shards["u"].seqs, {"a": half, "b": len(events) - half, "": 1}
+        )
+        result = team.query(DAYS[0], DAYS[-1])
+        self.assertAlmostEqual(
+            sum(result["users"]["u"].values()), self.expected_hours(events)
+        )
+
+    async def test_errors(self):
+        await self.start_server()
+        reply = await self.send("../etc", random_events(0)[:2])
+        self.assertTrue(reply.startswith("ERROR"))
+        reader, writer = await asyncio.open_unix_connection(
+            parse_address(self.address)[1]
+        )
+        writer.write(b"DELETE\tall\n")
+        self.assertTrue((await reader.readline()).startswith(b"ERROR"))
+        writer.close()
+
+    async def test_client_spools_while_server_is_down(self):
+        client = TeamClient(self.address, "me")
+        events = random_events(3)
+        self.assertFalse(await asyncio.to_thread(client.send, events[0]))
+        self.assertFalse(await asyncio.to_thread(client.send, events[1]))
+        with open(get_spool_filename()) as spool:
+            self.assertEqual(len(spool.readlines()), 2)
+        team = await self.start_server()
+        # Still backing off.
+        self.assertFalse(await asyncio.to_thread(client.flush))
+        self.assertTrue(await asyncio.to_thread(client.flush, True))
+        self.assertFalse(os.path.exists(get_spool_filename()))
+        for e in events[2:]:
+            self.assertTrue(await asyncio.to_thread(client.send, e))
+        self.assertEqual(list(team.shards["me"].seqs.values()), [len(events)])
+        result = await asyncio.to_thread(client.query, DAYS[0], DAYS[-1])
+        self.assertAlmostEqual(result["total"], self.expected_hours(events))
+
+    async def test_lost_sequence(self):
+        team = await self.start_server()
+        client = TeamClient(self.address, "me")
+        events = random_events(5)
+        await asyncio.to_thread(client.send, events[0])
+        os.remove(get_sequence_filename())
+        for e in events[1:]:
+            self.assertTrue(await asyncio.to_thread(client.send, e))
+        # A new client id, rather than numbers the server would skip.
+        self.assertEqual(sorted(team.shards["me"].seqs.values()), [1, len(events) - 1])
+        result = team.query(DAYS[0], DAYS[-1])
+        self.assertAlmostEqual(result["total"], self.expected_hours(events))
+
+    async def test_project_commands_spool(self):
+        team = await self.start_server()
+        client = TeamClient(self.address, "me")
+        with mock.patch.dict(os.environ, {"TIME_TRACKER_TEAM_SERVER": self.address}):
+            log_project("A")
+        with open(get_spool_filename()) as spool:
+            self.assertTrue(spool.read().rstrip("\n").endswith("\tproject\tWORKING\tA"))
+        self.assertTrue(await asyncio.to_thread(client.flush))
+        day = datetime.date.today()
+        with open(os.path.join(self.data, "me", f"{day}.log")) as log:
+            self.assertTrue(log.read().rstrip("\n").endswith("\tproject\tWORKING\tA"))
+
+    async def test_writer_sends_events(self):
+        team = mock.Mock()
+        writer = EventWriter(team=team)
+        event = Event(datetime.datetime(2025, 1, 20, 9), "a", Activity.WORKING)
+        writer.write(event)
+        writer.log_file.close()
+        team.send.assert_called_once_with(event)
+
+    async def test_writer_flushes_the_spool(self):
+        team = mock.Mock()
+        writer = EventWriter(team=team)
+        with mock.patch("time_tracker.writer.FLUSH_INTERVAL", 0.01):
+            writer.start()
+            await asyncio.sleep(0.1)
+            writer.close()
+        team.flush.assert_called()
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("unix:/tmp/s")[1], "/tmp/s")
+        self.assertEqual(parse_address("example.com:8000")[1], ("example.com", 8000))
+        with self.assertRaises(ValueError):
+            parse_address("example.com")
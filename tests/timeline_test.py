@@ -0,0 +1,157 @@
+import datetime
+import os
+import random
+import unittest
+
+from time_tracker import (
+    ONE_MINUTE,
+    Activity,
+    Event,
+    Span,
+    filter_spans,
+    get_cumulative_work,
+    get_machines_dir,
+    get_work_spans,
+    load_log,
+    log_event,
+    print_event,
+)
+from time_tracker.timeline import (
+    DayTimeline,
+    close,
+    load_source_timelines,
+    load_timelines,
+    open_,
+    overlap_minutes,
+    runs,
+    total_minutes,
+)
+
+from log_dir import temp_log_dir
+
+FIRST_DAY = datetime.date(2025, 1, 20)
+DAYS = [FIRST_DAY + datetime.timedelta(days=i) for i in range(10)]
+NOW = datetime.datetime(2025, 1, 29, 15, 0)
+
+
+def random_events(rnd: random.Random, day: datetime.date):
+    """Work of at least 5 minutes, and breaks of at least one, on the minute."""
+    t = datetime.datetime.combine(day, datetime.time(7, 0))
+    working = False
+    while t.hour < 20:
+        if working:
+            t += rnd.randrange(5, 120) * ONE_MINUTE
+            if rnd.random() < 0.3:
+                yield Event(t, "project", Activity.WORKING, rnd.choice("ABC"))
+                continue
+            yield Event(t, "lock", Activity.IDLE, "")
+            working = False
+        else:
+            t += rnd.choice([1, 2, 3, 4, 30, 60]) * ONE_MINUTE
+            yield Event(t, "unlock", Activity.WORKING, rnd.choice(["", "", "A", "B"]))
+            working = True
+
+
+class TestBits(unittest.TestCase):
+    def test_runs(self):
+        self.assertEqual(list(runs(0b1110011)), [(0, 2), (4, 7)])
+        self.assertEqual(list(runs(0)), [])
+
+    def test_close(self):
+        self.assertEqual(close(0b1001, 2), 0b1111)
+        self.assertEqual(close(0b10001, 2), 0b10001)
+
+    def test_open(self):
+        self.assertEqual(open_(0b1101, 1), 0b1100)
+
+
+class TestTimeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def test_matches_filter_spans(self):
+        for seed in range(20):
+            rnd = random.Random(seed)
+            for day in DAYS:
+                spans = list(get_work_spans(list(random_events(rnd, day)), NOW))
+                expected = filter_spans(spans)
+                timeline = DayTimeline.from_spans(day, spans).filtered()
+                self.assertEqual(timeline.spans(), expected, (seed, day))
+                self.assertEqual(timeline.hours(), get_cumulative_work(expected))
+                for project in "ABC":
+                    self.assertEqual(
+                        timeline.minutes(project),
+                        sum(
+                            s.rounded_duration() // ONE_MINUTE
+                            for s in expected
+                            if s.project == project
+                        ),
+                    )
+
+    def test_rounding(self):
+        day = DAYS[0]
+        start = datetime.datetime(2025, 1, 20, 9, 0, 29)
+        span = Span(start, start + datetime.timedelta(minutes=10, seconds=2), "P")
+        timeline = DayTimeline.from_spans(day, [span])
+        self.assertEqual(timeline.minutes("P"), span.rounded_duration() // ONE_MINUTE)
+
+    def test_load_timelines(self):
+        rnd = random.Random(1)
+        for day in DAYS:
+            for e in random_events(rnd, day):
+                log_event(e.name, e.activity, e.project, e.timestamp)
+        timelines = load_timelines(DAYS, NOW)
+        self.assertEqual(list(timelines), DAYS)
+        for day in DAYS:
+            spans = get_work_spans(load_log(day), NOW)
+            self.assertEqual(
+                timelines[day].bits, DayTimeline.from_spans(day, spans).bits
+            )
+        self.assertAlmostEqual(
+            total_minutes(t.filtered() for t in timelines.values()),
+            sum(
+                get_cumulative_work(filter_spans(get_work_spans(load_log(d), NOW)))
+                for d in DAYS
+            )
+            * 60,
+        )
+
+    def test_load_filtered_timelines(self):
+        day = DAYS[0]
+
+        def at(hour, minute, second=0):
+            return datetime.datetime.combine(day, datetime.time(hour, minute, second))
+
+        # Work of just over a minute, and a break of just under three, which
+        # the rounded bits alone would filter differently.
+        log_event("unlock", Activity.WORKING, "P", at(9, 0))
+        log_event("lock", Activity.IDLE, "", at(9, 1, 20))
+        log_event("unlock", Activity.WORKING, "P", at(9, 5))
+        log_event("lock", Activity.IDLE, "", at(9, 10))
+        log_event("unlock", Activity.WORKING, "P", at(9, 12, 50))
+        log_event("lock", Activity.IDLE, "", at(9, 30))
+        expected = filter_spans(get_work_spans(load_log(day), NOW))
+        timeline = load_timelines([day], NOW, filtered=True)[day]
+        self.assertEqual(timeline.minutes(), 26)
+        self.assertEqual(timeline.hours(), get_cumulative_work(expected))
+        self.assertEqual(timeline.bits, DayTimeline.from_spans(day, expected).bits)
+        self.assertEqual(load_timelines([day], NOW)[day].filtered().minutes(), 22)
+
+    def test_machines(self):
+        day = DAYS[0]
+
+        def at(hour, minute):
+            return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+        log_event("unlock", Activity.WORKING, "P", at(9, 0))
+        log_event("lock", Activity.IDLE, "", at(12, 0))
+        os.makedirs(os.path.join(get_machines_dir(), "laptop"))
+        with open(os.path.join(get_machines_dir(), "laptop", f"{day}.log"), "w") as log:
+            print_event(Event(at(11, 30), "unlock", Activity.WORKING, "P"), log)
+            print_event(Event(at(13, 0), "lock", Activity.IDLE, ""), log)
+        timelines = load_source_timelines(day, NOW)
+        self.assertEqual(sorted(timelines), ["", "laptop"])
+        self.assertEqual(overlap_minutes(timelines.values()), 30)
+        main, laptop = timelines[""], timelines["laptop"]
+        self.assertEqual((main & laptop).minutes("P"), 30)
+        self.assertEqual((main | laptop).minutes(), 240)
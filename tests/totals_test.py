@@ -0,0 +1,76 @@
+import datetime
+import unittest
+
+from time_tracker import (
+    ONE_MINUTE,
+    Activity,
+    evaluate_day,
+    get_log_filename,
+    log_event,
+)
+from time_tracker.status import update_status
+from time_tracker.totals import load_totals, reconcile
+
+from log_dir import temp_log_dir
+
+# Monday to Sunday, and the Monday after, which is in February.
+DAYS = [datetime.date(2025, 1, 27) + datetime.timedelta(days=i) for i in range(8)]
+NOW = datetime.datetime(2025, 2, 10, 12, 0)
+
+
+def at(day: datetime.date, hour: int, minute: int) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+class TestTotals(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+
+    def log(self, name: str, activity: Activity, project: str, now: datetime.datetime):
+        log_event(name, activity, project, now)
+        update_status(now.date())
+
+    def log_days(self):
+        for i, day in enumerate(DAYS):
+            self.log("unlock", Activity.WORKING, "P", at(day, 8, 59))
+            self.log("lock", Activity.IDLE, "", at(day, 10, 30))
+            # A short break, merged with the spans around it.
+            self.log("unlock", Activity.WORKING, "", at(day, 10, 32))
+            self.log("project", Activity.WORKING, "Q", at(day, 11, i))
+            self.log("lock", Activity.IDLE, "", at(day, 12, 20 + i))
+
+    def expected_minutes(self, days):
+        minutes = {}
+        for day in days:
+            for s in evaluate_day(day, NOW).spans:
+                m = s.rounded_duration() // ONE_MINUTE
+                minutes[s.project] = minutes.get(s.project, 0) + m
+        return minutes
+
+    def test_incremental(self):
+        self.log_days()
+        totals = load_totals()
+        self.assertEqual(totals.get(DAYS[0], "day"), {"P": 121, "Q": 80})
+        self.assertEqual(totals.get(DAYS[2], "week"), self.expected_minutes(DAYS[:7]))
+        self.assertEqual(totals.get(DAYS[0], "month"), self.expected_minutes(DAYS[:5]))
+        self.assertEqual(totals.get(DAYS[7], "month"), self.expected_minutes(DAYS[5:]))
+        self.assertEqual(totals.get(DAYS[7], "week"), totals.get(DAYS[7], "day"))
+
+    def test_open_span_is_not_counted(self):
+        self.log("unlock", Activity.WORKING, "P", at(DAYS[0], 9, 0))
+        self.assertEqual(load_totals().get(DAYS[0], "day"), {})
+        self.log("lock", Activity.IDLE, "", at(DAYS[0], 9, 30))
+        self.assertEqual(load_totals().get(DAYS[0], "week"), {"P": 30})
+
+    def test_reconcile(self):
+        self.log_days()
+        self.assertEqual(reconcile(), (8, 0))
+        # Edit the log of a past day behind the counters' back.
+        with open(get_log_filename(DAYS[1]), "a") as log:
+            log.write(f"{at(DAYS[1], 13, 0)}\tunlock\tWORKING\tR\n")
+            log.write(f"{at(DAYS[1], 14, 0)}\tlock\tIDLE\t\n")
+        self.assertNotIn("R", load_totals().get(DAYS[1], "week"))
+        self.assertEqual(reconcile(), (8, 1))
+        totals = load_totals()
+        self.assertEqual(totals.get(DAYS[1], "week"), self.expected_minutes(DAYS[:7]))
+        self.assertEqual(totals.get(DAYS[1], "week")["R"], 60)
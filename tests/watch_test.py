@@ -0,0 +1,69 @@
+import contextlib
+import datetime
+import io
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, log_event, parse_log_line
+from time_tracker.watch import POLL_MAX, POLL_MIN, watch
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+
+
+def at(hour: int, minute: int, second: int = 0) -> datetime.datetime:
+    return datetime.datetime(2025, 1, 27, hour, minute, second)
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        self.now = at(10, 0)
+        self.sleeps = []
+        self.actions = {}
+
+    def clock(self) -> datetime.datetime:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += datetime.timedelta(seconds=seconds)
+        action = self.actions.get(len(self.sleeps))
+        if action:
+            action()
+
+    def watch(self, polls: int) -> list[str]:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            watch(self.clock, self.sleep, polls)
+        return out.getvalue().split("\033[H\033[J")[1:]
+
+    def test_backoff_while_idle(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        views = self.watch(8)
+        self.assertEqual(len(views), 1)
+        self.assertEqual(self.sleeps[:3], [POLL_MIN, POLL_MIN * 2, POLL_MIN * 4])
+        self.assertEqual(self.sleeps[-1], POLL_MAX)
+        self.assertIn("Working on P since 09:00", views[0])
+
+    def test_update_on_change(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        self.actions[6] = lambda: log_event("b", Activity.IDLE, "", at(10, 0, 5))
+        with mock.patch(
+            "time_tracker.tail.parse_log_line", wraps=parse_log_line
+        ) as parse:
+            views = self.watch(10)
+        # Only the appended event was parsed after the first view.
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(len(views), 2)
+        self.assertEqual(self.sleeps[6], POLL_MIN)
+        self.assertNotIn("Working", views[1])
+        self.assertIn("1.00", views[1])
+
+    def test_redraw_each_minute(self):
+        log_event("a", Activity.WORKING, "P", at(9, 0))
+        self.now = at(10, 0, 58)
+        views = self.watch(6)
+        self.assertEqual(len(views), 2)
+        self.assertIn("10:01", views[1])
@@ -0,0 +1,86 @@
+import datetime
+import os
+import unittest
+from unittest import mock
+
+from time_tracker import Activity, Event, get_log_filename, load_log
+from time_tracker.status import read_status
+from time_tracker.writer import EventWriter
+
+from log_dir import temp_log_dir
+
+DAY = datetime.date(2025, 1, 27)
+
+
+def at(hour: int, minute: int, second: float = 0) -> datetime.datetime:
+    return datetime.datetime(2025, 1, 27, hour, minute) + datetime.timedelta(
+        seconds=second
+    )
+
+
+class TestWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = temp_log_dir(self)
+        self.writer = EventWriter()
+        self.writer.start()
+        self.addCleanup(self.writer.close)
+
+    def names(self, day: datetime.date = DAY):
+        return [e.name for e in load_log(day)]
+
+    def test_write(self):
+        self.writer.log("a", Activity.WORKING, "", at(9, 0))
+        self.writer.log("b", Activity.IDLE, "", at(10, 0))
+        self.writer.log("c", Activity.WORKING, "P", at(10, 30))
+        self.writer.close()
+        self.assertEqual(self.names(), ["a", "b", "c"])
+        self.assertEqual(load_log(DAY)[-1].project, "P")
+
+    def test_coalesce_burst(self):
+        self.writer.log("unlock", Activity.WORKING, "", at(9, 0))
+        self.writer.log("wake", Activity.WORKING, "", at(9, 0, 0.2))
+        self.writer.log("screens wake", Activity.WORKING, "", at(9, 0, 0.5))
+        self.writer.log("lock", Activity.IDLE, "", at(9, 0, 1))
+        self.writer.log("sleep", Activity.IDLE, "", at(9, 0, 1.5))
+        self.writer.log("unlock", Activity.WORKING, "", at(9, 0, 10))
+        self.writer.log("wake", Activity.WORKING, "", at(9, 0, 20))
+        self.writer.close()
+        self.assertEqual(self.names(), ["unlock", "lock", "unlock", "wake"])
+
+    def test_project_is_not_coalesced(self):
+        self.writer.log("a", Activity.WORKING, "", at(9, 0))
+        self.writer.log("b", Activity.WORKING, "P", at(9, 0, 1))
+        self.writer.close()
+        self.assertEqual(self.names(), ["a", "b"])
+
+    def test_new_day(self):
+        tomorrow = DAY + datetime.timedelta(days=1)
+        self.writer.log("a", Activity.IDLE, "", at(23, 59, 59.5))
+        self.writer.log("b", Activity.IDLE, "", datetime.datetime(2025, 1, 28, 0, 0, 1))
+        self.writer.close()
+        self.assertEqual(self.names(), ["a"])
+        self.assertEqual(self.names(tomorrow), ["b"])
+
+    def test_removed_log_is_reopened(self):
+        writer = EventWriter()
+        writer.write(Event(at(9, 0), "a", Activity.WORKING))
+        os.remove(get_log_filename(DAY))
+        writer.write(Event(at(10, 0), "b", Activity.IDLE))
+        writer.log_file.close()
+        self.assertEqual(self.names(), ["b"])
+
+    def test_status_is_updated(self):
+        self.writer.log("a", Activity.WORKING, "", at(9, 0))
+        self.writer.log("b", Activity.IDLE, "", at(10, 0))
+        self.writer.close()
+        status = read_status(DAY)
+        self.assertIsNotNone(status)
+        self.assertEqual(status["results"]["total_hours"], 1.0)
+
+    def test_other_formats(self):
+        with mock.patch("time_tracker.LOG_FORMAT", "binary"):
+            self.writer.log("a", Activity.WORKING, "", at(9, 0))
+            self.writer.log("b", Activity.IDLE, "", at(10, 0))
+            self.writer.close()
+        self.assertFalse(os.path.exists(get_log_filename(DAY)))
+        self.assertEqual(self.names(), ["a", "b"])